@@ -0,0 +1 @@
+"""Benchmarks dos caminhos quentes com dados sintéticos no esquema das bases reais (ver benchmarks.run)."""
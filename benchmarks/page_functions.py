@@ -0,0 +1,50 @@
+"""Funções extraídas dos arquivos das páginas, sem executar o script Streamlit.
+
+As páginas são scripts (carregam a base e desenham a tela no nível do módulo), então importá-las
+rodaria a página inteira. Aqui só as definições de função pedidas são compiladas (via ast), num
+namespace com os mesmos módulos que as páginas importam — o benchmark mede o código real da página.
+"""
+import ast
+import os
+import re
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+PAGES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'pages')
+
+# Página de referência de cada grupo de benchmark
+VAR_PAGE = '3_Trading_Score.py'
+BUILDER_PAGE = '8_Meubacktest.py'
+
+
+def load_page_functions(page, names):
+    """{nome: função} das definições `names` do arquivo `page` (em pages/)."""
+    path = os.path.join(PAGES_DIR, page)
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read(), filename=path)
+    wanted = [node for node in tree.body if isinstance(node, ast.FunctionDef) and node.name in names]
+    missing = set(names) - {node.name for node in wanted}
+    if missing:
+        raise KeyError(f"Funções ausentes em {page}: {', '.join(sorted(missing))}")
+    namespace = {'st': st, 'pd': pd, 'np': np, 're': re}
+    exec(compile(ast.Module(body=wanted, type_ignores=[]), path, 'exec'), namespace)
+    return {name: namespace[name] for name in names}
+
+
+def var_page_functions(page=VAR_PAGE):
+    """Funções do backtest VAR x Lay de uma página (cálculo das VARs, estratégias, backtest e médias)."""
+    return load_page_functions(page, ['pre_calculate_all_vars', 'define_var_strategies', 'get_score_condition',
+                                      'run_combined_backtest', 'check_combined_moving_averages'])
+
+
+def page_markets(page=VAR_PAGE):
+    """Lista cs_lay_strategies_to_test da página (avaliada a partir da atribuição literal)."""
+    path = os.path.join(PAGES_DIR, page)
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read(), filename=path)
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(t, 'id', None) == 'cs_lay_strategies_to_test' for t in node.targets):
+            return ast.literal_eval(node.value)
+    raise KeyError(f"cs_lay_strategies_to_test ausente em {page}")
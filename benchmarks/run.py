@@ -0,0 +1,323 @@
+"""Suíte de benchmarks dos caminhos quentes (carregamento, VARs, grade VAR x Lay, jogos do dia, forma, dashboard).
+
+Uso (na raiz do repositório):
+    python -m benchmarks.run                              # 10k, 100k e 1M linhas, todos os grupos
+    python -m benchmarks.run --sizes 10k --only vars,grid
+    python -m benchmarks.run --compare benchmarks/results/<anterior>.json
+
+Os dados são sintéticos (benchmarks.synthetic) e determinísticos pela semente. Cada medição roda
+`--repeat` vezes (com --memory, mais uma sob tracemalloc para o pico de memória) e grava melhor
+tempo, mediana e todas as execuções num JSON em benchmarks/results/
+(com commit, versões e máquina), para comparar execuções ao longo do tempo com --compare.
+A base colunar e os XLSX gerados ficam num diretório temporário (BET_STORE_DIR / --data-dir).
+"""
+import argparse
+import atexit
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# A base colunar dos benchmarks nunca deve tocar no espelho real (.data_mirror) das páginas
+_WORK_DIR = tempfile.mkdtemp(prefix='bet_bench_')
+atexit.register(shutil.rmtree, _WORK_DIR, ignore_errors=True)
+os.environ.setdefault('BET_MIRROR_DIR', os.path.join(_WORK_DIR, 'mirror'))
+os.environ.setdefault('BET_STORE_DIR', os.path.join(_WORK_DIR, 'store'))
+os.environ.setdefault('BET_OFFLINE', '1')
+
+import numpy as np
+import pandas as pd
+import streamlit.logger
+
+streamlit.logger.set_log_level('ERROR') # Avisos de "sem runtime" dos caches fora do Streamlit
+
+from benchmarks import synthetic
+from benchmarks.page_functions import BUILDER_PAGE, load_page_functions, page_markets, var_page_functions
+from core import data
+from core.dashboard import build_summary_cube
+from core.form import build_team_form_index, team_form_window
+from core.leagues import filter_approved_leagues, prepare_leagues
+from core.store import read_manifest
+from core.user_data import preprocess_user_frame
+from core.vars import BETFAIR_ODDS_MAP, compute_var_matrix, var_dict_from_matrix
+from core.walkforward import walk_forward
+from core.xlsx_reader import read_xlsx_streaming
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT_DIR, 'benchmarks', 'results')
+
+GROUPS = ('loaders', 'vars', 'grid', 'daily', 'form', 'dashboard')
+DEFAULT_SIZES = '10k,100k,1m'
+# Gerar e ler XLSX de 1M linhas leva muitos minutos; acima disso os loaders são pulados
+DEFAULT_LOADER_MAX_ROWS = 100_000
+# Amostra de jogos para a busca linha a linha de get_team_last_n_games (página 8)
+FORM_SAMPLE_ROWS = 200
+FORM_GAMES = 5
+
+
+# --- Medição ---
+
+def measure(func, args):
+    """Tempos (s) de `args.repeat` execuções de func(); com --memory, mais uma execução sob tracemalloc (pico em bytes)."""
+    runs = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        func()
+        runs.append(time.perf_counter() - start)
+    peak = None
+    if args.memory:
+        tracemalloc.start()
+        try:
+            func()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return runs, peak
+
+
+def _result(benchmark, rows, measured, **extra):
+    runs, peak = measured
+    entry = {'benchmark': benchmark, 'rows': rows, 'best': min(runs), 'median': statistics.median(runs),
+             'runs': runs}
+    if peak is not None:
+        entry['py_peak_mb'] = round(peak / 2**20, 1)
+    entry.update(extra)
+    return entry
+
+
+# --- Réplicas dos laços das páginas (mesmas chamadas, sem a barra de progresso) ---
+
+def page_grid(df_historico, vars_dict, fns, markets, strategy_limit=None):
+    """Grade VAR x Lay da página: backtest + médias móveis de cada combinação; retorna as aprovadas."""
+    strategy_list, _ = fns['define_var_strategies'](vars_dict)
+    approved = []
+    for var_strategy_func, var_strategy_name in strategy_list[:strategy_limit]:
+        df_filtered_by_var = var_strategy_func(df_historico)
+        if df_filtered_by_var.empty:
+            continue
+        for cs_lay_name in markets:
+            combined_name = f"VAR_{var_strategy_name}_CS_{cs_lay_name}"
+            backtest_result = fns['run_combined_backtest'](df_filtered_by_var.copy(), cs_lay_name, combined_name)
+            if backtest_result["Total de Jogos"] > 0:
+                medias_result = fns['check_combined_moving_averages'](backtest_result["Dataframe"], combined_name)
+                if medias_result["Acima dos Limiares"]:
+                    approved.append(combined_name)
+    return approved
+
+
+def page_daily_scoring(df_daily, approved, fns):
+    """Recomendações dos jogos do dia da página: VARs do dia, filtros aprovados e agrupamento por jogo."""
+    vars_dict_daily = fns['pre_calculate_all_vars'](df_daily.copy())
+    _, daily_var_strategy_map = fns['define_var_strategies'](vars_dict_daily)
+    cols_exist_daily = [col for col in ['Time', 'League', 'Home', 'Away'] if col in df_daily.columns]
+    recommendations = []
+    for combined_name in approved:
+        var_name, cs_lay_name = combined_name[len('VAR_'):].split('_CS_')
+        df_daily_filtered = daily_var_strategy_map[var_name](df_daily)
+        for _, row in df_daily_filtered.iterrows():
+            rec = row[cols_exist_daily].to_dict()
+            rec['Recomendação'] = cs_lay_name
+            rec['Filtro_VAR'] = var_name
+            recommendations.append(rec)
+    if not recommendations:
+        return pd.DataFrame()
+    return pd.DataFrame(recommendations).groupby(cols_exist_daily).agg(
+        Recomendações=('Recomendação', lambda x: ', '.join(sorted(set(x)))),
+        Filtros_VAR=('Filtro_VAR', lambda x: ', '.join(sorted(set(x))))).reset_index()
+
+
+# --- Grupos de benchmark ---
+
+def bench_loaders(n, args):
+    """Leitura em streaming do XLSX, reconstrução da base colunar e leitura do DataFrame da geração."""
+    if n > args.loader_max_rows:
+        return [{'benchmark': 'loaders', 'rows': n, 'skipped': f"acima de --loader-max-rows ({args.loader_max_rows})"}]
+    results = []
+    for kind in ('bet365', 'betfair'):
+        path = synthetic.cached_xlsx(kind, n, args.data_dir, args.seed)
+        results.append(_result(f"xlsx_streaming_{kind}", n, measure(lambda: read_xlsx_streaming(path), args)))
+        name = f"bench_{kind}_{n}"
+        info = {'path': path, 'version': f"bench-{kind}-{n}", 'url': None}
+        results.append(_result(f"store_rebuild_{kind}", n,
+                               measure(lambda: data._rebuild_store(name, info), args)))
+        store_path = read_manifest(name)['path']
+
+        def read_frame():
+            data._history_frame.clear()
+            return data.read_history_frame(store_path)
+        results.append(_result(f"read_history_frame_{kind}", n, measure(read_frame, args)))
+    return results
+
+
+def bench_vars(n, args, frames):
+    """Matriz das 77 VARs (core.vars) e pre_calculate_all_vars da página, na base Betfair."""
+    df = frames['betfair']
+    fns = frames['page_functions']
+    return [
+        _result('vars_matrix', n, measure(lambda: compute_var_matrix(df, BETFAIR_ODDS_MAP), args)),
+        _result('vars_page', n, measure(lambda: fns['pre_calculate_all_vars'](df), args)),
+    ]
+
+
+def bench_grid(n, args, frames):
+    """Grade completa VAR x Lay da página (ou as primeiras --max-strategies estratégias) e o walk-forward."""
+    df = frames['betfair_approved']
+    fns = frames['page_functions']
+    markets = frames['markets']
+    vars_dict = var_dict_from_matrix(compute_var_matrix(df, BETFAIR_ODDS_MAP), df.index)
+    strategy_list, _ = fns['define_var_strategies'](vars_dict)
+    n_strategies = min(len(strategy_list), args.max_strategies or len(strategy_list))
+    approved = []
+
+    def grid():
+        approved[:] = page_grid(df, vars_dict, fns, markets, n_strategies)
+    runs = measure(grid, args)
+    return [
+        _result('grid_page', n, runs, strategies=n_strategies, markets=len(markets), approved=len(approved)),
+        _result('grid_walk_forward', n, measure(lambda: walk_forward(df, strategy_list, markets, 24, 0.96), args),
+                strategies=len(strategy_list), markets=len(markets), folds=24),
+    ]
+
+
+def bench_daily(n, args, frames):
+    """Recomendações dos jogos do dia (n // 100 jogos, entre 100 e 2.000) com todas as combinações aprovadas (pior caso)."""
+    daily_rows = min(2000, max(100, n // 100))
+    df_daily = filter_approved_leagues(prepare_leagues(synthetic.daily_games(daily_rows, 'betfair', args.seed + 1)))
+    fns = frames['page_functions']
+    strategy_list, _ = fns['define_var_strategies'](fns['pre_calculate_all_vars'](df_daily.copy()))
+    approved = [f"VAR_{name}_CS_{market}" for _, name in strategy_list for market in frames['markets']]
+    return [_result('daily_scoring', n, measure(lambda: page_daily_scoring(df_daily, approved, fns), args),
+                    daily_rows=len(df_daily), combinations=len(approved))]
+
+
+def bench_form(n, args, frames):
+    """Índice de forma dos times (construção + janela de todos os jogos) vs. busca linha a linha da página 8."""
+    df = frames['bet365']
+    inputs = (df['Date'], df['Home'], df['Away'], df['Goals_H_FT'], df['Goals_A_FT'])
+
+    def indexed():
+        index = build_team_form_index(*inputs)
+        team_form_window(index, FORM_GAMES, 'home')
+        team_form_window(index, FORM_GAMES, 'away')
+    results = [_result('team_form_index', n, measure(indexed, args))]
+
+    get_team_last_n_games = load_page_functions(BUILDER_PAGE, ['get_team_last_n_games'])['get_team_last_n_games']
+    sample = df.iloc[np.linspace(0, len(df) - 1, min(FORM_SAMPLE_ROWS, len(df))).astype(int)]
+
+    def row_by_row():
+        for _, game in sample.iterrows():
+            get_team_last_n_games(df, game['Home'], game['Date'], FORM_GAMES)
+            get_team_last_n_games(df, game['Away'], game['Date'], FORM_GAMES)
+    results.append(_result('team_form_page_sample', n, measure(row_by_row, args), sampled_rows=len(sample)))
+    return results
+
+
+def bench_dashboard(n, args, frames):
+    """Pré-processamento da planilha do usuário e cubo liga x mês das páginas de dashboard."""
+    sheet = synthetic.user_sheet(n, args.seed)
+    processed = preprocess_user_frame(sheet)
+    return [
+        _result('user_preprocess', n, measure(lambda: preprocess_user_frame(sheet), args)),
+        _result('dashboard_cube', n, measure(lambda: build_summary_cube(processed), args)),
+    ]
+
+
+BENCHMARKS = {'vars': bench_vars, 'grid': bench_grid, 'daily': bench_daily, 'form': bench_form,
+              'dashboard': bench_dashboard}
+
+
+# --- Execução e registro ---
+
+def _frames(n, seed):
+    """Dados sintéticos de um tamanho, gerados uma vez e compartilhados pelos grupos."""
+    betfair = prepare_leagues(synthetic.betfair_history(n, seed))
+    return {
+        'betfair': betfair,
+        'betfair_approved': filter_approved_leagues(betfair),
+        'bet365': synthetic.bet365_history(n, seed),
+        'page_functions': var_page_functions(),
+        'markets': page_markets(),
+    }
+
+
+def _metadata(args):
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT_DIR, capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'), 'commit': commit,
+        'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+        'platform': platform.platform(), 'cpu_count': os.cpu_count(),
+        'sizes': args.sizes, 'groups': args.only, 'repeat': args.repeat, 'seed': args.seed,
+    }
+
+
+def compare(current, previous_path):
+    """Texto com a mediana anterior, a atual e a razão atual/anterior de cada (benchmark, linhas) em comum."""
+    with open(previous_path, encoding='utf-8') as f:
+        previous = {(r['benchmark'], r['rows']): r for r in json.load(f)['results'] if 'median' in r}
+    lines = [f"{'benchmark':<28} {'linhas':>9} {'anterior':>10} {'atual':>10} {'razão':>7}"]
+    for result in current:
+        old = previous.get((result['benchmark'], result['rows']))
+        if old is None or 'median' not in result:
+            continue
+        lines.append(f"{result['benchmark']:<28} {result['rows']:>9} {old['median']:>9.3f}s "
+                     f"{result['median']:>9.3f}s {result['median'] / old['median']:>6.2f}x")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help="tamanhos separados por vírgula (10k, 100k, 1m ou número)")
+    parser.add_argument('--only', default=','.join(GROUPS), help=f"grupos: {', '.join(GROUPS)}")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--memory', action='store_true', help="mede também o pico de memória Python (tracemalloc)")
+    parser.add_argument('--max-strategies', type=int, default=None, help="limita as estratégias VAR da grade da página")
+    parser.add_argument('--loader-max-rows', type=synthetic.parse_size, default=DEFAULT_LOADER_MAX_ROWS)
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'bet_bench_data'),
+                        help="onde guardar os XLSX sintéticos (reaproveitados entre execuções)")
+    parser.add_argument('--output', default=None, help="arquivo JSON de saída (padrão: benchmarks/results/<data>.json)")
+    parser.add_argument('--compare', default=None, help="JSON de uma execução anterior para comparar")
+    args = parser.parse_args(argv)
+
+    groups = [group.strip() for group in args.only.split(',') if group.strip()]
+    unknown = set(groups) - set(GROUPS)
+    if unknown:
+        parser.error(f"grupos desconhecidos: {', '.join(sorted(unknown))}")
+    results = []
+    for size in args.sizes.split(','):
+        n = synthetic.parse_size(size)
+        frames = _frames(n, args.seed) if set(groups) & set(BENCHMARKS) else None
+        for group in groups:
+            group_results = bench_loaders(n, args) if group == 'loaders' else BENCHMARKS[group](n, args, frames)
+            for result in group_results:
+                if 'median' in result:
+                    memory = f"  pico {result['py_peak_mb']:.1f} MB" if 'py_peak_mb' in result else ""
+                    print(f"{result['benchmark']:<28} {n:>9} linhas  melhor {result['best']:.3f}s  "
+                          f"mediana {result['median']:.3f}s{memory}", flush=True)
+                else:
+                    print(f"{result['benchmark']:<28} {n:>9} linhas  pulado: {result['skipped']}", flush=True)
+            results.extend(group_results)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({'metadata': _metadata(args), 'results': results}, f, ensure_ascii=False, indent=2)
+    print(f"Resultados gravados em {output}")
+    if args.compare:
+        print(compare(results, args.compare))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
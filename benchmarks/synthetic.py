@@ -0,0 +1,174 @@
+"""Geradores de dados sintéticos com o esquema das bases reais (Bet365, Betfair, jogos do dia, planilha do usuário).
+
+Os gols vêm de Poisson com médias por jogo, e as odds são derivadas dessas médias com margem da
+casa, de modo que as VARs, os filtros e os mercados Lay tenham distribuições parecidas com as reais.
+Tudo é determinístico pela semente.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+from core.config import APPROVED_LEAGUES
+
+TEAMS_PER_LEAGUE = 20
+# Ligas aprovadas mais algumas fora da lista (o filtro de ligas também entra na medição)
+_UNAPPROVED_LEAGUES = ('ARGENTINA 3', 'INDIA 1', 'MALTA 1', 'VIETNAM 2')
+LEAGUES = tuple(sorted(APPROVED_LEAGUES))[:40] + _UNAPPROVED_LEAGUES
+
+SIZES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+
+BET365_GOAL_COLUMNS = ('Goals_H_HT', 'Goals_A_HT', 'Goals_H_FT', 'Goals_A_FT')
+BETFAIR_GOAL_COLUMNS = ('Goals_H', 'Goals_A')
+
+
+def parse_size(label):
+    """'10k', '100k', '1m' ou um número -> quantidade de linhas."""
+    label = str(label).strip().lower()
+    if label in SIZES:
+        return SIZES[label]
+    return int(float(label.rstrip('km')) * {'k': 1_000, 'm': 1_000_000}.get(label[-1], 1))
+
+
+def _odds(prob, margin=1.05):
+    """Odd com margem, arredondada como nas casas (2 casas decimais, mínimo 1.01)."""
+    with np.errstate(divide='ignore'):
+        return np.clip(np.round(1 / np.clip(prob * margin, 1e-6, None), 2), 1.01, 1000.0)
+
+
+def _poisson_cdf(lam, k):
+    """P(X <= k) de Poisson, vetorizada para k pequeno."""
+    term = np.exp(-lam)
+    total = term.copy()
+    for i in range(1, k + 1):
+        term = term * lam / i
+        total += term
+    return total
+
+
+def _poisson_pmf(lam, k):
+    return np.exp(-lam) * lam ** k / np.prod(np.arange(1, k + 1))
+
+
+def _minutes_strings(rng, goals_ht, goals_ft):
+    """Textos "[12, 45, 78]" com os minutos dos gols (os do 1º tempo até 45, os demais depois)."""
+    first = rng.integers(1, 46, size=(len(goals_ft), max(int(goals_ft.max(initial=0)), 1)))
+    second = rng.integers(46, 91, size=first.shape)
+    result = []
+    for i, (ht, ft) in enumerate(zip(goals_ht.tolist(), goals_ft.tolist())):
+        minutes = sorted(first[i, :ht].tolist() + second[i, :ft - ht].tolist())
+        result.append(str(minutes))
+    return result
+
+
+def _matches(n, seed):
+    """Base comum: data, liga, times, médias de gols e gols sorteados (ordem de data, como as planilhas)."""
+    rng = np.random.default_rng(seed)
+    league_idx = rng.integers(0, len(LEAGUES), n)
+    home_slot = rng.integers(0, TEAMS_PER_LEAGUE, n)
+    away_slot = (home_slot + rng.integers(1, TEAMS_PER_LEAGUE, n)) % TEAMS_PER_LEAGUE
+    leagues = np.array(LEAGUES, dtype=object)
+    home = pd.Series(leagues[league_idx]).str.title() + " Team " + pd.Series(home_slot).astype(str)
+    away = pd.Series(leagues[league_idx]).str.title() + " Team " + pd.Series(away_slot).astype(str)
+    days = np.sort(rng.integers(0, 6 * 365, n))
+    dates = pd.Timestamp('2019-07-01') + pd.to_timedelta(days, unit='D')
+
+    lam_h = rng.gamma(6.0, 0.25, n)
+    lam_a = rng.gamma(5.0, 0.24, n)
+    goals_h = rng.poisson(lam_h)
+    goals_a = rng.poisson(lam_a)
+    goals_h_ht = rng.binomial(goals_h, 0.45)
+    goals_a_ht = rng.binomial(goals_a, 0.45)
+    frame = pd.DataFrame({
+        'Date': dates, 'Time': pd.Series(rng.integers(10, 23, n)).astype(str).str.zfill(2) + ':00',
+        'League': leagues[league_idx], 'Home': home, 'Away': away,
+    })
+    return rng, frame, lam_h, lam_a, (goals_h_ht, goals_a_ht, goals_h, goals_a)
+
+
+def _result_probs(lam_h, lam_a):
+    """Probabilidades 1X2 aproximadas a partir das médias (empate pela soma dos placares iguais até 6)."""
+    p_draw = sum(_poisson_pmf(lam_h, k) * _poisson_pmf(lam_a, k) for k in range(7))
+    share_h = lam_h / (lam_h + lam_a)
+    return (1 - p_draw) * share_h, p_draw, (1 - p_draw) * (1 - share_h)
+
+
+def bet365_history(n, seed=0):
+    """Histórico no esquema Bet365 (gols HT/FT, minutos dos gols e odds dos mercados do construtor)."""
+    rng, df, lam_h, lam_a, (gh_ht, ga_ht, gh, ga) = _matches(n, seed)
+    df['Goals_H_HT'], df['Goals_A_HT'], df['Goals_H_FT'], df['Goals_A_FT'] = gh_ht, ga_ht, gh, ga
+    df['Goals_Min_H'] = _minutes_strings(rng, gh_ht, gh)
+    df['Goals_Min_A'] = _minutes_strings(rng, ga_ht, ga)
+    p_h, p_d, p_a = _result_probs(lam_h, lam_a)
+    df['Odd_H_FT'], df['Odd_D_FT'], df['Odd_A_FT'] = _odds(p_h), _odds(p_d), _odds(p_a)
+    ht_h, ht_d, ht_a = _result_probs(lam_h * 0.45, lam_a * 0.45)
+    df['Odd_H_HT'], df['Odd_D_HT'], df['Odd_A_HT'] = _odds(ht_h), _odds(ht_d), _odds(ht_a)
+    df['Odd_1X'], df['Odd_12'], df['Odd_X2'] = _odds(p_h + p_d), _odds(p_h + p_a), _odds(p_d + p_a)
+    for line in (0, 1, 2, 3, 4):
+        under = _poisson_cdf(lam_h + lam_a, line)
+        df[f"Odd_Over{line}5_FT"], df[f"Odd_Under{line}5_FT"] = _odds(1 - under), _odds(under)
+    for line in (0, 1, 2):
+        under = _poisson_cdf((lam_h + lam_a) * 0.45, line)
+        df[f"Odd_Over{line}5_HT"], df[f"Odd_Under{line}5_HT"] = _odds(1 - under), _odds(under)
+    btts = (1 - np.exp(-lam_h)) * (1 - np.exp(-lam_a))
+    df['Odd_BTTS_Yes'], df['Odd_BTTS_No'] = _odds(btts), _odds(1 - btts)
+    return df
+
+
+def betfair_history(n, seed=0):
+    """Histórico no esquema Betfair Exchange (gols FT e odds Back/Lay usadas nas VARs)."""
+    rng, df, lam_h, lam_a, (_, _, gh, ga) = _matches(n, seed)
+    df['Goals_H'], df['Goals_A'] = gh, ga
+    p_h, p_d, p_a = _result_probs(lam_h, lam_a)
+    df['Odd_H_Back'], df['Odd_D_Back'], df['Odd_A_Back'] = _odds(p_h, 1.02), _odds(p_d, 1.02), _odds(p_a, 1.02)
+    under = _poisson_cdf(lam_h + lam_a, 2)
+    df['Odd_Over25_FT_Back'], df['Odd_Under25_FT_Back'] = _odds(1 - under, 1.02), _odds(under, 1.02)
+    btts = (1 - np.exp(-lam_h)) * (1 - np.exp(-lam_a))
+    df['Odd_BTTS_Yes_Back'], df['Odd_BTTS_No_Back'] = _odds(btts, 1.02), _odds(1 - btts, 1.02)
+    for h, a in ((0, 0), (0, 1), (1, 0)):
+        df[f"Odd_CS_{h}x{a}_Lay"] = _odds(_poisson_pmf(lam_h, h) * _poisson_pmf(lam_a, a), 0.99)
+    return df
+
+
+def daily_games(n, source='betfair', seed=0):
+    """Planilha de jogos do dia: mesmas colunas de odds do histórico, sem gols."""
+    history = betfair_history(n, seed) if source == 'betfair' else bet365_history(n, seed)
+    goal_columns = BETFAIR_GOAL_COLUMNS if source == 'betfair' else BET365_GOAL_COLUMNS + ('Goals_Min_H', 'Goals_Min_A')
+    return history.drop(columns=list(goal_columns))
+
+
+def user_sheet(n, seed=0):
+    """Planilha do usuário das páginas de dashboard (placar combinado "HT FT" e primeiro golo)."""
+    rng, df, _, _, (gh_ht, ga_ht, gh, ga) = _matches(n, seed)
+    first = np.where(gh + ga == 0, 'Nenhum', np.where(rng.random(n) < gh / np.maximum(gh + ga, 1), 'Casa', 'Visitante'))
+    return pd.DataFrame({
+        'Data': df['Date'].dt.strftime('%d/%m/%Y'), 'Liga': df['League'],
+        'Equipa Casa': df['Home'], 'Equipa Visitante': df['Away'],
+        'Resultado': [f"{a}-{b} {c}-{d}" for a, b, c, d in zip(gh_ht, ga_ht, gh, ga)],
+        'Primeiro Golo': first,
+    })
+
+
+def write_xlsx(df, path):
+    """Grava `df` como XLSX com openpyxl em modo somente escrita (bem mais rápido que DataFrame.to_excel)."""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(list(df.columns))
+    columns = [df[col].dt.to_pydatetime() if pd.api.types.is_datetime64_any_dtype(df[col]) else df[col].tolist()
+               for col in df.columns]
+    for row in zip(*columns):
+        sheet.append(row)
+    tmp_path = f"{path}.tmp"
+    workbook.save(tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+def cached_xlsx(kind, n, directory, seed=0):
+    """Caminho de um XLSX sintético ('bet365' ou 'betfair'), gerado uma vez por (tipo, linhas, semente)."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{kind}_{n}_{seed}.xlsx")
+    if not os.path.exists(path):
+        write_xlsx(bet365_history(n, seed) if kind == 'bet365' else betfair_history(n, seed), path)
+    return path
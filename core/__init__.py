@@ -0,0 +1 @@
+"""Camada compartilhada entre as páginas do aplicativo (configuração, ingestão e análises)."""
@@ -0,0 +1,69 @@
+"""Codificação das VARs em bins de quantis uint8 (como nos histogramas de gradient boosting).
+
+Cada VAR ganha até n_bins - 1 cortes (quantis da base, guardados em `edges`, completados com +inf);
+o código de um valor é o número de cortes <= valor, de 0 a n_bins - 1. A matriz de códigos
+(linhas x 77, uint8) ocupa 1/8 da matriz float64 e permite agregar com np.bincount e comparar
+faixas em 1 byte por valor. Os cortes ficam fixos: jogos novos são codificados com os cortes
+já gravados, o que permite estender os códigos só com as linhas novas.
+"""
+import numpy as np
+
+from core.config import VAR_BINS
+
+# Com a gravação desligada (BET_VAR_BINS=0) a codificação sob demanda continua usando 256 bins
+DEFAULT_BINS = max(2, VAR_BINS or 256)
+
+
+def quantile_edges(values, n_bins=DEFAULT_BINS):
+    """Cortes (n_bins - 1, completados com +inf) dos quantis de uma coluna; todos os bins têm algum valor."""
+    sorted_values = np.sort(values)
+    n = len(sorted_values)
+    edges = np.full(n_bins - 1, np.inf)
+    if not n:
+        return edges
+    inner = np.unique(sorted_values[(np.arange(1, n_bins) * n) // n_bins])
+    inner = inner[inner > sorted_values[0]] # Sem bin vazio no início
+    edges[:len(inner)] = inner
+    return edges
+
+
+def encode_column(values, edges):
+    """Códigos uint8 de uma coluna segundo os cortes."""
+    return np.searchsorted(edges, values, side='right').astype(np.uint8)
+
+
+def encode_var_matrix(matrix, edges=None, n_bins=DEFAULT_BINS):
+    """(códigos uint8 linhas x colunas, cortes colunas x (n_bins - 1)) da matriz de VARs.
+
+    Com `edges` informado (ex.: cortes já gravados na base), apenas codifica; senão calcula os quantis.
+    """
+    if edges is None:
+        edges = np.vstack([quantile_edges(matrix[:, j], n_bins) for j in range(matrix.shape[1])])
+    codes = np.empty(matrix.shape, dtype=np.uint8, order='F')
+    for j in range(matrix.shape[1]):
+        codes[:, j] = encode_column(matrix[:, j], edges[j])
+    return codes, edges
+
+
+def bin_counts(edges):
+    """Número de bins efetivamente usados por coluna (cortes finitos + 1)."""
+    return np.isfinite(edges).sum(axis=1) + 1
+
+
+def coarsen(codes, n_codes, n_bins):
+    """Reagrupa códigos finos (0..n_codes - 1) em até `n_bins` bins consecutivos (para buscas em pares)."""
+    if n_codes <= n_bins:
+        return codes.astype(np.intp)
+    return (codes.astype(np.intp) * n_bins) // n_codes
+
+
+def range_mask(codes, values, edges, lo, hi):
+    """Máscara exata de lo <= valor <= hi: os bins internos por comparação de códigos,
+    e só as linhas dos dois bins de fronteira conferidas no valor float."""
+    code_lo, code_hi = np.searchsorted(edges, [lo, hi], side='right')
+    mask = (codes > code_lo) & (codes < code_hi)
+    for boundary_code in {int(code_lo), int(code_hi)}:
+        rows = np.flatnonzero(codes == boundary_code)
+        row_values = values[rows]
+        mask[rows] = (row_values >= lo) & (row_values <= hi)
+    return mask
@@ -0,0 +1,80 @@
+"""Configuração compartilhada entre as páginas do aplicativo."""
+import os
+
+# --- INÍCIO: Fontes de Dados ---
+# A URL base pode ser trocada por variável de ambiente (ex.: servidor HTTP local para testes)
+DATA_BASE_URL = os.environ.get(
+    'BET_DATA_BASE_URL',
+    "https://raw.githubusercontent.com/81matheus/BasedeDadosBet365/main/pagesbet365"
+).rstrip('/')
+BET365_HISTORY_URL = f"{DATA_BASE_URL}/Exel-Base_de_Dados_Bet365_FiltradaCompleta.xlsx"
+BETFAIR_HISTORY_URL = f"{DATA_BASE_URL}/Base_de_Dados_Betfair Exchange_Filtrada_2025-04-23xl.xlsx"
+BETFAIR_2024_HISTORY_URL = f"{DATA_BASE_URL}/Base_de_Dados_Betfair_Exchange2024.xlsx"
+
+# Espelho local dos arquivos baixados (compartilhado por todas as páginas e processos)
+MIRROR_DIR = os.environ.get('BET_MIRROR_DIR', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.data_mirror'))
+# Base colunar local (.npy por coluna) mantida a partir das planilhas espelhadas
+STORE_DIR = os.environ.get('BET_STORE_DIR', os.path.join(MIRROR_DIR, 'store'))
+# Colunas que identificam uma partida de forma estável (ingestão incremental das bases históricas)
+MATCH_KEY_COLUMNS = ('Date', 'Home', 'Away', 'League')
+# Intervalo mínimo (s) entre duas revalidações condicionais da mesma URL
+REVALIDATE_SECONDS = int(os.environ.get('BET_REVALIDATE_SECONDS', '300'))
+# Intervalo (s) da atualização da base histórica em segundo plano; as páginas servem a versão vigente
+# sem esperar a revalidação. 0 = revalidar (e ingerir) durante a carga da página
+HISTORY_REFRESH_SECONDS = int(os.environ.get('BET_HISTORY_REFRESH_SECONDS', str(REVALIDATE_SECONDS)))
+# Timeout (conexão, leitura) em segundos das requisições HTTP
+HTTP_TIMEOUT = (5, 60)
+# BET_OFFLINE=1 serve tudo a partir do espelho local, sem acessar a rede
+OFFLINE = os.environ.get('BET_OFFLINE', '').strip().lower() in ('1', 'true', 'yes', 'sim')
+# --- FIM: Fontes de Dados ---
+
+# --- INÍCIO: Planilha do Usuário ---
+# Quantas planilhas processadas (por conteúdo) ficam em memória, compartilhadas entre páginas e sessões
+USER_SHEET_CACHE_ENTRIES = int(os.environ.get('BET_USER_SHEET_CACHE_ENTRIES', '8'))
+# Pasta opcional para guardar as planilhas processadas em Parquet (vazio = só em memória)
+USER_SHEET_CACHE_DIR = os.environ.get('BET_USER_SHEET_CACHE_DIR', '').strip()
+# --- FIM: Planilha do Usuário ---
+
+# --- INÍCIO: Mineração de Estratégias ---
+# Threads usadas pelo minerador de faixas de VAR (core.miner); 1 = sem paralelismo
+MINER_WORKERS = int(os.environ.get('BET_MINER_WORKERS', str(min(8, os.cpu_count() or 1))))
+# Bins de quantis das VARs codificadas em uint8 na base colunar (core.binning), de 2 a 256; 0 = não gravar os códigos
+VAR_BINS = min(256, int(os.environ.get('BET_VAR_BINS', '256')))
+# --- FIM: Mineração de Estratégias ---
+
+# --- INÍCIO: Construtor de Estratégias ---
+# Quantos conjuntos de jogos aprovados (por combinação de filtros) ficam em memória, compartilhados entre sessões
+BUILDER_CACHE_ENTRIES = int(os.environ.get('BET_BUILDER_CACHE_ENTRIES', '64'))
+# Jogos da amostra estratificada (liga x temporada) da prévia instantânea; 0 = sem prévia, sempre o resultado completo
+PREVIEW_SAMPLE_ROWS = int(os.environ.get('BET_PREVIEW_SAMPLE_ROWS', '200'))
+# Intervalo (s) com que a prévia verifica se o resultado completo, calculado em segundo plano, ficou pronto
+PREVIEW_POLL_SECONDS = float(os.environ.get('BET_PREVIEW_POLL_SECONDS', '2'))
+# --- FIM: Construtor de Estratégias ---
+
+# --- INÍCIO: Instrumentação ---
+# Mostra o expander "Performance" (tempo e memória por etapa) no fim das páginas de backtest
+PERF_PANEL = os.environ.get('BET_PERF_PANEL', '1').strip().lower() in ('1', 'true', 'yes', 'sim')
+# Destino dos logs estruturados das etapas: 'stderr', caminho de arquivo ou vazio (só o logging padrão)
+PERF_LOG = os.environ.get('BET_PERF_LOG', '').strip()
+# Perfil cProfile das etapas pesadas em todas as execuções (por página: ?profile=1 na URL)
+PROFILE = os.environ.get('BET_PROFILE', '').strip().lower() in ('1', 'true', 'yes', 'sim')
+# Pasta dos arquivos .prof (um por execução e etapa) e quantas funções o painel mostra
+PROFILE_DIR = os.environ.get('BET_PROFILE_DIR', os.path.join(MIRROR_DIR, 'profiles'))
+PROFILE_TOP = int(os.environ.get('BET_PROFILE_TOP', '30'))
+# Pico de memória alocada pelo Python em cada etapa (tracemalloc; deixa o processo mais lento)
+TRACE_MEMORY = os.environ.get('BET_TRACE_MEMORY', '').strip().lower() in ('1', 'true', 'yes', 'sim')
+# --- FIM: Instrumentação ---
+
+# --- INÍCIO: Definição das Ligas Aprovadas ---
+# Definidas uma única vez aqui; as páginas importam daqui em vez de copiar a lista.
+APPROVED_LEAGUES = frozenset([
+    "ARGENTINA 1", "ARGENTINA 2", "AUSTRALIA 1", "AUSTRIA 1", "AUSTRIA 2", "BELGIUM 1", "BELGIUM 2", "BOLIVIA 1", "BRAZIL 1", "BRAZIL 2",
+    "BULGARIA 1", "CHILE 1", "CHINA 1", "CHINA 2", "COLOMBIA 1", "COLOMBIA 2", "CROATIA 1", "CZECH 1", "DENMARK 1", "DENMARK 2",
+    "ECUADOR 1", "EGYPT 1", "ENGLAND 1", "ENGLAND 2", "ENGLAND 3", "ENGLAND 4", "ENGLAND 5", "ESTONIA 1", "EUROPA CHAMPIONS LEAGUE",
+    "EUROPA CONFERENCE LEAGUE", "EUROPA LEAGUE", "FINLAND 1", "FRANCE 1", "GREECE 1", "HUNGARY 1", "IRELAND 1", "IRELAND 2", "ISRAEL 1",
+    "ITALY 1", "ITALY 2", "JAPAN 1", "JAPAN 2", "MEXICO 1", "MEXICO 2",  "NETHERLANDS 1", "NETHERLANDS 2", "NORTHERN IRELAND 2", "NORWAY 1",
+    "NORWAY 2", "PARAGUAY 1", "PERU 1", "POLAND 1", "POLAND 2", "PORTUGAL 1", "PORTUGAL 2", "ROMANIA 1", "ROMANIA 2", "SAUDI ARABIA 1",
+    "SCOTLAND 1", "SCOTLAND 2", "SCOTLAND 3", "SCOTLAND 4", "SERBIA 1",  "SLOVAKIA 1", "SOUTH KOREA 1", "SOUTH KOREA 2", "SPAIN 1", "SPAIN 2",
+    "SWEDEN 1", "SWEDEN 2", "SWITZERLAND 1", "SWITZERLAND 2", "TURKEY 1", "TURKEY 2", "UKRAINE 1", "URUGUAY 1", "USA 1", "VENEZUELA 1", "WALES 1"
+])
+# --- FIM: Definição das Ligas Aprovadas ---
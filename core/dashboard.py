@@ -0,0 +1,279 @@
+"""Resumo das páginas de dashboard (9, 10, 11 e 13): cubo liga x mês calculado numa única agregação.
+
+Cada jogo vira uma linha de indicadores 0/1: resultados, mercados de gols, condições de cenário
+(empate no HT, casa perdendo no HT, 2-0 no HT...) e cada condição combinada com o desfecho medido.
+Uma única soma agrupada por (liga, mês) produz o cubo de contagens; qualquer combinação de liga e
+período é a soma das células correspondentes (summary_from_cube), sem voltar aos jogos. O resumo
+resultante tem uma linha por liga mais 'Todas' e é consultado por league_rates / league_scenarios.
+O cubo pode ser exportado em CSV (formato longo: LIGA, MES, métricas) para ferramentas de BI.
+
+O placar exato de cada jogo vira um código inteiro pequeno (0..17: 4x4 placares + duas goleadas),
+contado por liga com um único np.bincount; os rótulos ("2x1") só entram na tabela final.
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from core.user_data import MARKET_LIST
+
+ALL_LEAGUES = 'Todas'
+GAMES_COLUMN = 'JOGOS'
+CUBE_KEYS = ['LIGA', 'MES']
+RESULT_COLUMNS = ['CASA', 'EMPATE', 'VISITANTE', 'CASA_VENCE_HT', 'VISITANTE_VENCE_HT']
+RATE_COLUMNS = RESULT_COLUMNS + list(MARKET_LIST)
+
+# Códigos de placar: casa * 4 + fora para 0..3 gols; depois as goleadas (mais de 3 gols de um lado)
+SCORE_LABELS = [f"{h}x{a}" for h in range(4) for a in range(4)] + ['Goleada Mandante', 'Goleada Visitante']
+CS_PREFIX = 'CS|'
+
+# Condição de cenário -> desfechos medidos dentro dela
+SCENARIO_OUTCOMES = {
+    'tied_ht': ('CASA', 'VISITANTE'),
+    'tied_with_goals_ht': ('OVER_05_2T', 'Mais de 1,5', 'Menos de 4,5', 'Menos de 6,5'),
+    'home_losing_ht': ('CASA_NAO_PERDEU',),
+    'away_losing_ht': ('VISITANTE_NAO_PERDEU',),
+    'casa_2x0_ht': ('CASA',),
+    'fora_0x2_ht': ('VISITANTE',),
+    'home_scores_first': ('CASA',),
+    'away_scores_first': ('VISITANTE',),
+    'at_least_1_goal': ('Menos de 2,5',),
+    'at_least_2_goals': ('Menos de 4,5',),
+    'at_least_4_goals': ('Menos de 6,5',),
+}
+
+
+def _first_goal_flags(series, team):
+    """True onde o texto de 'PRIMEIRO GOLO' contém `team` (avaliando só os valores únicos)."""
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    flags = pd.Series(uniques, dtype=object).astype(str).str.lower().str.contains(team, regex=False).to_numpy(dtype=bool)
+    return np.append(flags, False)[codes]
+
+
+def _indicators(df):
+    """Colunas 0/1 (int8) de todos os resultados, mercados, condições e pares condição x desfecho."""
+    h_ht, a_ht = df['GOALS_H_HT'].to_numpy(), df['GOALS_A_HT'].to_numpy()
+    h_ft, a_ft = df['GOALS_H_FT'].to_numpy(), df['GOALS_A_FT'].to_numpy()
+    total_ft = df['TOTAL_GOALS_FT'].to_numpy()
+
+    outcomes = {col: df[col].to_numpy(dtype=bool) for col in RATE_COLUMNS}
+    outcomes['OVER_05_2T'] = df['GOALS_2T'].to_numpy() > 0.5
+    outcomes['CASA_NAO_PERDEU'] = h_ft >= a_ft
+    outcomes['VISITANTE_NAO_PERDEU'] = h_ft <= a_ft
+
+    conditions = {
+        'tied_ht': h_ht == a_ht,
+        'tied_with_goals_ht': (h_ht == a_ht) & (df['TOTAL_GOALS_HT'].to_numpy() > 0),
+        'home_losing_ht': h_ht < a_ht,
+        'away_losing_ht': h_ht > a_ht,
+        'casa_2x0_ht': df['CASA_ABRIU_2x0_HT'].to_numpy(dtype=bool),
+        'fora_0x2_ht': df['FORA_ABRIU_0x2_HT'].to_numpy(dtype=bool),
+        'home_scores_first': _first_goal_flags(df['PRIMEIRO GOLO'], 'casa'),
+        'away_scores_first': _first_goal_flags(df['PRIMEIRO GOLO'], 'visitante'),
+        'at_least_1_goal': total_ft >= 1,
+        'at_least_2_goals': total_ft >= 2,
+        'at_least_4_goals': total_ft >= 4,
+    }
+
+    columns = {GAMES_COLUMN: np.ones(len(df), dtype=np.int8)}
+    columns.update({col: outcomes[col] for col in RATE_COLUMNS})
+    for condition, measured in SCENARIO_OUTCOMES.items():
+        columns[condition] = conditions[condition]
+        for outcome in measured:
+            columns[f"{condition}|{outcome}"] = conditions[condition] & outcomes[outcome]
+    return pd.DataFrame({name: values.astype(np.int8) for name, values in columns.items()}, index=df.index)
+
+
+def score_codes(goals_h, goals_a):
+    """Código do placar final (índice em SCORE_LABELS); goleada da casa tem prioridade, como em classify_score."""
+    h = np.asarray(goals_h, dtype=np.int64)
+    a = np.asarray(goals_a, dtype=np.int64)
+    codes = np.clip(h, 0, 3) * 4 + np.clip(a, 0, 3)
+    codes[a > 3] = 17
+    codes[h > 3] = 16
+    return codes
+
+
+def _month_codes(dates):
+    """Código do mês (ano * 12 + mês - 1) de cada data; -1 para datas ausentes."""
+    dates = pd.to_datetime(pd.Series(dates), errors='coerce')
+    codes = (dates.dt.year * 12 + dates.dt.month - 1).to_numpy(dtype=np.float64, na_value=np.nan)
+    return np.where(np.isnan(codes), -1, codes).astype(np.int64)
+
+
+def build_summary_cube(df, league_column='LIGA', date_column='DATE'):
+    """Cubo de contagens por (liga, mês): uma linha por célula não vazia, colunas LIGA, MES e métricas.
+
+    LIGA ou MES ausentes ficam como None (esses jogos só contam quando não há recorte).
+    """
+    league_codes, leagues = pd.factorize(df[league_column], use_na_sentinel=True)
+    month_codes, months = pd.factorize(_month_codes(df[date_column]), sort=True)
+    month_labels = [f"{code // 12:04d}-{code % 12 + 1:02d}" if code >= 0 else None for code in months]
+    n_months = len(months)
+    cell = (league_codes + 1) * n_months + month_codes # Liga ausente (-1) vira o bloco 0
+
+    cells = _indicators(df).groupby(cell).sum()
+    n_scores = len(SCORE_LABELS)
+    scores = np.bincount(cell * n_scores + score_codes(df['GOALS_H_FT'], df['GOALS_A_FT']),
+                         minlength=(len(leagues) + 1) * n_months * n_scores).reshape(-1, n_scores)
+    for j, label in enumerate(SCORE_LABELS):
+        cells[CS_PREFIX + label] = scores[cells.index.to_numpy(), j]
+
+    league_labels = np.append(None, np.asarray(leagues, dtype=object))
+    keys = cells.index.to_numpy()
+    cells.insert(0, 'MES', np.asarray(month_labels, dtype=object)[keys % n_months] if n_months else [])
+    cells.insert(0, 'LIGA', league_labels[keys // n_months] if n_months else [])
+    cells = cells.astype({col: np.int64 for col in cells.columns if col not in CUBE_KEYS})
+    return cells.reset_index(drop=True)
+
+
+def cube_months(cube):
+    """Meses presentes no cubo ('AAAA-MM'), em ordem."""
+    return sorted(cube['MES'].dropna().unique())
+
+
+def summary_from_cube(cube, start=None, end=None):
+    """Resumo por liga ('Todas' + cada liga) somando as células do cubo entre os meses `start` e `end`."""
+    cells = cube
+    if start is not None:
+        cells = cells[cells['MES'].notna() & (cells['MES'] >= start)]
+    if end is not None:
+        cells = cells[cells['MES'].notna() & (cells['MES'] <= end)]
+    metrics = cells.drop(columns=CUBE_KEYS)
+    total = metrics.sum().to_frame(ALL_LEAGUES).T
+    has_league = cells['LIGA'].notna()
+    per_league = metrics[has_league].groupby(cells.loc[has_league, 'LIGA'], sort=False).sum()
+    # Ligas sem jogos no período continuam consultáveis (com contagens zero)
+    leagues = pd.Index(cube['LIGA'].dropna().unique(), dtype=object) # Ordem de aparição na planilha
+    per_league = per_league.reindex(leagues, fill_value=0)
+    summary = pd.concat([total, per_league])
+    summary.index = pd.Index(summary.index, dtype=object)
+    return summary.astype(np.int64)
+
+
+def summarize_by_league(df, league_column='LIGA'):
+    """Tabela de contagens (linhas: 'Todas' + cada liga; colunas: indicadores e placares) de toda a planilha."""
+    return summary_from_cube(build_summary_cube(df, league_column))
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _cached_cube(sheet_digest, _df):
+    return build_summary_cube(_df)
+
+
+def league_cube(df):
+    """build_summary_cube em cache pelo hash da planilha (df.attrs['sheet_digest'], de load_user_sheet)."""
+    digest = df.attrs.get('sheet_digest')
+    if digest is None:
+        return build_summary_cube(df)
+    return _cached_cube(digest, df)
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _cached_cube_csv(sheet_digest, _cube):
+    return _cube.to_csv(index=False).encode('utf-8-sig')
+
+
+def cube_csv(df):
+    """Cubo liga x mês da planilha em CSV (UTF-8 com BOM, abre direto no Excel/Power BI)."""
+    cube = league_cube(df)
+    digest = df.attrs.get('sheet_digest')
+    if digest is None:
+        return cube.to_csv(index=False).encode('utf-8-sig')
+    return _cached_cube_csv(digest, cube)
+
+
+def league_games(summary, league=ALL_LEAGUES):
+    return int(summary.at[league, GAMES_COLUMN])
+
+
+def league_game_counts(summary, league=ALL_LEAGUES):
+    """Tabela 'Liga' x 'Número de Jogos' (ligas com jogos no resumo, da maior para a menor)."""
+    rows = summary.drop(index=ALL_LEAGUES)[GAMES_COLUMN]
+    if league != ALL_LEAGUES:
+        rows = rows[rows.index == league]
+    rows = rows[rows > 0].sort_values(ascending=False, kind='stable')
+    return pd.DataFrame({'Liga': rows.index, 'Número de Jogos': rows.to_numpy()})
+
+
+def league_rates(summary, league=ALL_LEAGUES):
+    """{coluna: % de ocorrência} de RATE_COLUMNS na liga (o mesmo que filtered_df[coluna].mean() * 100)."""
+    row = summary.loc[league]
+    games = row[GAMES_COLUMN]
+    return {col: row[col] / games * 100 if games else np.nan for col in RATE_COLUMNS}
+
+
+def _scenario(row, condition, outcome):
+    """(casos, % do desfecho entre os casos) de uma condição; % é None quando não há casos."""
+    cases = int(row[condition])
+    return cases, (row[f"{condition}|{outcome}"] / cases * 100 if cases else None)
+
+
+def league_scenarios(summary, league=ALL_LEAGUES, include=None):
+    """Dicionário de cenários no formato de analyze_scenarios das páginas (só as chaves de `include`)."""
+    row = summary.loc[league]
+    scenarios = {}
+
+    cases, home_rate = _scenario(row, 'tied_ht', 'CASA')
+    if cases:
+        scenarios['tied_at_ht'] = {'total_cases': cases, 'home_win_rate': home_rate,
+                                   'away_win_rate': _scenario(row, 'tied_ht', 'VISITANTE')[1]}
+
+    cases, over_05_2t = _scenario(row, 'tied_with_goals_ht', 'OVER_05_2T')
+    if cases:
+        scenarios['tied_with_goals_at_ht'] = {
+            'total_cases': cases,
+            'over_05_2T_rate': over_05_2t,
+            'over_15_FT_rate': _scenario(row, 'tied_with_goals_ht', 'Mais de 1,5')[1],
+            'under_45_FT_rate': _scenario(row, 'tied_with_goals_ht', 'Menos de 4,5')[1],
+            'under_65_FT_rate': _scenario(row, 'tied_with_goals_ht', 'Menos de 6,5')[1],
+        }
+
+    home_cases, home_rate = _scenario(row, 'home_losing_ht', 'CASA_NAO_PERDEU')
+    away_cases, away_rate = _scenario(row, 'away_losing_ht', 'VISITANTE_NAO_PERDEU')
+    scenarios['comebacks'] = {
+        'home_comeback_rate': home_rate or 0, 'home_total_cases': home_cases,
+        'away_comeback_rate': away_rate or 0, 'away_total_cases': away_cases
+    }
+
+    for key, condition, outcome, rate_name in (
+            ('casa_2x0_lead', 'casa_2x0_ht', 'CASA', 'final_win_rate'),
+            ('fora_0x2_lead', 'fora_0x2_ht', 'VISITANTE', 'final_win_rate'),
+            ('home_scores_first', 'home_scores_first', 'CASA', 'win_rate'),
+            ('away_scores_first', 'away_scores_first', 'VISITANTE', 'win_rate')):
+        cases, rate = _scenario(row, condition, outcome)
+        if cases:
+            scenarios[key] = {'total_cases': cases, rate_name: rate}
+
+    scenarios['under_after_goals'] = {}
+    for key, condition, outcome in (('u25', 'at_least_1_goal', 'Menos de 2,5'),
+                                    ('u45', 'at_least_2_goals', 'Menos de 4,5'),
+                                    ('u65', 'at_least_4_goals', 'Menos de 6,5')):
+        cases, rate = _scenario(row, condition, outcome)
+        if cases:
+            scenarios['under_after_goals'][key] = {'total_cases': cases, 'hit_rate': rate}
+
+    if include is not None:
+        scenarios = {key: value for key, value in scenarios.items() if key in include}
+    return scenarios
+
+
+def correct_score_table(summary, league=ALL_LEAGUES):
+    """Tabela de placar exato da liga (só placares que ocorreram), ordenada por acertos."""
+    row = summary.loc[league]
+    total_entries = int(row[GAMES_COLUMN])
+    if not total_entries:
+        return pd.DataFrame()
+    hits = row[[CS_PREFIX + label for label in SCORE_LABELS]].to_numpy()
+    present = np.flatnonzero(hits)
+    order = present[np.argsort(-hits[present], kind='stable')]
+    return pd.DataFrame({
+        'Placar Exato': [SCORE_LABELS[i] for i in order],
+        'Entradas': total_entries,
+        'Acertos': hits[order],
+        'Taxa de Acerto (%)': hits[order] / total_entries * 100
+    })
+
+
+def correct_score_tables(summary):
+    """{liga: tabela de placar exato} de todas as linhas do resumo ('Todas' e cada liga) de uma vez."""
+    return {league: correct_score_table(summary, league) for league in summary.index}
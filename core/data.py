@@ -0,0 +1,505 @@
+"""Carregamento compartilhado das bases históricas, com ingestão incremental na base colunar local.
+
+A planilha espelhada é convertida uma vez para a base colunar (core.store). Quando a fonte muda,
+apenas as partidas ainda não vistas (chave estável: data + mandante + visitante + liga) são
+acrescentadas, e os arrays derivados acompanham a base sem recálculo completo:
+    match_keys            - hash de 64 bits da chave de cada partida
+    vars_<base>           - matriz das 77 VARs (core.vars), uma por mapeamento de odds presente
+    varbins_<base>        - códigos uint8 de bins de quantis das VARs, com os cortes em varedges_<base> (core.binning)
+    outcome_matrix        - ocorrência dos mercados Lay testados (core.outcomes)
+    form_<array>          - índice de forma dos times (core.form)
+Se a fonte remover/alterar partidas antigas, inserir jogos no meio do arquivo ou mudar o esquema,
+a base é reconstruída do zero para continuar idêntica a uma leitura completa da planilha.
+
+As páginas são servidas no modelo stale-while-revalidate: load_history entrega a geração vigente
+na hora, e uma thread em segundo plano revalida as fontes a cada HISTORY_REFRESH_SECONDS. Uma
+geração nova (com todos os arrays derivados) só passa a valer quando está completa, pela troca
+atômica do current.json da base; as sessões continuam com a anterior até a próxima execução.
+
+Os artefatos grandes de cada geração (DataFrame, matrizes de VARs/bins/resultados, índices de
+datas e de forma) ficam em st.cache_resource: um único objeto por processo, somente leitura,
+em vez da cópia serializada por chamada do st.cache_data.
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from core.binning import encode_var_matrix
+from core.config import HISTORY_REFRESH_SECONDS, MATCH_KEY_COLUMNS, VAR_BINS
+from core.fetch import fetch_to_mirror
+from core.form import FORM_ARRAYS, build_team_form_index, extend_team_form_index
+from core.leagues import LEAGUE_CODE_COLUMN, prepare_leagues
+from core.outcomes import compute_outcome_matrix, detect_goal_columns
+from core.perf import stage
+from core.periods import build_date_index, slice_by_dates
+from core.singleflight import single_flight
+from core.store import (StoreSchemaError, append_encoded, encode_frame, load_array, load_columns,
+                        load_frame, read_manifest, read_manifest_at, write_generation)
+from core.vars import ODDS_MAPS, available_odds_maps, compute_var_matrix, var_dict_from_matrix
+from core.xlsx_reader import iter_xlsx_chunks, read_xlsx_streaming
+
+# Incrementar quando o formato da base ou dos arrays derivados mudar (força reconstrução)
+STORE_FORMAT = 2
+
+logger = logging.getLogger('bet.data')
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def store_name_for(url):
+    """Nome da base colunar de uma URL (estável entre execuções e processos)."""
+    return hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]
+
+
+def _store_lock(name):
+    with _locks_guard:
+        return _locks.setdefault(name, threading.Lock())
+
+
+# --- Chave das partidas ---
+
+def match_keys(df, columns=MATCH_KEY_COLUMNS):
+    """Hash uint64 por linha da chave da partida (data no dia, textos normalizados em maiúsculas)."""
+    parts = {}
+    for col in columns:
+        if col not in df.columns:
+            continue
+        if col == 'Date':
+            dates = pd.to_datetime(df[col], errors='coerce').dt.normalize()
+            parts[col] = dates.to_numpy(dtype='datetime64[ns]').view(np.int64)
+        else:
+            values = df[col].astype(object)
+            parts[col] = values.where(values.isna(), values.astype(str).str.upper().str.strip())
+    if not parts:
+        raise StoreSchemaError("Nenhuma coluna da chave das partidas encontrada")
+    return pd.util.hash_pandas_object(pd.DataFrame(parts, index=df.index), index=False).to_numpy()
+
+
+# --- Arrays derivados ---
+
+def _derived_row_arrays(df):
+    """Arrays derivados calculados linha a linha (podem ser estendidos apenas com as linhas novas)."""
+    arrays = {}
+    for key in available_odds_maps(df.columns):
+        arrays[f"vars_{key}"] = compute_var_matrix(df, ODDS_MAPS[key])
+    goal_cols = detect_goal_columns(df.columns)
+    if goal_cols:
+        arrays['outcome_matrix'] = compute_outcome_matrix(df[goal_cols[0]], df[goal_cols[1]])
+    return arrays
+
+
+def _var_bin_arrays(arrays, manifest=None):
+    """Códigos uint8 (e cortes) de cada matriz vars_<base> em `arrays`; com `manifest`, usa os cortes já gravados."""
+    if not VAR_BINS:
+        return {}
+    encoded = {}
+    for name, matrix in arrays.items():
+        if not name.startswith('vars_'):
+            continue
+        key = name[len('vars_'):]
+        edges = None
+        if manifest is not None:
+            edges = load_array(manifest, f"varedges_{key}", mmap=False)
+            if edges is None:
+                raise StoreSchemaError(f"Cortes das VARs ausentes para '{key}'")
+        codes, edges = encode_var_matrix(matrix, edges, VAR_BINS)
+        encoded[f"varbins_{key}"] = codes
+        encoded[f"varedges_{key}"] = edges
+    return encoded
+
+
+def _form_inputs(df):
+    goal_cols = detect_goal_columns(df.columns)
+    if goal_cols is None or not {'Date', 'Home', 'Away'}.issubset(df.columns):
+        return None
+    return df['Date'], df['Home'], df['Away'], df[goal_cols[0]], df[goal_cols[1]]
+
+
+def _form_arrays(index):
+    return {f"form_{key}": np.asarray(index[key]) for key in FORM_ARRAYS}
+
+
+def load_team_form_index(manifest):
+    """Índice de forma dos times da geração (arrays mapeados em memória), ou None se não houver."""
+    names = manifest.get('form_team_names')
+    if names is None:
+        return None
+    index = {key: load_array(manifest, f"form_{key}") for key in FORM_ARRAYS}
+    index['team_names'] = names
+    return index
+
+
+# --- Sincronização da base ---
+
+def _rebuild_store(name, info):
+    """Lê a planilha inteira e grava uma geração nova com todos os arrays derivados."""
+    with stage('leitura_xlsx', bytes_read=os.path.getsize(info['path'])) as counters:
+        df = prepare_leagues(read_xlsx_streaming(info['path']))
+        counters['rows'] = len(df)
+    df = df.drop(columns=[LEAGUE_CODE_COLUMN], errors='ignore')
+    specs, columns = encode_frame(df)
+    with stage('arrays_derivados', rows=len(df)):
+        arrays = _derived_row_arrays(df)
+        arrays.update(_var_bin_arrays(arrays))
+    try:
+        arrays['match_keys'] = match_keys(df)
+    except StoreSchemaError: # Sem colunas de chave: cada fonte nova reconstrói a base
+        arrays['match_keys'] = np.zeros(0, dtype=np.uint64)
+    metadata = {'format': STORE_FORMAT, 'source_version': info['version'], 'source_url': info.get('url'),
+                'appended_rows': len(df), 'mode': 'rebuild', 'var_bins': VAR_BINS}
+    form_inputs = _form_inputs(df)
+    if form_inputs is not None:
+        with stage('indice_forma', rows=len(df)):
+            index = build_team_form_index(*form_inputs)
+        arrays.update(_form_arrays(index))
+        metadata['form_team_names'] = index['team_names']
+    with stage('gravar_geracao', rows=len(df)):
+        return write_generation(name, specs, columns, arrays, metadata)
+
+
+def _scan_new_rows(path, stored_keys):
+    """Percorre a planilha em blocos e separa as linhas cuja chave ainda não está na base.
+
+    Retorna (DataFrame das linhas novas ou None, chaves delas, se a planilha é a base anterior + acréscimos).
+    A planilha só é considerada "acréscimo" se as partidas conhecidas aparecem na mesma ordem da base,
+    sem faltar nenhuma, e todas as novas vêm depois delas.
+    """
+    new_parts, new_keys, known_keys = [], [], []
+    append_only = True
+    for chunk in iter_xlsx_chunks(path):
+        keys = match_keys(chunk)
+        known = np.isin(keys, stored_keys)
+        if known.any():
+            known_keys.append(keys[known])
+            # Partida conhecida depois de uma nova: houve inserção no meio do arquivo
+            if new_parts or not known[:np.flatnonzero(known)[-1]].all():
+                append_only = False
+        if not known.all():
+            new_parts.append(chunk[~known])
+            new_keys.append(keys[~known])
+    known_keys = np.concatenate(known_keys) if known_keys else np.zeros(0, dtype=np.uint64)
+    append_only = append_only and np.array_equal(known_keys, stored_keys)
+    if not new_parts:
+        return None, np.zeros(0, dtype=np.uint64), append_only
+    return pd.concat(new_parts, ignore_index=True), np.concatenate(new_keys), append_only
+
+
+def _append_new_matches(name, manifest, info):
+    """Acrescenta à base apenas as partidas novas da planilha; None se for preciso reconstruir."""
+    stored_keys = load_array(manifest, 'match_keys', mmap=False)
+    if stored_keys is None:
+        return None
+    with stage('varredura_xlsx', bytes_read=os.path.getsize(info['path'])) as counters:
+        df_new, new_keys, append_only = _scan_new_rows(info['path'], stored_keys)
+        counters['rows'] = 0 if df_new is None else len(df_new)
+    if not append_only:
+        return None
+    metadata = {key: value for key, value in manifest.items() if key not in ('path', 'rows', 'columns')}
+    metadata.update(source_version=info['version'], source_url=info.get('url'), mode='append')
+    specs = manifest['columns']
+    if df_new is None: # Fonte nova sem partidas novas: só a versão da fonte muda
+        metadata['appended_rows'] = 0
+        return write_generation(name, specs, load_columns(manifest, mmap=True),
+                                _load_all_arrays(manifest), metadata)
+
+    df_new = prepare_leagues(df_new).drop(columns=[LEAGUE_CODE_COLUMN], errors='ignore')
+    columns = append_encoded(specs, load_columns(manifest, mmap=True), df_new)
+    arrays = {'match_keys': np.concatenate([stored_keys, new_keys])}
+    derived = _derived_row_arrays(df_new)
+    for key, values in derived.items():
+        old = load_array(manifest, key)
+        if old is None:
+            return None
+        arrays[key] = np.concatenate([old, values])
+    for key, values in _var_bin_arrays(derived, manifest).items():
+        if key.startswith('varedges_'): # Cortes fixos: os jogos novos usam os já gravados
+            arrays[key] = values
+            continue
+        old = load_array(manifest, key)
+        if old is None:
+            return None
+        arrays[key] = np.concatenate([old, values])
+
+    index = load_team_form_index(manifest)
+    form_inputs = _form_inputs(df_new)
+    if index is not None and form_inputs is not None:
+        extended = extend_team_form_index(index, *form_inputs)
+        if extended is None: # Jogo novo anterior a jogos já indexados do mesmo time: reindexa a partir da base
+            full = load_frame(manifest, columns)
+            extended = build_team_form_index(*_form_inputs(full))
+        arrays.update(_form_arrays(extended))
+        metadata['form_team_names'] = extended['team_names']
+    metadata['appended_rows'] = len(df_new)
+    return write_generation(name, specs, columns, arrays, metadata)
+
+
+def _load_all_arrays(manifest):
+    names = ['match_keys', 'outcome_matrix'] + [f"{prefix}_{key}" for prefix in ('vars', 'varbins', 'varedges')
+                                                 for key in ODDS_MAPS]
+    names += [f"form_{key}" for key in FORM_ARRAYS]
+    arrays = {array_name: load_array(manifest, array_name) for array_name in names}
+    return {array_name: array for array_name, array in arrays.items() if array is not None}
+
+
+def sync_history_store(url, rebuild=False):
+    """Revalida a URL e atualiza a base colunar local; retorna o manifesto da geração vigente.
+
+    Sem mudança na fonte, custa só a revalidação condicional. Com fonte nova, acrescenta apenas
+    as partidas novas (ou reconstrói, se não for possível). Levanta requests.exceptions.RequestException
+    se não houver rede nem cópia local.
+
+    Chamadas simultâneas para a mesma URL (várias sessões com o cache frio) são coalescidas:
+    um único download e uma única ingestão, cujo manifesto é entregue a todas.
+    """
+    return single_flight(('sync', url, rebuild), lambda: _sync_history_store(url, rebuild))
+
+
+def _is_current_format(manifest):
+    """Geração no formato atual (senão precisa ser reconstruída antes de ser servida)."""
+    return (manifest is not None and manifest.get('format') == STORE_FORMAT
+            and manifest.get('var_bins') == VAR_BINS)
+
+
+def _sync_history_store(url, rebuild):
+    with stage('download') as counters:
+        info = fetch_to_mirror(url)
+        counters['detail'] = info['status']
+        counters['bytes'] = info['bytes'] if info['status'] == 'downloaded' else 0
+    name = store_name_for(url)
+    with _store_lock(name):
+        manifest = read_manifest(name)
+        compatible = not rebuild and _is_current_format(manifest)
+        if compatible and manifest.get('source_version') == info['version']:
+            return manifest
+        if compatible:
+            try:
+                with stage('acrescentar_partidas'):
+                    updated = _append_new_matches(name, manifest, info)
+            except StoreSchemaError:
+                updated = None
+            if updated is not None:
+                return updated
+        with stage('reconstruir_base'):
+            return _rebuild_store(name, info)
+
+
+# --- Atualização em segundo plano ---
+
+_refresh_urls = set()
+_refresh_guard = threading.Lock()
+_refresh_wake = threading.Event()
+_refresher = None
+
+
+def _refresh_loop():
+    """Revalida as URLs registradas; uma URL nova acorda a thread na hora.
+
+    A revalidação respeita o REVALIDATE_SECONDS do espelho: uma URL verificada há pouco (ex.: pela
+    carga inicial de uma página) não vai à rede de novo.
+    """
+    while True:
+        with _refresh_guard:
+            urls = sorted(_refresh_urls)
+        for url in urls:
+            try:
+                previous = read_manifest(store_name_for(url))
+                manifest = sync_history_store(url)
+                if previous is None or manifest['path'] != previous['path']:
+                    read_history_frame(manifest['path']) # Aquece o cache: a primeira sessão na versão nova não espera
+                    logger.info("Base de %s atualizada para a versão %s (%s)", url, manifest.get('source_version'),
+                                manifest['path'])
+            except Exception:
+                logger.exception("Falha na atualização em segundo plano de %s; segue servindo a versão vigente", url)
+        _refresh_wake.wait(HISTORY_REFRESH_SECONDS)
+        _refresh_wake.clear()
+
+
+def ensure_background_refresh(url):
+    """Registra `url` na atualização em segundo plano (e inicia a thread, uma vez por processo)."""
+    global _refresher
+    if HISTORY_REFRESH_SECONDS <= 0:
+        return
+    with _refresh_guard:
+        if url in _refresh_urls:
+            return
+        _refresh_urls.add(url)
+        if _refresher is None:
+            _refresher = threading.Thread(target=_refresh_loop, name='bet-history-refresh', daemon=True)
+            _refresher.start()
+    _refresh_wake.set()
+
+
+def current_history_manifest(url):
+    """Manifesto da geração a servir agora para `url`.
+
+    Com uma geração no formato atual já gravada, devolve-a sem acessar a rede e deixa a revalidação
+    para a thread de segundo plano. Sem base local (ou com a atualização em segundo plano desligada),
+    sincroniza antes de devolver.
+    """
+    if HISTORY_REFRESH_SECONDS > 0:
+        manifest = read_manifest(store_name_for(url))
+        if _is_current_format(manifest):
+            ensure_background_refresh(url)
+            return manifest
+    manifest = sync_history_store(url)
+    ensure_background_refresh(url)
+    return manifest
+
+
+# --- Leitura para as páginas ---
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _history_frame(store_path):
+    """DataFrame compartilhado de uma geração (o mesmo objeto para todas as sessões; não alterar)."""
+    manifest = read_manifest_at(store_path)
+    # Colunas numéricas/datas mapeadas da geração (compartilhadas entre processos); League_Code e as categorias são recriados
+    df = prepare_leagues(load_frame(manifest, mmap=True))
+    df.attrs['store_path'] = store_path
+    return df
+
+
+def read_history_frame(store_path):
+    """DataFrame de uma geração da base (o caminho identifica a geração e faz parte da chave do cache).
+
+    O cache guarda um único DataFrame por geração (st.cache_resource, sem a cópia serializada
+    que o st.cache_data entrega a cada chamada). Cada chamador recebe uma cópia rasa: pelo
+    Copy-on-Write do pandas, colunas novas ou alteradas ficam só nela (copiando apenas o que
+    for tocado) e o DataFrame compartilhado nunca muda.
+
+    Requer pandas >= 3 (requirements.txt), em que o Copy-on-Write é o comportamento padrão: no
+    pandas 2.x, escritas na cópia rasa (ex.: `.loc[...] = ...`) alterariam o DataFrame
+    compartilhado por todas as sessões.
+    """
+    return _history_frame(store_path).copy(deep=False)
+
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def _generation_array(store_path, name):
+    """Array auxiliar de uma geração, somente leitura e compartilhado por todas as sessões (ou None)."""
+    array = load_array(read_manifest_at(store_path), name)
+    if array is not None:
+        array.flags.writeable = False
+    return array
+
+
+def load_history(url):
+    """Devolve o DataFrame histórico completo da geração vigente da base da URL.
+
+    Todas as páginas que usam a mesma URL compartilham a mesma base e a mesma entrada de cache
+    (a sincronização é coalescida por URL e o cache do Streamlit calcula cada geração uma só vez,
+    mesmo com várias sessões pedindo ao mesmo tempo).
+    O índice do DataFrame é a posição da linha na base, usada para recortar os arrays derivados.
+    """
+    with stage('sync_base') as counters:
+        manifest = current_history_manifest(url)
+        counters['rows'] = manifest.get('rows')
+    with stage('leitura_base') as counters:
+        df = read_history_frame(manifest['path'])
+        counters['rows'] = len(df)
+    return df
+
+
+def history_version_caption(store_path):
+    """Legenda com a versão da base em uso (versão da fonte, geração, jogos e horário em que foi gravada)."""
+    if store_path is None:
+        return
+    manifest = read_manifest_at(store_path)
+    written_at = time.strftime('%d/%m/%Y %H:%M', time.localtime(manifest.get('written_at', 0)))
+    st.caption(f"📦 Versão da base: {manifest.get('source_version', '?')} · geração {manifest.get('generation_number', '?')} · "
+               f"{manifest.get('rows', 0)} jogos · gravada em {written_at}")
+
+
+def _take_rows(array, index):
+    """Linhas `index` (posições na base) de um array da geração: fatia sem cópia se forem contíguas, senão gather."""
+    positions = index.to_numpy()
+    if len(positions) and positions[-1] - positions[0] + 1 == len(positions) and (np.diff(positions) == 1).all():
+        return array[positions[0]:positions[-1] + 1]
+    return array[positions]
+
+
+def history_var_dict(df, odds_key):
+    """VARs pré-calculadas das linhas de `df` (recorte de load_history), no formato de pre_calculate_all_vars.
+
+    Retorna None se `df` não vier da base colunar ou se a matriz do mapeamento não existir.
+    """
+    store_path = df.attrs.get('store_path')
+    if store_path is None:
+        return None
+    matrix = _generation_array(store_path, f"vars_{odds_key}")
+    if matrix is None:
+        return None
+    return var_dict_from_matrix(_take_rows(matrix, df.index), df.index)
+
+
+def history_var_bins(df, odds_key):
+    """(códigos uint8 das VARs das linhas de `df`, cortes por VAR) da base colunar, ou None se não houver."""
+    store_path = df.attrs.get('store_path')
+    if store_path is None:
+        return None
+    codes = _generation_array(store_path, f"varbins_{odds_key}")
+    edges = _generation_array(store_path, f"varedges_{odds_key}")
+    if codes is None or edges is None:
+        return None
+    return _take_rows(codes, df.index), edges
+
+
+def history_outcome_matrix(df):
+    """Matriz de resultados (core.outcomes) das linhas de `df`, ou None se `df` não vier da base colunar."""
+    store_path = df.attrs.get('store_path')
+    if store_path is None:
+        return None
+    matrix = _generation_array(store_path, 'outcome_matrix')
+    if matrix is None:
+        return None
+    return _take_rows(matrix, df.index)
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _store_date_index(store_path):
+    index = build_date_index(_history_frame(store_path)['Date'])
+    for key in ('sorted', 'order'):
+        index[key].flags.writeable = False
+    return index
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _store_team_form_index(store_path):
+    return load_team_form_index(read_manifest_at(store_path))
+
+
+def history_team_form_index(df):
+    """Índice de forma dos times (core.form) da geração de `df`, compartilhado e somente leitura, ou None.
+
+    As posições do índice ('row', 'home_pos', 'away_pos') são posições na base, como o índice de `df`.
+    """
+    store_path = df.attrs.get('store_path')
+    if store_path is None:
+        return None
+    return _store_team_form_index(store_path)
+
+
+def history_date_index(df):
+    """Índice de datas ordenado de um DataFrame de load_history (em cache por geração da base), ou None sem 'Date'."""
+    if 'Date' not in df.columns:
+        return None
+    store_path = df.attrs.get('store_path')
+    if store_path is None:
+        return build_date_index(df['Date'])
+    return _store_date_index(store_path)
+
+
+def history_window(df, start=None, end=None):
+    """Jogos de `df` (DataFrame completo de load_history) entre `start` e `end`, por searchsorted no índice de datas.
+
+    O recorte mantém o índice de posições da base, então history_var_dict continua válido para o resultado.
+    """
+    if (start is None and end is None) or 'Date' not in df.columns:
+        return df
+    return slice_by_dates(df, history_date_index(df), start, end)
@@ -0,0 +1,148 @@
+"""Camada de download compartilhada: sessão HTTP reutilizada, revalidação condicional e espelho local em disco.
+
+Cada URL é espelhada em dois arquivos dentro de MIRROR_DIR:
+    <hash>.bin  - conteúdo bruto do último download
+    <hash>.json - metadados (ETag, Last-Modified, versão, horário da última verificação)
+Uma revalidação envia If-None-Match / If-Modified-Since e, se o servidor responder 304,
+custa apenas uma ida e volta; sem rede, o espelho é servido diretamente.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from core.config import HTTP_TIMEOUT, MIRROR_DIR, OFFLINE, REVALIDATE_SECONDS
+
+_CHUNK_SIZE = 1024 * 1024
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Retorna a sessão HTTP compartilhada (pool de conexões e retentativas em erros 5xx)."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            retries = Retry(total=2, backoff_factor=0.5, status_forcelist=(502, 503, 504), allowed_methods=('GET', 'HEAD'))
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retries)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+        return _session
+
+
+def mirror_paths(url, mirror_dir=None):
+    """Caminhos (conteúdo, metadados) do espelho local de uma URL."""
+    mirror_dir = mirror_dir or MIRROR_DIR
+    key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+    return os.path.join(mirror_dir, f"{key}.bin"), os.path.join(mirror_dir, f"{key}.json")
+
+
+def read_mirror_metadata(url, mirror_dir=None):
+    """Lê os metadados do espelho de uma URL, ou None se não houver cópia local válida."""
+    data_path, meta_path = mirror_paths(url, mirror_dir)
+    if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+        return None
+    try:
+        with open(meta_path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_atomic(path, write_func, mode='wb'):
+    """Escreve em um arquivo temporário no mesmo diretório e troca atomicamente pelo destino."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, mode) as f:
+            result = write_func(f)
+        os.replace(tmp_path, path)
+        return result
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _write_metadata(meta_path, metadata):
+    _write_atomic(meta_path, lambda f: json.dump(metadata, f, ensure_ascii=False, indent=2), mode='w')
+
+
+def _result(metadata, data_path, status):
+    return {
+        'path': data_path, 'status': status, 'version': metadata['version'],
+        'etag': metadata.get('etag'), 'last_modified': metadata.get('last_modified'),
+        'bytes': metadata.get('bytes', 0), 'url': metadata.get('url'),
+    }
+
+
+def fetch_to_mirror(url, mirror_dir=None, timeout=HTTP_TIMEOUT, offline=None, max_age=None):
+    """Garante uma cópia local atualizada de `url` e retorna um dicionário com 'path', 'version' e 'status'.
+
+    status:
+        'fresh'        - cópia local verificada há menos de `max_age` segundos (sem rede)
+        'not_modified' - servidor respondeu 304; a cópia local foi mantida
+        'downloaded'   - conteúdo novo baixado para o espelho
+        'offline'      - sem rede (ou modo offline); servida a cópia local
+    Levanta requests.exceptions.RequestException se não houver rede nem cópia local.
+    """
+    mirror_dir = mirror_dir or MIRROR_DIR
+    offline = OFFLINE if offline is None else offline
+    max_age = REVALIDATE_SECONDS if max_age is None else max_age
+    os.makedirs(mirror_dir, exist_ok=True)
+    data_path, meta_path = mirror_paths(url, mirror_dir)
+    metadata = read_mirror_metadata(url, mirror_dir)
+
+    if metadata is not None:
+        if offline:
+            return _result(metadata, data_path, 'offline')
+        if time.time() - metadata.get('checked_at', 0) < max_age:
+            return _result(metadata, data_path, 'fresh')
+    elif offline:
+        raise requests.exceptions.ConnectionError(f"Modo offline e sem cópia local para {url}")
+
+    headers = {}
+    if metadata is not None:
+        if metadata.get('etag'):
+            headers['If-None-Match'] = metadata['etag']
+        if metadata.get('last_modified'):
+            headers['If-Modified-Since'] = metadata['last_modified']
+
+    try:
+        response = get_session().get(url, headers=headers, timeout=timeout, stream=True)
+        with response:
+            if response.status_code == 304 and metadata is not None:
+                metadata['checked_at'] = time.time()
+                _write_metadata(meta_path, metadata)
+                return _result(metadata, data_path, 'not_modified')
+            response.raise_for_status()
+
+            def download(f):
+                digest = hashlib.sha1()
+                size = 0
+                for chunk in response.iter_content(chunk_size=_CHUNK_SIZE):
+                    f.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+                return digest.hexdigest(), size
+
+            sha1, size = _write_atomic(data_path, download)
+            metadata = {
+                'url': url, 'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'version': sha1[:16], 'bytes': size,
+                'fetched_at': time.time(), 'checked_at': time.time(),
+            }
+            _write_metadata(meta_path, metadata)
+            return _result(metadata, data_path, 'downloaded')
+    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+        if metadata is not None:
+            return _result(metadata, data_path, 'offline')
+        raise
@@ -0,0 +1,204 @@
+"""Índice de forma dos times: somas acumuladas por time que respondem "últimos N jogos" por gather.
+
+Cada jogo gera duas participações (mandante e visitante). As participações são ordenadas por
+(time, data, linha) e, para cada uma, guardamos quantos gols/vitórias o time acumulou antes dela
+e quantos jogos o time disputou em datas anteriores ('prior'). Assim a média de gols ou o
+aproveitamento dos últimos N jogos antes de uma partida é a diferença de dois valores acumulados,
+para qualquer N, sem percorrer o histórico linha a linha.
+
+Jogos novos com data igual ou posterior aos já indexados entram no fim do bloco de cada time;
+extend_team_form_index reaproveita os acumulados existentes e calcula apenas os das novas participações.
+"""
+import numpy as np
+import pandas as pd
+
+# Arrays que compõem o índice (todos numpy; 'team_names' é uma lista)
+FORM_ARRAYS = ('team', 'date', 'row', 'goals', 'win', 'seq', 'prior', 'cum_goals', 'cum_wins', 'home_pos', 'away_pos')
+
+
+def _as_int_dates(dates):
+    """Datas como int64 (ns); NaT vira None na máscara de validade."""
+    values = pd.to_datetime(pd.Series(dates), errors='coerce')
+    valid = values.notna().to_numpy()
+    return values.to_numpy(dtype='datetime64[ns]').view(np.int64), valid
+
+
+def _as_int_goals(goals):
+    # As páginas preenchem gols ausentes com 0 antes de calcular a forma
+    return pd.to_numeric(pd.Series(goals), errors='coerce').fillna(0).to_numpy(dtype=np.int64)
+
+
+def _team_codes(names, values):
+    """Códigos dos times segundo `names` (lista estendida in-place com os times novos); -1 para ausentes."""
+    lookup = {name: code for code, name in enumerate(names)}
+    series = pd.Series(values, dtype=object)
+    uniques = series.dropna().unique()
+    for name in uniques:
+        if name not in lookup:
+            lookup[name] = len(names)
+            names.append(name)
+    return series.map(lookup).fillna(-1).to_numpy(dtype=np.int64)
+
+
+def _appearances(dates, home, away, goals_h, goals_a, names, row_offset=0):
+    """Participações válidas (time, data, linha, lado, gols marcados, vitória) ordenadas por (time, data, linha)."""
+    date_values, date_valid = _as_int_dates(dates)
+    gh, ga = _as_int_goals(goals_h), _as_int_goals(goals_a)
+    home_codes, away_codes = _team_codes(names, home), _team_codes(names, away)
+    n = len(date_values)
+    rows = np.arange(n, dtype=np.int64) + row_offset
+    team = np.concatenate([home_codes, away_codes])
+    side = np.repeat(np.array([0, 1], dtype=np.int8), n)
+    apps = {
+        'team': team, 'date': np.tile(date_values, 2), 'row': np.tile(rows, 2), 'side': side,
+        'goals': np.concatenate([gh, ga]), 'win': np.concatenate([gh > ga, ga > gh]),
+    }
+    keep = (team >= 0) & np.tile(date_valid, 2)
+    apps = {key: value[keep] for key, value in apps.items()}
+    order = np.lexsort((apps['row'], apps['date'], apps['team']))
+    return {key: value[order] for key, value in apps.items()}, n
+
+
+def _run_first_index(team, date):
+    """Para cada posição, o índice da primeira participação do mesmo (time, data) na sequência ordenada."""
+    m = len(team)
+    new_run = np.ones(m, dtype=bool)
+    if m > 1:
+        new_run[1:] = (team[1:] != team[:-1]) | (date[1:] != date[:-1])
+    return np.maximum.accumulate(np.where(new_run, np.arange(m), 0)) if m else np.zeros(0, dtype=np.int64)
+
+
+def _row_positions(apps, n, row_offset=0):
+    """Posição da participação de mandante e de visitante de cada linha (-1 se não indexada)."""
+    home_pos = np.full(n, -1, dtype=np.int64)
+    away_pos = np.full(n, -1, dtype=np.int64)
+    positions = np.arange(len(apps['row']), dtype=np.int64)
+    is_home = apps['side'] == 0
+    home_pos[apps['row'][is_home] - row_offset] = positions[is_home]
+    away_pos[apps['row'][~is_home] - row_offset] = positions[~is_home]
+    return home_pos, away_pos
+
+
+def build_team_form_index(dates, home, away, goals_h, goals_a):
+    """Monta o índice de forma a partir das colunas de data, times e gols (tempo integral)."""
+    names = []
+    apps, n = _appearances(dates, home, away, goals_h, goals_a, names)
+    team = apps['team']
+    team_start = np.searchsorted(team, np.arange(len(names)), side='left')
+    seq = np.arange(len(team), dtype=np.int64) - team_start[team]
+    index = {'team_names': names, 'team': team, 'date': apps['date'], 'row': apps['row'],
+             'goals': apps['goals'], 'win': apps['win'], 'seq': seq}
+    for key, values in (('cum_goals', apps['goals']), ('cum_wins', apps['win'].astype(np.int64))):
+        exclusive = np.cumsum(values) - values
+        index[key] = exclusive - exclusive[team_start[team]] if len(team) else exclusive
+    index['prior'] = seq[_run_first_index(team, apps['date'])]
+    index['home_pos'], index['away_pos'] = _row_positions(apps, n)
+    return index
+
+
+def _remap(positions, moved):
+    """Traduz posições antigas (-1 = não indexada) para as novas posições após a intercalação."""
+    result = np.full(len(positions), -1, dtype=np.int64)
+    indexed = positions >= 0
+    result[indexed] = moved[positions[indexed]]
+    return result
+
+
+def extend_team_form_index(index, dates, home, away, goals_h, goals_a):
+    """Acrescenta ao índice os jogos novos (linhas numeradas após as já indexadas).
+
+    Os acumulados das participações existentes são mantidos; só as novas são calculadas.
+    Retorna None se algum jogo novo for anterior ao último jogo já indexado do mesmo time
+    (nesse caso os acumulados antigos mudariam e o índice deve ser reconstruído).
+    """
+    names = list(index['team_names'])
+    row_offset = len(index['home_pos'])
+    new, n_new = _appearances(dates, home, away, goals_h, goals_a, names, row_offset)
+    n_teams = len(names)
+    old_team = np.asarray(index['team'])
+    old_count = np.bincount(old_team, minlength=n_teams)
+    new_count = np.bincount(new['team'], minlength=n_teams)
+    old_start = np.concatenate([[0], np.cumsum(old_count)[:-1]])
+    has_old = old_count > 0
+    last_old = np.where(has_old, old_start + old_count - 1, 0)
+
+    old_date = np.asarray(index['date'])
+    last_date = np.full(n_teams, np.iinfo(np.int64).min, dtype=np.int64)
+    last_date[has_old] = old_date[last_old[has_old]]
+    if (new['date'] < last_date[new['team']]).any():
+        return None
+
+    start = np.concatenate([[0], np.cumsum(old_count + new_count)[:-1]])
+    new_local_start = np.searchsorted(new['team'], np.arange(n_teams), side='left')
+    local = np.arange(len(new['team']), dtype=np.int64) - new_local_start[new['team']]
+    old_seq = np.asarray(index['seq'])
+    pos_old = start[old_team] + old_seq
+    pos_new = start[new['team']] + old_count[new['team']] + local
+
+    total = len(old_team) + len(new['team'])
+    merged = {}
+    for key, dtype in (('team', np.int64), ('date', np.int64), ('row', np.int64), ('goals', np.int64), ('win', bool)):
+        merged[key] = np.empty(total, dtype=dtype)
+        merged[key][pos_old] = index[key]
+        merged[key][pos_new] = new[key]
+
+    merged['seq'] = np.empty(total, dtype=np.int64)
+    merged['seq'][pos_old] = old_seq
+    merged['seq'][pos_new] = old_count[new['team']] + local
+
+    for key, values in (('cum_goals', new['goals']), ('cum_wins', new['win'].astype(np.int64))):
+        source = 'goals' if key == 'cum_goals' else 'win'
+        old_values = np.asarray(index[source]).astype(np.int64)
+        old_total = np.bincount(old_team, weights=old_values, minlength=n_teams).astype(np.int64)
+        exclusive = np.cumsum(values) - values
+        local_cum = exclusive - exclusive[new_local_start[new['team']]] if len(values) else exclusive
+        merged[key] = np.empty(total, dtype=np.int64)
+        merged[key][pos_old] = index[key]
+        merged[key][pos_new] = old_total[new['team']] + local_cum
+
+    # 'prior' das novas: jogos do time em datas anteriores (no mesmo dia do último jogo antigo, herda o prior dele)
+    run_first = _run_first_index(new['team'], new['date'])
+    prior_new = old_count[new['team']] + local[run_first]
+    old_prior = np.asarray(index['prior'])
+    same_day = has_old[new['team']] & (new['date'] == last_date[new['team']])
+    if same_day.any():
+        prior_new[same_day] = old_prior[last_old[new['team'][same_day]]]
+    merged['prior'] = np.empty(total, dtype=np.int64)
+    merged['prior'][pos_old] = old_prior
+    merged['prior'][pos_new] = prior_new
+
+    old_home, old_away = np.asarray(index['home_pos']), np.asarray(index['away_pos'])
+    new_home, new_away = _row_positions(new, n_new, row_offset)
+    merged['home_pos'] = np.concatenate([_remap(old_home, pos_old), _remap(new_home, pos_new)])
+    merged['away_pos'] = np.concatenate([_remap(old_away, pos_old), _remap(new_away, pos_new)])
+    merged['team_names'] = names
+    return merged
+
+
+def team_form_window(index, n_games, side='home', rows=None):
+    """Forma do time (mandante ou visitante) nos últimos `n_games` jogos antes de cada partida.
+
+    Retorna (válido, média de gols marcados, % de vitórias), arrays alinhados às linhas indexadas
+    (ou às posições `rows`). 'válido' é False quando o time tem menos de `n_games` jogos anteriores,
+    o mesmo critério de get_team_last_n_games + len(...) < n_games nas páginas.
+    """
+    positions = np.asarray(index['home_pos'] if side == 'home' else index['away_pos'])
+    if rows is not None:
+        positions = positions[rows]
+    valid = positions >= 0
+    avg_goals = np.full(len(positions), np.nan)
+    win_rate = np.full(len(positions), np.nan)
+    if n_games < 1 or not valid.any():
+        return np.zeros(len(positions), dtype=bool), avg_goals, win_rate
+    pos = positions[valid]
+    seq, prior = np.asarray(index['seq'])[pos], np.asarray(index['prior'])[pos]
+    run_start = pos - seq + prior
+    enough = prior >= n_games
+    window_start = np.where(enough, run_start - n_games, run_start)
+    cum_goals, cum_wins = np.asarray(index['cum_goals']), np.asarray(index['cum_wins'])
+    goals = (cum_goals[run_start] - cum_goals[window_start]) / n_games
+    wins = (cum_wins[run_start] - cum_wins[window_start]) / n_games * 100
+    valid[valid] = enough
+    avg_goals[valid] = goals[enough]
+    win_rate[valid] = wins[enough]
+    return valid, avg_goals, win_rate
@@ -0,0 +1,59 @@
+"""Dicionário de ligas com códigos inteiros e filtro de ligas aprovadas por tabela de consulta."""
+import numpy as np
+import pandas as pd
+
+from core.config import APPROVED_LEAGUES
+
+LEAGUE_CODE_COLUMN = 'League_Code'
+
+
+def encode_leagues(values):
+    """Normaliza os nomes de liga (maiúsculas, sem espaços nas pontas) e devolve (códigos int32, categorias).
+
+    A normalização é feita apenas sobre os valores únicos, não linha a linha.
+    Valores ausentes recebem o código -1.
+    """
+    raw_codes, raw_uniques = pd.factorize(pd.Series(values), use_na_sentinel=True)
+    normalized = pd.Index(raw_uniques).astype(str).str.upper().str.strip()
+    # Nomes distintos podem colapsar no mesmo nome normalizado ("Brazil 1" e "BRAZIL 1 ")
+    remap, categories = pd.factorize(normalized)
+    codes = np.append(remap, -1)[raw_codes] # raw_codes == -1 aponta para o último elemento (-1)
+    return codes.astype(np.int32), pd.Index(categories)
+
+
+def build_approved_lookup(categories, approved_leagues=APPROVED_LEAGUES):
+    """Tabela booleana indexada pelo código da liga; a última posição (código -1) é sempre False."""
+    lookup = np.zeros(len(categories) + 1, dtype=bool)
+    lookup[:-1] = pd.Index(categories).isin(approved_leagues)
+    return lookup
+
+
+def prepare_leagues(df, column='League'):
+    """Normaliza a coluna de liga uma única vez na ingestão e grava os códigos em 'League_Code'.
+
+    As categorias ficam em df.attrs['league_categories'] para os filtros posteriores.
+    Se a coluna não existir, o DataFrame é devolvido sem alterações.
+    """
+    if df is None or column not in df.columns:
+        return df
+    codes, categories = encode_leagues(df[column])
+    labels = np.append(categories.to_numpy(dtype=object), np.nan)
+    df[column] = labels[codes]
+    df[LEAGUE_CODE_COLUMN] = codes
+    df.attrs['league_categories'] = list(categories)
+    return df
+
+
+def approved_league_mask(df, column='League', approved_leagues=APPROVED_LEAGUES):
+    """Máscara booleana (numpy) das linhas em ligas aprovadas, obtida por gather na tabela de consulta."""
+    categories = df.attrs.get('league_categories')
+    if LEAGUE_CODE_COLUMN in df.columns and categories is not None:
+        codes = df[LEAGUE_CODE_COLUMN].to_numpy()
+    else:
+        codes, categories = encode_leagues(df[column])
+    return build_approved_lookup(categories, approved_leagues)[codes]
+
+
+def filter_approved_leagues(df, column='League', approved_leagues=APPROVED_LEAGUES):
+    """Retorna um DataFrame novo contendo apenas os jogos das ligas aprovadas (a seleção por máscara já copia)."""
+    return df[approved_league_mask(df, column, approved_leagues)]
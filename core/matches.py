@@ -0,0 +1,121 @@
+"""Memo dos jogos aprovados pelos construtores de estratégia (páginas 8 e 12).
+
+A filtragem dos construtores percorre o histórico de cada time jogo a jogo e é cara; o resultado,
+porém, é só o conjunto de jogos aprovados. cached_matches guarda esse conjunto como arrays
+compactos (posições na base e, se houver, as métricas calculadas por jogo), num LRU em memória
+compartilhado entre as sessões e limitado a BUILDER_CACHE_ENTRIES entradas: voltar um filtro a um
+valor já usado, ou repetir uma consulta comum de outra sessão, não refaz a filtragem.
+
+A chave (builder_key) é a tupla normalizada dos parâmetros que definem o conjunto: a geração e o
+recorte da base (core.session.frame_key), o mercado, a faixa de odds, os N jogos e as faixas de forma.
+
+start_matches calcula o conjunto numa thread em segundo plano (a página mostra uma prévia por
+amostragem enquanto isso, core.preview) e peek_matches consulta o memo sem calcular.
+"""
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from core.config import BUILDER_CACHE_ENTRIES
+from core.singleflight import single_flight
+
+logger = logging.getLogger('bet.matches')
+_matches = OrderedDict()
+_matches_lock = threading.Lock()
+_running = set()
+
+
+def _normalize(value):
+    if isinstance(value, (tuple, list)):
+        return tuple(_normalize(item) for item in value)
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        return round(float(value), 6) # Sliders devolvem 1.5000000000000002 e 1.5 para o mesmo valor
+    return value
+
+
+def builder_key(*parts):
+    """Chave do memo: os parâmetros normalizados (números arredondados, tipos numpy viram tipos Python)."""
+    return _normalize(parts)
+
+
+def _compact(arrays):
+    """Posições em int32, somente leitura (o mesmo array é entregue a várias sessões).
+
+    As métricas ficam em float64: em float32, os valores exibidos arredondados mudariam em alguns jogos.
+    """
+    compact = {}
+    for name, values in arrays.items():
+        values = np.asarray(values)
+        if name == 'rows':
+            values = values.astype(np.int32 if len(values) == 0 or values.max() < 2**31 else np.int64)
+        values.flags.writeable = False
+        compact[name] = values
+    return compact
+
+
+def cached_matches(key, compute):
+    """Arrays dos jogos aprovados para `key`; compute() os calcula quando não estão no memo.
+
+    compute() devolve um dict com 'rows' (posições dos jogos aprovados na base) e, opcionalmente,
+    outros arrays alinhados a 'rows'. Sessões que pedem a mesma chave ao mesmo tempo compartilham
+    um único cálculo (core.singleflight).
+    """
+    with _matches_lock:
+        arrays = _matches.get(key)
+        if arrays is not None:
+            _matches.move_to_end(key)
+            return arrays
+
+    def compute_and_remember():
+        arrays = _compact(compute())
+        with _matches_lock:
+            _matches[key] = arrays
+            _matches.move_to_end(key)
+            while len(_matches) > max(BUILDER_CACHE_ENTRIES, 1):
+                _matches.popitem(last=False)
+        return arrays
+    return single_flight(('matches', key), compute_and_remember, wait_stage='aguardando_construtor')
+
+
+def peek_matches(key):
+    """Arrays de `key` se já estiverem no memo, senão None (sem calcular)."""
+    with _matches_lock:
+        arrays = _matches.get(key)
+        if arrays is not None:
+            _matches.move_to_end(key)
+        return arrays
+
+
+def matches_running(key):
+    """Se há um cálculo de `key` em segundo plano (start_matches) ainda em andamento."""
+    with _matches_lock:
+        return key in _running
+
+
+def start_matches(key, compute):
+    """Calcula `key` numa thread em segundo plano, se ainda não estiver no memo nem em andamento.
+
+    Retorna na hora; o resultado aparece em peek_matches quando ficar pronto. compute() roda fora
+    da sessão da página e não deve chamar o Streamlit. Uma falha é registrada no log 'bet.matches'
+    e o cálculo deixa de constar como em andamento, sem resultado no memo.
+    """
+    with _matches_lock:
+        if key in _matches or key in _running:
+            return
+        _running.add(key)
+
+    def run():
+        try:
+            cached_matches(key, compute)
+        except Exception:
+            logger.exception("Falha no cálculo em segundo plano do construtor")
+        finally:
+            with _matches_lock:
+                _running.discard(key)
+    threading.Thread(target=run, name='bet-matches', daemon=True).start()
@@ -0,0 +1,235 @@
+"""Minerador de faixas de VAR: busca intervalos (simples e em pares) que maximizam a taxa de acerto de um Lay.
+
+As VARs são usadas na forma de códigos uint8 de bins de quantis (core.binning; gravados na base
+colunar ou calculados na hora). Contagens de jogos e de acertos por bin (np.bincount sobre os
+códigos) viram somas de prefixo, de modo que a taxa de qualquer intervalo de bins [i, j] sai de
+duas subtrações. Faixas de uma VAR usam todos os bins; para pares, os códigos são reagrupados em
+PAIR_BINS bins, o histograma 2D sai de um único bincount e as somas de prefixo (por faixa de uma
+VAR, depois da outra) dão todos os retângulos de uma vez. Os pares são distribuídos entre threads por VAR.
+
+As faixas encontradas são devolvidas no formato declarativo (dicionários serializáveis em JSON):
+    {'nome': ..., 'mercado': 'Lay_0x0', 'faixas': [{'var': 'VAR13', 'min': 0.023, 'max': 0.25}, ...],
+     'jogos': 812, 'acertos': 805, 'taxa_acerto': 0.9914}
+Os limites são o menor e o maior valor presentes nos bins escolhidos, de modo que o filtro
+"min <= VAR <= max" seleciona exatamente os mesmos jogos.
+"""
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from core import binning
+from core.config import MINER_WORKERS
+from core.outcomes import OUTCOME_MARKETS
+from core.session import frame_key, session_result
+from core.vars import VAR_NAMES
+from core.walkforward import lay_hits
+
+PAIR_BINS = 16
+
+
+def _intervals(n_bins):
+    """Todos os intervalos de bins [início, fim] (arrays paralelos)."""
+    starts, ends = np.triu_indices(n_bins)
+    return starts, ends
+
+
+def _best(games, hits, min_games):
+    """Posição (no array achatado) do intervalo de maior taxa com jogos >= min_games; desempate por mais jogos."""
+    games = games.ravel()
+    hits = hits.ravel()
+    valid = games >= min_games
+    if not valid.any():
+        return None
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rate = np.where(valid, hits / games, -1.0)
+    best_rate = rate.max()
+    candidates = np.flatnonzero(rate == best_rate)
+    return candidates[np.argmax(games[candidates])]
+
+
+def _candidate(games, hits, ranges):
+    """Resultado interno: `ranges` é uma lista de (coluna, 'fino' | 'par', bin inicial, bin final)."""
+    return {'jogos': int(games), 'acertos': int(hits), 'taxa_acerto': float(hits / games), 'ranges': ranges}
+
+
+# --- Busca ---
+
+def _mine_single(j, codes, n_codes, hit, min_games):
+    counts = np.bincount(codes.astype(np.intp) * 2 + hit, minlength=2 * n_codes).reshape(n_codes, 2)
+    games = np.concatenate([[0], np.cumsum(counts.sum(axis=1))])
+    hits = np.concatenate([[0], np.cumsum(counts[:, 1])])
+    starts, ends = _intervals(n_codes)
+    interval_games = games[ends + 1] - games[starts]
+    interval_hits = hits[ends + 1] - hits[starts]
+    best = _best(interval_games, interval_hits, min_games)
+    if best is None:
+        return None
+    return _candidate(interval_games[best], interval_hits[best], [(j, 'fino', starts[best], ends[best])])
+
+
+def _mine_pairs_for(a, pair_codes, pair_sizes, hit, min_games):
+    """Melhor retângulo de cada par (a, b > a) sobre os códigos reagrupados."""
+    n_a = pair_sizes[a]
+    starts_a, ends_a = _intervals(n_a)
+    # Chave da célula (bin a, bin b, acerto) com passo fixo PAIR_BINS: por par, uma soma e um bincount
+    key_a = pair_codes[:, a].astype(np.intp) * (2 * PAIR_BINS) + hit
+    results = []
+    for b in range(a + 1, pair_codes.shape[1]):
+        n_b = pair_sizes[b]
+        cells = np.bincount(key_a + pair_codes[:, b] * np.uint8(2), minlength=2 * PAIR_BINS * PAIR_BINS)
+        cells = cells.reshape(PAIR_BINS, PAIR_BINS, 2)[:n_a, :n_b]
+        counts = np.stack([cells.sum(axis=2), cells[..., 1]]).astype(np.int32) # (jogos|acertos, bin a, bin b)
+        # Somas de prefixo separáveis: primeiro as faixas de a (tiras), depois as faixas de b dentro de cada tira
+        by_a = np.zeros((2, n_a + 1, n_b), dtype=np.int32)
+        np.cumsum(counts, axis=1, out=by_a[:, 1:])
+        strips = by_a[:, ends_a + 1] - by_a[:, starts_a]
+        by_b = np.zeros((2, len(starts_a), n_b + 1), dtype=np.int32)
+        np.cumsum(strips, axis=2, out=by_b[:, :, 1:])
+        starts_b, ends_b = _intervals(n_b)
+        games, hits = by_b[:, :, ends_b + 1] - by_b[:, :, starts_b]
+        best = _best(games, hits, min_games)
+        if best is None:
+            continue
+        ra, rb = np.unravel_index(best, games.shape)
+        ranges = [(a, 'par', starts_a[ra], ends_a[ra]), (b, 'par', starts_b[rb], ends_b[rb])]
+        results.append(_candidate(games[ra, rb], hits[ra, rb], ranges))
+    return results
+
+
+def _ranked(candidates, top, market, names, columns, codes, pair_codes):
+    """Melhores candidatos no formato declarativo, com os limites em valores presentes na base."""
+    candidates = sorted((c for c in candidates if c is not None), key=lambda c: (-c['taxa_acerto'], -c['jogos']))
+    specs = []
+    for i, candidate in enumerate(candidates[:top], start=1):
+        faixas = []
+        for j, level, start, end in candidate['ranges']:
+            column_codes = codes[:, j] if level == 'fino' else pair_codes[:, j]
+            selected = columns[names[j]][(column_codes >= start) & (column_codes <= end)]
+            faixas.append({'var': names[j], 'min': float(selected.min()), 'max': float(selected.max())})
+        specs.append({'nome': f"Mineracao_{market}_{len(faixas)}VAR_{i}", 'mercado': market, 'faixas': faixas,
+                      'jogos': candidate['jogos'], 'acertos': candidate['acertos'],
+                      'taxa_acerto': candidate['taxa_acerto']})
+    return specs
+
+
+def mine_var_ranges(vars_dict, hit, market, min_games=200, top=20, pairs=True, workers=MINER_WORKERS, encoding=None):
+    """Busca as faixas de VAR (uma VAR e pares de VARs) de maior taxa de acerto para `market`.
+
+    `vars_dict`: {VARxx: Series} (history_var_dict / pre_calculate_all_vars); `hit`: acerto do Lay por jogo;
+    `encoding`: (códigos uint8 linhas x 77, cortes) de history_var_bins, ou None para codificar na hora.
+    Retorna (melhores faixas simples, melhores pares), cada uma lista de especificações declarativas.
+    """
+    hit = np.asarray(hit, dtype=np.intp)
+    names = [name for name in VAR_NAMES if name in vars_dict]
+    columns = {name: np.asarray(vars_dict[name], dtype=np.float64) for name in names}
+    if encoding is not None and len(names) == len(VAR_NAMES):
+        codes, edges = encoding
+    else:
+        edges = np.vstack([binning.quantile_edges(columns[name]) for name in names])
+        codes = np.empty((len(hit), len(names)), dtype=np.uint8, order='F')
+        for j, name in enumerate(names):
+            codes[:, j] = binning.encode_column(columns[name], edges[j])
+    n_codes = binning.bin_counts(edges)
+
+    singles = [_mine_single(j, codes[:, j], n_codes[j], hit, min_games) for j in range(len(names))]
+    pair_candidates = []
+    pair_codes = None
+    if pairs:
+        pair_codes = np.empty(codes.shape, dtype=np.uint8, order='F')
+        for j in range(len(names)):
+            pair_codes[:, j] = binning.coarsen(codes[:, j], n_codes[j], PAIR_BINS)
+        pair_sizes = [int(pair_codes[:, j].max()) + 1 if len(hit) else 1 for j in range(len(names))]
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            per_var = executor.map(lambda a: _mine_pairs_for(a, pair_codes, pair_sizes, hit, min_games),
+                                   range(len(names)))
+            pair_candidates = [candidate for candidates in per_var for candidate in candidates]
+    return (_ranked(singles, top, market, names, columns, codes, pair_codes),
+            _ranked(pair_candidates, top, market, names, columns, codes, pair_codes))
+
+
+# --- Uso das faixas mineradas ---
+
+def range_mask(vars_dict, spec, encoding=None):
+    """Máscara booleana (Series) dos jogos que atendem a todas as faixas da especificação.
+
+    Com `encoding` (códigos uint8 alinhados a `vars_dict`), cada faixa vira comparação de códigos e só
+    os jogos dos bins de fronteira são conferidos no valor float (core.binning.range_mask).
+    """
+    mask = None
+    for faixa in spec['faixas']:
+        values = vars_dict[faixa['var']]
+        if encoding is None:
+            current = (values >= faixa['min']) & (values <= faixa['max'])
+        else:
+            j = VAR_NAMES.index(faixa['var'])
+            current = pd.Series(binning.range_mask(encoding[0][:, j], np.asarray(values), encoding[1][j],
+                                                   faixa['min'], faixa['max']), index=values.index)
+        mask = current if mask is None else mask & current
+    return mask
+
+
+def strategy_from_spec(vars_dict, spec, encoding=None):
+    """Filtro no formato das estratégias das páginas: (função df -> df filtrado, nome)."""
+    def strategy(df):
+        return df[range_mask(vars_dict, spec, encoding)].copy()
+    return strategy, spec['nome']
+
+
+def specs_table(specs):
+    """DataFrame legível das especificações (uma linha por estratégia)."""
+    rows = []
+    for spec in specs:
+        faixas = " & ".join(f"{f['var']} in [{f['min']:.4f}, {f['max']:.4f}]" for f in spec['faixas'])
+        rows.append({'Estratégia': spec['nome'], 'Mercado': spec['mercado'], 'Faixas': faixas,
+                     'Jogos': spec['jogos'], 'Acertos': spec['acertos'], 'Taxa de Acerto': f"{spec['taxa_acerto']:.2%}"})
+    return pd.DataFrame(rows)
+
+
+# --- Painel das páginas ---
+
+@st.fragment
+def mining_panel(df, vars_dict, encoding=None, markets=OUTCOME_MARKETS, key='miner'):
+    """Expander do minerador: escolhe o mercado alvo, busca as faixas e exporta o JSON declarativo.
+
+    `encoding`: códigos uint8 das VARs de `df` (history_var_bins), se a base colunar os tiver.
+    É um fragmento (os widgets reexecutam só o painel) e o último resultado fica na sessão.
+    """
+    with st.expander("⛏️ Minerador de Faixas de VAR"):
+        col1, col2, col3 = st.columns(3)
+        market = col1.selectbox("Mercado alvo", list(markets), key=f"{key}_mercado")
+        min_games = col2.number_input("Mínimo de jogos", 20, 100000, 200, 10, key=f"{key}_minimo")
+        top = col3.number_input("Melhores resultados", 1, 200, 20, 1, key=f"{key}_top")
+        with_pairs = st.checkbox("Incluir pares de VARs", value=True, key=f"{key}_pares")
+        params = (frame_key(df), market, int(min_games), int(top), with_pairs)
+
+        def mine():
+            hit = lay_hits(df, [market])[:, 0]
+            singles, pair_specs = mine_var_ranges(vars_dict, hit, market, int(min_games), int(top), with_pairs,
+                                                  encoding=encoding)
+            return float(hit.mean()), len(hit), singles, pair_specs
+
+        if st.button("Minerar faixas", key=f"{key}_executar"):
+            with st.spinner("Minerando faixas de VAR..."):
+                try:
+                    session_result(f"{key}_resultado", params, mine)
+                except KeyError as e:
+                    st.error(f"Não foi possível calcular os acertos do mercado: {e}")
+                    return
+        result = session_result(f"{key}_resultado", params)
+        if result is None:
+            return
+        base_rate, n_games, singles, pair_specs = result
+        st.caption(f"Taxa de acerto base do mercado: {base_rate:.2%} em {n_games} jogos.")
+        for title, specs in (("Faixas com uma VAR", singles), ("Faixas com pares de VARs", pair_specs)):
+            if specs:
+                st.subheader(title)
+                st.dataframe(specs_table(specs).set_index('Estratégia'))
+        all_specs = singles + pair_specs
+        if all_specs:
+            st.download_button("📥 Exportar estratégias (JSON)", data=json.dumps(all_specs, ensure_ascii=False, indent=2),
+                               file_name=f"estrategias_{market}.json", mime="application/json", key=f"{key}_json")
+        else:
+            st.info("Nenhuma faixa atingiu o mínimo de jogos.")
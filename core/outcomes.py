@@ -0,0 +1,58 @@
+"""Matriz de resultados: para cada jogo, quais mercados Lay testados pelas páginas teriam perdido.
+
+Uma coluna por mercado (placares exatos, goleadas e handicaps), True quando o evento ocorreu.
+Como cada linha depende apenas dos gols do próprio jogo, a matriz pode ser estendida só com os jogos novos.
+"""
+import numpy as np
+import pandas as pd
+
+# Placares exatos testados nas páginas de Correct Score (Lay_HxA)
+_CORRECT_SCORES = (
+    (0, 0), (0, 1), (1, 0), (1, 1), (0, 2), (2, 0), (1, 2), (2, 1), (2, 2),
+    (0, 3), (3, 0), (1, 3), (3, 1), (2, 3), (3, 2), (3, 3),
+)
+OUTCOME_MARKETS = tuple(
+    [f"Lay_{h}x{a}" for h, a in _CORRECT_SCORES]
+    + ['Lay_Goleada_H', 'Lay_Goleada_A', 'Lay_Hand35_Casa', 'Lay_Hand45_Casa', 'Lay_Hand35_Fora', 'Lay_Hand45_Fora']
+)
+
+# Pares de colunas de gols (casa, fora) de cada base histórica
+GOAL_COLUMN_PAIRS = (('Goals_H_FT', 'Goals_A_FT'), ('Goals_H', 'Goals_A'))
+
+
+def detect_goal_columns(columns):
+    """Retorna o par (gols casa, gols fora) presente nas colunas, ou None."""
+    columns = set(columns)
+    for pair in GOAL_COLUMN_PAIRS:
+        if set(pair).issubset(columns):
+            return pair
+    return None
+
+
+def compute_outcome_matrix(goals_h, goals_a):
+    """Matriz booleana (linhas x mercados) na ordem de OUTCOME_MARKETS.
+
+    Segue get_score_condition das páginas: jogos sem placar (NaN) nunca contam como ocorrência.
+    """
+    h = pd.to_numeric(pd.Series(goals_h), errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    a = pd.to_numeric(pd.Series(goals_a), errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    matrix = np.empty((len(h), len(OUTCOME_MARKETS)), dtype=bool, order='F')
+    col = 0
+    for score_h, score_a in _CORRECT_SCORES:
+        matrix[:, col] = (h == score_h) & (a == score_a)
+        col += 1
+    with np.errstate(invalid='ignore'):
+        diff = h - a
+        big_score = (h > 3) | (a > 3)
+        matrix[:, col] = (h > a) & big_score
+        matrix[:, col + 1] = (a > h) & big_score
+        matrix[:, col + 2] = diff > 3
+        matrix[:, col + 3] = diff > 4
+        matrix[:, col + 4] = diff < -3
+        matrix[:, col + 5] = diff < -4
+    return matrix
+
+
+def outcome_index(market):
+    """Posição da coluna de um mercado na matriz de resultados (ValueError se desconhecido)."""
+    return OUTCOME_MARKETS.index(market)
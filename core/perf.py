@@ -0,0 +1,302 @@
+"""Instrumentação leve dos caminhos quentes: tempo e memória por etapa, linhas processadas e bytes lidos.
+
+Cada execução do script de uma página é uma "execução" (start_run); as etapas medidas com
+`stage` (gerenciador de contexto) ou `timed` (decorador) entram na execução da thread atual,
+com aninhamento (ex.: carregar_historico > sync_base > leitura_xlsx). Cada etapa concluída
+também vira uma linha de log estruturado (JSON) no logger 'bet.perf'; o painel "Performance"
+mostra a quebra por etapa da execução atual.
+
+Fora de uma página (benchmarks, scripts) as etapas continuam sendo registradas no log,
+mas sem execução corrente não há quebra a mostrar.
+
+Memória: cada etapa registra o RSS do processo ao terminar, quanto ele variou e o pico de RSS
+do processo até ali (/proc e getrusage, sem dependências). Com BET_TRACE_MEMORY=1, o tracemalloc
+também mede o pico de memória alocada pelo Python dentro de cada etapa (com custo de CPU; como o
+processo é compartilhado, sessões simultâneas entram na mesma medição).
+
+Fragmentos (st.fragment) que reexecutam sozinhos não passam pelo topo nem pelo fim da página:
+com o decorador `fragment_run`, abrem a sua própria execução e mostram o painel dentro do fragmento.
+
+Perfil sob demanda: com BET_PROFILE=1 ou ?profile=1 na URL da página, as etapas marcadas com
+profile=True (a grade VAR x Lay e os jogos do dia) rodam sob cProfile; cada uma grava um .prof em
+PROFILE_DIR (abrir com snakeviz ou pstats) e o painel mostra as funções de maior tempo acumulado.
+"""
+import cProfile
+import functools
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+
+import pandas as pd
+import streamlit as st
+
+from core.config import PERF_LOG, PERF_PANEL, PROFILE, PROFILE_DIR, PROFILE_TOP, TRACE_MEMORY
+
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
+logger = logging.getLogger('bet.perf')
+_local = threading.local()
+
+
+def _configure_logger():
+    """Com BET_PERF_LOG ('stderr' ou caminho de arquivo), grava os eventos em INFO nesse destino."""
+    if not PERF_LOG or logger.handlers:
+        return
+    handler = logging.StreamHandler(sys.stderr) if PERF_LOG == 'stderr' else logging.FileHandler(PERF_LOG, encoding='utf-8')
+    handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+
+
+_configure_logger()
+
+
+def _log(event, **fields):
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps({'event': event, **fields}, ensure_ascii=False, default=str))
+
+
+# --- Memória ---
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+# getrusage informa o pico em KB no Linux e em bytes no macOS
+_MAXRSS_UNIT = 1 if sys.platform == 'darwin' else 1024
+
+if TRACE_MEMORY and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+
+def rss_bytes():
+    """RSS atual do processo (Linux, via /proc), ou None onde não houver /proc."""
+    try:
+        with open('/proc/self/statm', encoding='ascii') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def peak_rss_bytes():
+    """Pico de RSS do processo desde o início (getrusage), ou None sem o módulo resource."""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _MAXRSS_UNIT
+
+
+def _trace_start():
+    """Abre a medição de pico do tracemalloc de uma etapa (preservando o pico já visto pela etapa externa)."""
+    if not tracemalloc.is_tracing():
+        return None
+    current, peak = tracemalloc.get_traced_memory()
+    stack = _local.__dict__.setdefault('trace_peaks', [])
+    if stack:
+        stack[-1] = max(stack[-1], peak)
+    tracemalloc.reset_peak()
+    stack.append(current)
+    return current
+
+
+def _trace_end(start):
+    """Pico alocado pelo Python acima do nível inicial da etapa (bytes); repassa o pico para a etapa externa."""
+    if start is None or not tracemalloc.is_tracing():
+        return None
+    stack = _local.trace_peaks
+    peak = max(stack.pop(), tracemalloc.get_traced_memory()[1])
+    if stack:
+        stack[-1] = max(stack[-1], peak)
+    return max(peak - start, 0)
+
+
+# --- Execução corrente ---
+
+def profiling_enabled():
+    """Perfil ligado por BET_PROFILE ou pelo parâmetro ?profile=1 da URL da página."""
+    if PROFILE:
+        return True
+    try:
+        value = st.query_params.get('profile', '')
+    except Exception: # Fora de uma sessão Streamlit
+        return False
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'sim')
+
+
+def _begin_run(page):
+    run = {'id': uuid.uuid4().hex[:12], 'page': os.path.splitext(os.path.basename(page))[0],
+           'started': time.perf_counter(), 'stages': [], 'profile': profiling_enabled(), 'profiles': []}
+    _local.run = run
+    _local.depth = 0
+    _local.profiler = None
+    return run
+
+
+def start_run(page):
+    """Inicia a execução de uma página (chamar no topo do script; `page` pode ser __file__)."""
+    run = _begin_run(page)
+    if run['profile']:
+        st.sidebar.caption(f"🔬 Perfil cProfile ativo nesta execução ({run['id']}).")
+    return run
+
+
+def fragment_run(page):
+    """Decorador (abaixo de @st.fragment) que dá ao fragmento a sua própria execução quando só ele reexecuta.
+
+    Dentro da execução completa da página, as etapas do fragmento entram na execução da página e
+    aparecem no painel do fim. Quando só o fragmento reexecuta, o script não passa por start_run nem
+    por performance_panel (e a thread não tem execução corrente, ou tem a de uma execução já
+    encerrada): o fragmento abre uma execução nova e mostra o próprio painel ao terminar.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            run = current_run()
+            if run is not None and not run.get('finished'):
+                return func(*args, **kwargs)
+            run = _begin_run(page)
+            if run['profile']:
+                st.caption(f"🔬 Perfil cProfile ativo nesta execução do fragmento ({run['id']}).")
+            result = func(*args, **kwargs)
+            performance_panel()
+            return result
+        return wrapper
+    return decorator
+
+
+def current_run():
+    """Execução da thread atual, ou None fora de uma página instrumentada."""
+    return getattr(_local, 'run', None)
+
+
+def profile_table(stats, top=PROFILE_TOP):
+    """DataFrame das `top` funções de maior tempo acumulado de um pstats.Stats."""
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:top]
+    return pd.DataFrame({
+        'Função': [f"{os.path.basename(file)}:{line}({func})" for (file, line, func), _ in rows],
+        'Chamadas': [calls for _, (_, calls, _, _, _) in rows],
+        'Tempo próprio (s)': [round(own, 4) for _, (_, _, own, _, _) in rows],
+        'Tempo acumulado (s)': [round(cumulative, 4) for _, (_, _, _, cumulative, _) in rows],
+    })
+
+
+def _save_profile(run, name, profiler):
+    """Grava o .prof da etapa e guarda o resumo na execução (o resumo fica mesmo se a gravação falhar)."""
+    stats = pstats.Stats(profiler)
+    path = os.path.join(PROFILE_DIR, f"{run['page']}_{run['id']}_{name}.prof")
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        stats.dump_stats(path)
+    except OSError:
+        path = None
+    run['profiles'].append({'stage': name, 'path': path, 'table': profile_table(stats)})
+    _log('profile', run=run['id'], page=run['page'], stage=name, path=path)
+
+
+@contextmanager
+def stage(name, rows=None, bytes_read=None, detail=None, profile=False):
+    """Mede o bloco como uma etapa; o dicionário devolvido aceita 'rows', 'bytes' e 'detail' preenchidos dentro do bloco.
+
+    Com profile=True e o perfil ligado na execução, o bloco roda sob cProfile (etapas aninhadas
+    não abrem um segundo perfil).
+    """
+    counters = {'rows': rows, 'bytes': bytes_read, 'detail': detail}
+    run = current_run()
+    depth = getattr(_local, 'depth', 0)
+    _local.depth = depth + 1
+    position = None
+    if run is not None: # Reserva a posição: a etapa externa aparece antes das internas
+        position = len(run['stages'])
+        run['stages'].append(None)
+    profiler = None
+    if profile and run is not None and run['profile'] and getattr(_local, 'profiler', None) is None:
+        profiler = _local.profiler = cProfile.Profile()
+        profiler.enable()
+    rss_start = rss_bytes()
+    trace_start = _trace_start()
+    start = time.perf_counter()
+    try:
+        yield counters
+    finally:
+        seconds = time.perf_counter() - start
+        py_peak = _trace_end(trace_start)
+        rss_end = rss_bytes()
+        if profiler is not None:
+            profiler.disable()
+            _local.profiler = None
+            _save_profile(run, name, profiler)
+        _local.depth = depth
+        record = {'stage': name, 'depth': depth, 'seconds': seconds, 'rows': counters['rows'],
+                  'bytes': counters['bytes'], 'detail': counters['detail'], 'rss': rss_end,
+                  'rss_delta': None if rss_start is None or rss_end is None else rss_end - rss_start,
+                  'rss_peak': peak_rss_bytes(), 'py_peak': py_peak}
+        if run is not None:
+            run['stages'][position] = record
+        _log('stage', run=run and run['id'], page=run and run['page'], **record)
+
+
+def timed(name=None, rows=None):
+    """Decorador de `stage`; `rows(resultado)` opcional informa as linhas processadas."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name or func.__name__) as counters:
+                result = func(*args, **kwargs)
+                if rows is not None and result is not None:
+                    counters['rows'] = rows(result)
+                return result
+        return wrapper
+    return decorator
+
+
+# --- Painel das páginas ---
+
+def stages_table(run):
+    """DataFrame das etapas concluídas de uma execução (etapas internas indentadas)."""
+    records = [record for record in run['stages'] if record is not None]
+    total = time.perf_counter() - run['started']
+
+    def megabytes(key):
+        return [None if r[key] is None else round(r[key] / 2**20, 1) for r in records]
+    return pd.DataFrame({
+        'Etapa': ["\u2003" * r['depth'] + ("↳ " if r['depth'] else "") + r['stage'] for r in records],
+        'Tempo (s)': [round(r['seconds'], 3) for r in records],
+        '% da execução': [f"{r['seconds'] / total:.1%}" if total else "" for r in records],
+        'Linhas': pd.array([r['rows'] for r in records], dtype='Int64'),
+        'Bytes': pd.array([r['bytes'] for r in records], dtype='Int64'),
+        'Detalhe': [r['detail'] for r in records],
+        'RSS (MB)': megabytes('rss'),
+        'Δ RSS (MB)': megabytes('rss_delta'),
+        'Pico RSS do processo (MB)': megabytes('rss_peak'),
+        'Pico Python na etapa (MB)': megabytes('py_peak'),
+    })
+
+
+def performance_panel():
+    """Expander "Performance" com a quebra por etapa da execução atual (chamar no fim da página),
+    e os perfis cProfile gravados, se o perfil estiver ligado."""
+    run = current_run()
+    if run is None:
+        return
+    run['finished'] = True
+    total = time.perf_counter() - run['started']
+    _log('run', run=run['id'], page=run['page'], seconds=total,
+         stages=sum(1 for record in run['stages'] if record is not None), rss=rss_bytes(), rss_peak=peak_rss_bytes())
+    if PERF_PANEL and any(record is not None for record in run['stages']):
+        with st.expander("⏱️ Performance desta execução"):
+            st.caption(f"Execução {run['id']} da página {run['page']}: {total:.2f}s no total.")
+            st.dataframe(stages_table(run), hide_index=True)
+    for profile in run['profiles']:
+        with st.expander(f"🔬 Perfil cProfile: {profile['stage']}"):
+            st.caption(f"Arquivo: {profile['path']}" if profile['path'] else "Não foi possível gravar o arquivo .prof.")
+            st.dataframe(profile['table'], hide_index=True)
+            if profile['path']:
+                with open(profile['path'], 'rb') as f:
+                    st.download_button("📥 Baixar .prof", data=f.read(), file_name=os.path.basename(profile['path']),
+                                       key=f"perfil_{run['id']}_{profile['stage']}")
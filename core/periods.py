@@ -0,0 +1,105 @@
+"""Recorte das bases por período (intervalo de datas ou temporada) com índice de datas ordenado.
+
+O índice guarda as datas válidas em ordem crescente e a posição de cada uma no DataFrame. Qualquer
+janela vira dois searchsorted e uma fatia do índice, sem comparar a coluna de datas inteira.
+As posições devolvidas seguem a ordem original das linhas, de modo que "últimos N jogos"
+(tail) continuam com o mesmo significado dentro da janela. Se a base já está em ordem de data,
+a janela é uma fatia contígua (iloc sem cópia de índice).
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Temporadas "europeias" (AAAA/AA) vão de 1º de julho a 30 de junho; as de ano civil, de janeiro a dezembro
+SEASON_START_MONTH = 7
+
+
+def build_date_index(dates):
+    """Índice de datas: {'sorted': datas válidas (int64 ns) crescentes, 'order': posições das linhas, 'contiguous'}.
+
+    'contiguous' indica que as linhas já estão em ordem de data (ausentes só no fim); nesse caso
+    'order' é simplesmente 0..n-1 e nenhuma ordenação é feita.
+    """
+    values = pd.to_datetime(pd.Series(dates), errors='coerce')
+    valid = values.notna().to_numpy()
+    ints = values.to_numpy(dtype='datetime64[ns]').view(np.int64)
+    n_valid = int(valid.sum())
+    if valid[:n_valid].all() and (np.diff(ints[:n_valid]) >= 0).all():
+        return {'sorted': ints[:n_valid], 'order': np.arange(n_valid, dtype=np.int64), 'contiguous': True}
+    positions = np.flatnonzero(valid)
+    order = positions[np.argsort(ints[positions], kind='stable')]
+    return {'sorted': ints[order], 'order': order, 'contiguous': False}
+
+
+def _as_ns(value):
+    return pd.Timestamp(value).normalize().value
+
+
+def window_positions(index, start=None, end=None):
+    """Posições (slice ou array em ordem original) das linhas com data entre `start` e `end` (dias inclusivos)."""
+    sorted_dates = index['sorted']
+    lo = 0 if start is None else int(np.searchsorted(sorted_dates, _as_ns(start), side='left'))
+    hi = len(sorted_dates)
+    if end is not None:
+        end_exclusive = _as_ns(pd.Timestamp(end) + pd.Timedelta(days=1))
+        hi = int(np.searchsorted(sorted_dates, end_exclusive, side='left'))
+    hi = max(hi, lo)
+    if index['contiguous']:
+        return slice(lo, hi)
+    return np.sort(index['order'][lo:hi])
+
+
+def slice_by_dates(df, index, start=None, end=None):
+    """Linhas de `df` dentro da janela (o índice precisa ter sido construído sobre este mesmo `df`)."""
+    if start is None and end is None:
+        return df
+    return df.iloc[window_positions(index, start, end)]
+
+
+def date_bounds(index):
+    """(primeira, última) data do índice como Timestamp, ou (None, None) se não houver datas."""
+    if not len(index['sorted']):
+        return None, None
+    return pd.Timestamp(index['sorted'][0]), pd.Timestamp(index['sorted'][-1])
+
+
+def season_range(label):
+    """Intervalo (início, fim) de uma temporada: 'AAAA' (ano civil) ou 'AAAA/AA' (julho a junho)."""
+    year = int(label[:4])
+    if '/' in label:
+        start = pd.Timestamp(year=year, month=SEASON_START_MONTH, day=1)
+        return start, start + pd.DateOffset(years=1) - pd.Timedelta(days=1)
+    return pd.Timestamp(year=year, month=1, day=1), pd.Timestamp(year=year, month=12, day=31)
+
+
+def list_seasons(index):
+    """Temporadas com jogos no índice, da mais recente para a mais antiga (ano civil e AAAA/AA)."""
+    first, last = date_bounds(index)
+    if first is None:
+        return []
+    seasons = []
+    for year in range(last.year, first.year - 2, -1):
+        for label in (str(year), f"{year}/{(year + 1) % 100:02d}"):
+            start, end = season_range(label)
+            if start <= last and end >= first:
+                seasons.append(label)
+    return seasons
+
+
+def sidebar_date_window(index, key='periodo'):
+    """Controles na barra lateral para restringir o backtest; retorna (início, fim) ou (None, None)."""
+    if index is None or not len(index['sorted']):
+        return None, None
+    st.sidebar.header("Período do Backtest")
+    mode = st.sidebar.radio("Recorte por data", ["Todo o histórico", "Temporada", "Intervalo de datas"], key=f"{key}_modo")
+    if mode == "Temporada":
+        season = st.sidebar.selectbox("Temporada", list_seasons(index), key=f"{key}_temporada",
+                                      help="AAAA = ano civil; AAAA/AA = de julho a junho.")
+        return season_range(season)
+    if mode == "Intervalo de datas":
+        first, last = date_bounds(index)
+        selected = st.sidebar.date_input("Intervalo", value=(first.date(), last.date()), min_value=first.date(),
+                                         max_value=last.date(), format="DD/MM/YYYY", key=f"{key}_intervalo")
+        if isinstance(selected, (tuple, list)) and len(selected) == 2:
+            return pd.Timestamp(selected[0]), pd.Timestamp(selected[1])
+    return None, None
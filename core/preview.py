@@ -0,0 +1,88 @@
+"""Prévia por amostragem dos construtores de estratégia (páginas 8 e 12).
+
+Enquanto o conjunto exato de jogos é calculado em segundo plano (core.matches.start_matches), o
+construtor avalia os filtros numa amostra estratificada por liga e temporada (ano da data), com
+alocação proporcional, e mostra os KPIs estimados com intervalo de confiança de 95%.
+
+Os estimadores são os usuais da amostragem estratificada: totais expandidos pelo peso N_h/n_h de
+cada estrato, com a variância somada estrato a estrato (com correção de população finita); taxas
+(acerto, ROI) são razões de dois totais, com variância por linearização.
+"""
+import numpy as np
+import pandas as pd
+
+Z_95 = 1.959963984540054
+
+
+def stratified_sample(df, size, seed=0):
+    """Amostra de ~`size` jogos de df, estratificada por liga e temporada, com alocação proporcional.
+
+    Todo estrato não vazio entra com pelo menos um jogo. A semente fixa faz a mesma consulta mostrar
+    sempre a mesma prévia. Retorna um dict com 'rows' (rótulos do índice de df, em ordem), 'stratum'
+    (estrato de cada jogo da amostra) e, por estrato, 'population' (N_h) e 'sampled' (n_h).
+    """
+    seasons = pd.to_datetime(df['Date']).dt.year
+    strata = df.groupby([df['League'], seasons], sort=False, dropna=False).ngroup().to_numpy()
+    population = np.bincount(strata)
+    sampled = np.minimum(population, np.maximum(1, np.round(population * size / max(len(df), 1)).astype(np.int64)))
+    # Ordem aleatória dentro de cada estrato; ficam os n_h primeiros
+    rng = np.random.default_rng(seed)
+    order = np.lexsort((rng.random(len(df)), strata))
+    starts = np.concatenate(([0], np.cumsum(population)[:-1]))
+    rank = np.arange(len(df)) - starts[strata[order]]
+    chosen = np.sort(order[rank < sampled[strata[order]]])
+    return {'rows': df.index.to_numpy()[chosen], 'stratum': strata[chosen], 'population': population, 'sampled': sampled}
+
+
+def _stratified_total(sample, values):
+    """Total estimado de `values` (um valor por jogo da amostra) e sua variância."""
+    stratum, population, sampled = sample['stratum'], sample['population'], sample['sampled']
+    sums = np.bincount(stratum, weights=values, minlength=len(population))
+    squares = np.bincount(stratum, weights=values * values, minlength=len(population))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        variance = np.where(sampled > 1, (squares - sums * sums / sampled) / (sampled - 1), 0.0)
+        total = np.sum(population * sums / sampled)
+        total_variance = np.sum(population ** 2 * (1 - sampled / population) * np.maximum(variance, 0.0) / sampled)
+    return float(total), float(total_variance)
+
+
+def _interval(estimate, variance, low=None, high=None):
+    margin = Z_95 * np.sqrt(variance)
+    return (estimate, float(np.clip(estimate - margin, low, high)), float(np.clip(estimate + margin, low, high)))
+
+
+def preview_estimates(sample, matched, wins=None, profits=None):
+    """KPIs estimados a partir da amostra, cada um como (estimativa, limite inferior, limite superior) a 95%.
+
+    `matched` marca os jogos da amostra que passaram nos filtros (com aposta válida); `wins` e
+    `profits`, opcionais, trazem o resultado da aposta nesses jogos. Retorna 'total_bets' e, com
+    `wins`/`profits` e algum jogo aprovado na amostra, 'win_rate' (%), 'net_profit' e 'roi' (%), além de
+    'sample_size' e 'sample_matched'.
+    """
+    matched = np.asarray(matched, dtype=np.float64)
+    total, total_variance = _stratified_total(sample, matched)
+    population = float(sample['population'].sum())
+    estimates = {'sample_size': len(matched), 'sample_matched': int(matched.sum()),
+                 'total_bets': _interval(total, total_variance, 0, population)}
+    if estimates['sample_matched'] == 0 and len(matched):
+        # Nenhum jogo da amostra passou: a variância estimada é zero; o limite superior vem da "regra do três"
+        estimates['total_bets'] = (0.0, 0.0, min(population, 3 * population / len(matched)))
+
+    def ratio(values):
+        if total <= 0:
+            return 0.0, 0.0
+        numerator, _ = _stratified_total(sample, matched * values)
+        estimate = numerator / total
+        _, residual_variance = _stratified_total(sample, matched * (values - estimate)) # Linearização da razão
+        return estimate, residual_variance / total ** 2
+
+    if wins is not None and estimates['sample_matched']:
+        rate, variance = ratio(np.asarray(wins, dtype=np.float64))
+        estimates['win_rate'] = _interval(rate * 100, variance * 100 ** 2, 0, 100)
+    if profits is not None and estimates['sample_matched']:
+        profits = np.asarray(profits, dtype=np.float64)
+        net_profit, net_variance = _stratified_total(sample, matched * profits)
+        estimates['net_profit'] = _interval(net_profit, net_variance)
+        roi, variance = ratio(profits)
+        estimates['roi'] = _interval(roi * 100, variance * 100 ** 2)
+    return estimates
@@ -0,0 +1,41 @@
+"""Resultados pesados guardados no st.session_state entre as reexecuções da página.
+
+Qualquer interação com um widget reexecuta o script da página. As seções caras (a grade VAR x Lay,
+o walk-forward, o minerador, o construtor de estratégias) guardam o último resultado na sessão,
+junto com os parâmetros que o produziram: a reexecução reaproveita o resultado enquanto os
+parâmetros forem os mesmos, e as seções interativas ficam em st.fragment, que reexecuta só a
+própria seção.
+"""
+import streamlit as st
+
+
+def frame_key(df):
+    """Identificação barata de um DataFrame da base (geração, linhas e primeira/última posição)."""
+    if df is None or df.empty:
+        return (None, 0)
+    return (df.attrs.get('store_path'), len(df), df.index[0], df.index[-1])
+
+
+def session_result(name, params, compute=None):
+    """Resultado guardado em st.session_state[name] para `params`.
+
+    Se o resultado guardado for de outros parâmetros (ou não existir), executa compute() e guarda
+    o novo resultado; sem `compute`, retorna None nesse caso. Só o último resultado de cada `name`
+    fica na sessão.
+    """
+    entry = st.session_state.get(name)
+    if entry is not None and entry['params'] == params:
+        return entry['result']
+    if compute is None:
+        return None
+    result = compute()
+    st.session_state[name] = {'params': params, 'result': result}
+    return result
+
+
+def last_session_result(name):
+    """(parâmetros, resultado) do último cálculo guardado em `name`, ou None."""
+    entry = st.session_state.get(name)
+    if entry is None:
+        return None
+    return entry['params'], entry['result']
@@ -0,0 +1,47 @@
+"""Coalescência de cargas concorrentes ("single flight") dentro do processo.
+
+Quando várias sessões pedem a mesma carga ao mesmo tempo (ex.: todo mundo abrindo o app com o
+cache frio), só a primeira executa a função; as demais esperam e recebem o mesmo resultado
+(ou a mesma exceção). Terminada a carga, a chave é liberada: a próxima chamada executa de novo,
+o que mantém as revalidações da fonte funcionando normalmente.
+"""
+import threading
+
+from core.perf import stage
+
+_flights = {}
+_flights_guard = threading.Lock()
+
+
+def single_flight(key, func, wait_stage='aguardando_carga'):
+    """Executa func() uma única vez por `key` entre as threads que chegarem enquanto ela roda.
+
+    As threads que esperam registram o tempo de espera como a etapa `wait_stage` (core.perf).
+    """
+    while True:
+        with _flights_guard:
+            flight = _flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _flights[key] = {'done': threading.Event(), 'result': None, 'error': None, 'completed': False}
+        if leader:
+            break
+        with stage(wait_stage) as counters:
+            flight['done'].wait()
+            counters['detail'] = "carga compartilhada com outra sessão"
+        if flight['error'] is not None:
+            raise flight['error']
+        if flight['completed']:
+            return flight['result']
+        # A sessão que carregava foi interrompida (rerun/stop do Streamlit): tenta de novo
+    try:
+        flight['result'] = func()
+        flight['completed'] = True
+        return flight['result']
+    except Exception as e:
+        flight['error'] = e
+        raise
+    finally:
+        with _flights_guard:
+            del _flights[key]
+        flight['done'].set()
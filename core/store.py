@@ -0,0 +1,247 @@
+"""Armazenamento colunar local das bases históricas (um arquivo .npy por coluna).
+
+Cada base fica em STORE_DIR/<nome>/ em gerações imutáveis:
+    current.json            - aponta para a geração vigente (troca atômica)
+    g<N>/manifest.json      - linhas, colunas (tipo de codificação), versão da fonte e extras
+    g<N>/columns/<i>.npy    - dados de cada coluna (textos como códigos int32; categorias no manifesto)
+    g<N>/arrays/<nome>.npy  - arrays auxiliares (chaves das partidas, matrizes derivadas etc.)
+Uma atualização grava uma geração nova e só então troca o ponteiro, de modo que leitores
+em andamento continuam vendo uma geração completa e consistente.
+
+As gerações são imutáveis, então os arquivos servem também para compartilhar a base entre os
+processos do servidor: colunas numéricas/datas e arrays auxiliares são abertos como mapas de
+memória somente leitura (np.load com mmap_mode='r') e entram nos DataFrames/Series sem cópia,
+de modo que processos na mesma máquina usam as mesmas páginas do cache do sistema operacional.
+"""
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.config import STORE_DIR
+
+_NAT = np.iinfo(np.int64).min
+
+
+class StoreSchemaError(ValueError):
+    """Os dados novos não são compatíveis com as colunas já armazenadas."""
+
+
+def store_dir(name, root=None):
+    return os.path.join(root or STORE_DIR, name)
+
+
+def read_manifest_at(path):
+    """Manifesto de uma geração específica (mesmo que já não seja a vigente)."""
+    with open(os.path.join(path, 'manifest.json'), encoding='utf-8') as f:
+        manifest = json.load(f)
+    manifest['path'] = path
+    return manifest
+
+
+def read_manifest(name, root=None):
+    """Manifesto da geração vigente (com a chave 'path' apontando para ela), ou None se não houver."""
+    base = store_dir(name, root)
+    try:
+        with open(os.path.join(base, 'current.json'), encoding='utf-8') as f:
+            generation = json.load(f)['generation']
+        return read_manifest_at(os.path.join(base, generation))
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+# --- Codificação das colunas ---
+
+def _is_text(series):
+    if pd.api.types.is_string_dtype(series.dtype) and not pd.api.types.is_object_dtype(series.dtype):
+        return True
+    if pd.api.types.is_object_dtype(series.dtype):
+        values = series.dropna()
+        return len(values) > 0 and values.map(type).eq(str).all()
+    return False
+
+
+def _column_kind(series):
+    if pd.api.types.is_bool_dtype(series.dtype) or pd.api.types.is_numeric_dtype(series.dtype):
+        return 'numeric'
+    if pd.api.types.is_datetime64_dtype(series.dtype):
+        return 'datetime'
+    if _is_text(series):
+        return 'text'
+    return 'object'
+
+
+def _encode_text(series, categories):
+    """Códigos int32 segundo `categories` (lista estendida in-place com os valores novos); -1 = ausente."""
+    lookup = pd.Index(categories)
+    values = series.astype(object)
+    codes = lookup.get_indexer(values.to_numpy())
+    unseen = (codes == -1) & values.notna().to_numpy()
+    if unseen.any():
+        extra = pd.unique(values[unseen])
+        categories.extend(extra)
+        codes[unseen] = pd.Index(categories).get_indexer(values[unseen].to_numpy())
+    return codes.astype(np.int32)
+
+
+def _encode_column(series, kind, categories=None):
+    """Converte uma coluna para o array armazenado conforme o tipo de codificação."""
+    all_missing = series.isna().all()
+    if kind == 'numeric':
+        if not (_column_kind(series) == 'numeric' or all_missing):
+            raise StoreSchemaError(f"Coluna '{series.name}' deixou de ser numérica")
+        if all_missing and _column_kind(series) != 'numeric':
+            return np.full(len(series), np.nan)
+        return series.to_numpy()
+    if kind == 'datetime':
+        if not (_column_kind(series) == 'datetime' or all_missing):
+            raise StoreSchemaError(f"Coluna '{series.name}' deixou de ser data")
+        if all_missing:
+            return np.full(len(series), _NAT, dtype=np.int64)
+        return series.to_numpy(dtype='datetime64[ns]').view(np.int64)
+    if kind == 'text':
+        if not (_column_kind(series) == 'text' or all_missing):
+            raise StoreSchemaError(f"Coluna '{series.name}' deixou de ser texto")
+        return _encode_text(series, categories)
+    values = np.empty(len(series), dtype=object)
+    values[:] = series.to_numpy(dtype=object)
+    return values
+
+
+def encode_frame(df):
+    """Codifica um DataFrame: retorna (lista de especificações de coluna, lista de arrays)."""
+    specs, arrays = [], []
+    for name in df.columns:
+        series = df[name]
+        kind = _column_kind(series)
+        spec = {'name': name, 'kind': kind}
+        if kind == 'text':
+            spec['categories'] = []
+        arrays.append(_encode_column(series, kind, spec.get('categories')))
+        specs.append(spec)
+    return specs, arrays
+
+
+def _missing_column(kind, n):
+    if kind == 'numeric':
+        return np.full(n, np.nan)
+    if kind == 'datetime':
+        return np.full(n, _NAT, dtype=np.int64)
+    if kind == 'text':
+        return np.full(n, -1, dtype=np.int32)
+    return np.full(n, None, dtype=object)
+
+
+def append_encoded(specs, arrays, df_new):
+    """Acrescenta as linhas de `df_new` às colunas codificadas (categorias estendidas in-place).
+
+    Levanta StoreSchemaError se `df_new` trouxer colunas desconhecidas ou de tipo incompatível.
+    """
+    known = {spec['name'] for spec in specs}
+    extra = [name for name in df_new.columns if name not in known]
+    if extra:
+        raise StoreSchemaError(f"Colunas novas na fonte: {', '.join(map(str, extra))}")
+    result = []
+    for spec, old in zip(specs, arrays):
+        if spec['name'] in df_new.columns:
+            new = _encode_column(df_new[spec['name']], spec['kind'], spec.get('categories'))
+        else:
+            new = _missing_column(spec['kind'], len(df_new))
+        result.append(np.concatenate([old, new]))
+    return result
+
+
+def _decode_column(spec, array):
+    kind = spec['kind']
+    if kind == 'datetime':
+        return pd.Series(array.view('datetime64[ns]'), copy=False)
+    if kind == 'text':
+        labels = np.empty(len(spec['categories']) + 1, dtype=object)
+        labels[:-1] = spec['categories']
+        labels[-1] = np.nan
+        return pd.Series(labels[array]).infer_objects()
+    if kind == 'object':
+        return pd.Series(array, dtype=object).infer_objects()
+    return pd.Series(array, copy=False)
+
+
+# --- Leitura e gravação de gerações ---
+
+def _column_path(path, i, suffix='.npy'):
+    return os.path.join(path, 'columns', f"{i}{suffix}")
+
+
+def load_columns(manifest, mmap=False):
+    """Arrays codificados de todas as colunas da geração, na ordem do manifesto."""
+    mode = 'r' if mmap else None
+    arrays = []
+    for i, spec in enumerate(manifest['columns']):
+        arrays.append(np.load(_column_path(manifest['path'], i), mmap_mode=None if spec['kind'] == 'object' else mode,
+                              allow_pickle=spec['kind'] == 'object'))
+    return arrays
+
+
+def load_frame(manifest, arrays=None, mmap=False):
+    """Reconstrói o DataFrame da geração (índice 0..linhas-1, alinhado aos arrays auxiliares).
+
+    `arrays` permite decodificar colunas já carregadas (ex.: recém-estendidas, ainda não gravadas).
+    Com mmap=True, as colunas numéricas e de data são os próprios mapas de memória (somente leitura):
+    o DataFrame não copia esses dados, e os textos são decodificados a partir dos códigos mapeados.
+    """
+    arrays = load_columns(manifest, mmap=mmap) if arrays is None else arrays
+    data = {spec['name']: _decode_column(spec, array) for spec, array in zip(manifest['columns'], arrays)}
+    return pd.DataFrame(data, copy=False)
+
+
+def load_array(manifest, name, mmap=True):
+    """Array auxiliar da geração (mapeado em memória, somente leitura), ou None se não existir."""
+    path = os.path.join(manifest['path'], 'arrays', f"{name}.npy")
+    if not os.path.exists(path):
+        return None
+    return np.load(path, mmap_mode='r' if mmap else None)
+
+
+def write_generation(name, specs, arrays, extra_arrays, metadata, root=None, keep=2):
+    """Grava uma geração completa e troca o ponteiro 'current.json' atomicamente.
+
+    `extra_arrays` é um dicionário {nome: array} gravado em arrays/; `metadata` vai para o manifesto.
+    Mantém as `keep` gerações mais recentes (leitores em andamento continuam com seus arquivos).
+    """
+    base = store_dir(name, root)
+    os.makedirs(base, exist_ok=True)
+    previous = read_manifest(name, root)
+    number = previous.get('generation_number', 0) + 1 if previous else 1
+    generation = f"g{number:06d}"
+    tmp_path = tempfile.mkdtemp(dir=base, prefix='.tmp-')
+    try:
+        os.makedirs(os.path.join(tmp_path, 'columns'))
+        os.makedirs(os.path.join(tmp_path, 'arrays'))
+        for i, (spec, array) in enumerate(zip(specs, arrays)):
+            np.save(_column_path(tmp_path, i), array, allow_pickle=spec['kind'] == 'object')
+        for array_name, array in extra_arrays.items():
+            np.save(os.path.join(tmp_path, 'arrays', f"{array_name}.npy"), array)
+        manifest = dict(metadata, rows=len(arrays[0]) if arrays else 0, columns=specs,
+                        generation_number=number, written_at=time.time())
+        with open(os.path.join(tmp_path, 'manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, default=str)
+        final_path = os.path.join(base, generation)
+        if os.path.exists(final_path):
+            shutil.rmtree(final_path)
+        os.replace(tmp_path, final_path)
+    except BaseException:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+    fd, pointer_tmp = tempfile.mkstemp(dir=base, suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump({'generation': generation}, f)
+    os.replace(pointer_tmp, os.path.join(base, 'current.json'))
+
+    generations = sorted(d for d in os.listdir(base) if d.startswith('g') and os.path.isdir(os.path.join(base, d)))
+    for old in generations[:-keep]:
+        shutil.rmtree(os.path.join(base, old), ignore_errors=True)
+    return read_manifest(name, root)
@@ -0,0 +1,68 @@
+"""Tabelas grandes paginadas no servidor.
+
+st.dataframe serializa o DataFrame inteiro para o navegador a cada execução: com o histórico
+completo, são dezenas de MB por reexecução. paged_table filtra, ordena e fatia o resultado (já em
+cache ou na sessão) no servidor e envia só a página visível, então o payload e o tempo de
+renderização ficam limitados pelo tamanho da página, não pelo do resultado. A tabela é um
+st.fragment: trocar de página, filtro ou ordenação reexecuta só a tabela.
+"""
+import math
+
+import pandas as pd
+import streamlit as st
+
+PAGE_SIZES = (25, 50, 100, 250)
+ORIGINAL_ORDER = "(ordem original)"
+
+
+def filter_rows(df, text):
+    """Linhas de df em que alguma coluna de texto contém `text` (sem diferenciar maiúsculas)."""
+    text = (text or '').strip()
+    if not text or df.empty:
+        return df
+    mask = pd.Series(False, index=df.index)
+    for column in df.columns:
+        values = df[column]
+        if pd.api.types.is_object_dtype(values.dtype) or pd.api.types.is_string_dtype(values.dtype) \
+                or isinstance(values.dtype, pd.CategoricalDtype):
+            mask |= values.astype(str).str.contains(text, case=False, regex=False, na=False)
+    return df[mask]
+
+
+def sort_rows(df, column, descending=False):
+    """df ordenado por `column` (estável, vazios no fim); colunas com tipos misturados ordenam como texto."""
+    if column not in df.columns:
+        return df
+    try:
+        return df.sort_values(column, ascending=not descending, kind='stable', na_position='last')
+    except TypeError:
+        return df.sort_values(column, ascending=not descending, kind='stable', na_position='last',
+                              key=lambda values: values.astype(str))
+
+
+@st.fragment
+def paged_table(df, key, page_size=50, hide_index=False):
+    """Tabela de df com filtro, ordenação e paginação feitos no servidor (só a página visível vai ao navegador).
+
+    `key` prefixa as chaves dos controles (precisa ser única na página).
+    """
+    if df.empty:
+        st.dataframe(df, hide_index=hide_index)
+        return
+    col_filter, col_sort, col_desc, col_size = st.columns([3, 2, 1, 1])
+    text = col_filter.text_input("Filtrar", key=f"{key}_filtro", placeholder="Texto em qualquer coluna de texto")
+    column = col_sort.selectbox("Ordenar por", [ORIGINAL_ORDER] + list(df.columns), key=f"{key}_ordenar")
+    descending = col_desc.checkbox("Decrescente", key=f"{key}_decrescente")
+    size = col_size.selectbox("Linhas por página", PAGE_SIZES,
+                              index=PAGE_SIZES.index(page_size) if page_size in PAGE_SIZES else 0, key=f"{key}_tamanho")
+
+    rows = sort_rows(filter_rows(df, text), column, descending)
+    pages = max(1, math.ceil(len(rows) / size))
+    page_key = f"{key}_pagina"
+    if st.session_state.get(page_key, 1) > pages: # O filtro encolheu o resultado: volta para a última página válida
+        st.session_state[page_key] = pages
+    page = st.number_input(f"Página (de {pages})", min_value=1, max_value=pages, step=1, key=page_key)
+    start = (page - 1) * size
+    st.dataframe(rows.iloc[start:start + size], hide_index=hide_index, use_container_width=True)
+    shown = f"Linhas {start + 1}–{min(start + size, len(rows))} de {len(rows)}" if len(rows) else "Nenhuma linha"
+    st.caption(shown + (f" (filtradas de {len(df)})" if len(rows) != len(df) else "") + ".")
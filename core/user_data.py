@@ -0,0 +1,259 @@
+"""Pré-processamento vetorizado da planilha do usuário (páginas de dashboard 9, 10, 11 e 13).
+
+Aceita os formatos usados pelas páginas: colunas de placar separadas ('RESULTADO FT CASA' etc.)
+ou uma coluna combinada ("1-0 2-1" = HT e FT, ou só "2-1" = FT). Tudo é feito por coluna:
+os cabeçalhos são normalizados uma vez, o placar é extraído com str.extract e as datas são
+convertidas em bloco (seriais do Excel direto por aritmética, textos apenas nos valores únicos).
+
+load_user_sheet guarda o resultado pelo hash do conteúdo do arquivo (LRU em memória e, opcionalmente,
+Parquet em disco): o mesmo arquivo carregado em outra página ou sessão não é lido nem processado de novo.
+"""
+import hashlib
+import io
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from core.config import USER_SHEET_CACHE_DIR, USER_SHEET_CACHE_ENTRIES
+
+SCORE_DETECT_PATTERN = re.compile(r'^\d+-\d+.*')
+# Placar combinado "HT FT" (grupos 1-4) ou apenas FT (grupos 1-2)
+SCORE_EXTRACT_PATTERN = re.compile(r'^(\d+)-(\d+)(?:\s+(\d+)-(\d+))?')
+EXCEL_EPOCH = pd.Timestamp('1899-12-30')
+GOAL_COLUMNS = ['GOALS_H_HT', 'GOALS_A_HT', 'GOALS_H_FT', 'GOALS_A_FT']
+
+# Mercados derivados dos gols quando a planilha não traz a coluna pronta: nome -> (coluna, operador)
+MARKET_LIST = {
+    'Mais de 0,5 HT': ('TOTAL_GOALS_HT', '>'), 'Menos de 1,5 HT': ('TOTAL_GOALS_HT', '<'),
+    'Mais de 0,5 ft': ('TOTAL_GOALS_FT', '>'), 'Mais de 1,5': ('TOTAL_GOALS_FT', '>'),
+    'Menos de 1,5': ('TOTAL_GOALS_FT', '<'), 'Mais de 2,5': ('TOTAL_GOALS_FT', '>'),
+    'Menos de 2,5': ('TOTAL_GOALS_FT', '<'), 'Mais de 3,5': ('TOTAL_GOALS_FT', '>'),
+    'Menos de 3,5': ('TOTAL_GOALS_FT', '<'), 'Menos de 4,5': ('TOTAL_GOALS_FT', '<'),
+    'Menos de 6,5': ('TOTAL_GOALS_FT', '<')
+}
+
+
+# Incrementar quando preprocess_user_frame mudar o resultado (invalida os Parquet já gravados)
+USER_SHEET_FORMAT = 1
+
+_sheet_cache = OrderedDict()
+_sheet_cache_lock = threading.Lock()
+
+
+class ScoreColumnNotFound(ValueError):
+    """A planilha não tem colunas de placar reconhecíveis."""
+
+
+class UserSheetReadError(ValueError):
+    """O arquivo enviado não pôde ser lido como planilha."""
+
+
+def _normalize_market_name(name):
+    return name.upper().replace(' ', '').replace(',', '.')
+
+
+def _find_score_column(df):
+    """Primeira coluna com algum valor no formato "N-N..." (testando só os valores únicos)."""
+    for col in df.columns:
+        uniques = pd.Series(df[col].unique())
+        if uniques.astype(str).str.match(SCORE_DETECT_PATTERN).any():
+            return col
+    return None
+
+
+def parse_scores(series):
+    """Extrai (gols casa HT, gols fora HT, gols casa FT, gols fora FT) de uma coluna de placar combinado.
+
+    "1-0 2-1" -> (1, 0, 2, 1); "2-1" -> (0, 0, 2, 1); qualquer outro valor -> zeros.
+    """
+    goals = np.zeros((len(series), 4), dtype=np.int64)
+    if not (pd.api.types.is_object_dtype(series.dtype) or pd.api.types.is_string_dtype(series.dtype)):
+        return goals # Só textos carregam placar (números e datas contam como ausentes)
+    extracted = series.str.extract(SCORE_EXTRACT_PATTERN)
+    numbers = extracted.apply(pd.to_numeric).to_numpy(dtype=np.float64, na_value=np.nan)
+    full = ~np.isnan(numbers[:, 2])
+    ft_only = ~full & ~np.isnan(numbers[:, 0])
+    goals[full] = numbers[full]
+    goals[ft_only, 2:] = numbers[ft_only, :2]
+    return goals
+
+
+def _excel_serial_to_datetime(values):
+    days = np.asarray(values, dtype=np.float64)
+    days = np.where(np.abs(days) < 2_000_000, days, np.nan) # Fora do intervalo representável -> NaT
+    return EXCEL_EPOCH + pd.to_timedelta(days, unit='D')
+
+
+def parse_dates(series):
+    """Converte a coluna de datas: seriais do Excel por aritmética, textos (dia primeiro) por valor único."""
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        return pd.Series(series.to_numpy(), index=series.index)
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        return pd.Series(_excel_serial_to_datetime(series.to_numpy()), index=series.index)
+
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    uniques = pd.Series(np.asarray(uniques, dtype=object))
+    parsed = pd.Series(pd.NaT, index=uniques.index, dtype='datetime64[ns]')
+    is_number = uniques.map(lambda v: isinstance(v, (int, float))).to_numpy(dtype=bool)
+    if is_number.any():
+        parsed[is_number] = _excel_serial_to_datetime(uniques[is_number].astype(np.float64)).to_numpy()
+    if (~is_number).any():
+        parsed[~is_number] = pd.to_datetime(uniques[~is_number], format='mixed', dayfirst=True, errors='coerce').to_numpy()
+    values = np.append(parsed.to_numpy(), np.datetime64('NaT'))[codes] # código -1 (ausente) -> NaT
+    return pd.Series(values, index=series.index)
+
+
+def sim_flags(series):
+    """True onde o texto (sem espaços, em maiúsculas) é 'SIM', avaliando só os valores únicos."""
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    flags = pd.Series(uniques).astype(str).str.upper().str.strip().eq('SIM').to_numpy(dtype=bool)
+    # Ausentes viram 'NAN' no texto, portanto False
+    return pd.Series(np.append(flags, False)[codes], index=series.index)
+
+
+def preprocess_user_frame(df):
+    """Processa a planilha do usuário e devolve um DataFrame novo (a entrada não é alterada).
+
+    Levanta ScoreColumnNotFound se não houver colunas de placar.
+    """
+    df = df.copy(deep=False)
+    df.columns = [str(col).strip().upper() for col in df.columns]
+    df = df.rename(columns={'EQUIPA CASA': 'HOME', 'EQUIPA VISITANTE': 'AWAY'})
+
+    if all(col in df.columns for col in ['RESULTADO FT CASA', 'RESULTADO FT FORA']):
+        df = df.rename(columns={
+            'RESULTADO HT CASA': 'GOALS_H_HT', 'RESULTADO HT FORA': 'GOALS_A_HT',
+            'RESULTADO FT CASA': 'GOALS_H_FT', 'RESULTADO FT FORA': 'GOALS_A_FT'
+        })
+        for col in ['GOALS_H_HT', 'GOALS_A_HT']:
+            if col not in df.columns: df[col] = 0
+    else:
+        score_col_name = _find_score_column(df)
+        if not score_col_name:
+            raise ScoreColumnNotFound("Não foi possível encontrar colunas de placar.")
+        goals = parse_scores(df[score_col_name])
+        for i, col in enumerate(GOAL_COLUMNS):
+            df[col] = goals[:, i]
+
+    for col in ['HOME', 'AWAY', 'LIGA', 'PRIMEIRO GOLO']:
+        if col not in df.columns: df[col] = 'N/A'
+    for col in GOAL_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(int)
+
+    df['DATE'] = parse_dates(df['DATA'])
+    # Ordenação estável: jogos do mesmo dia mantêm a ordem da planilha
+    df = df.sort_values(by='DATE', kind='stable').reset_index(drop=True)
+
+    df['TOTAL_GOALS_FT'] = df['GOALS_H_FT'] + df['GOALS_A_FT']
+    df['TOTAL_GOALS_HT'] = df['GOALS_H_HT'] + df['GOALS_A_HT']
+    df['GOALS_2T'] = df['TOTAL_GOALS_FT'] - df['TOTAL_GOALS_HT']
+
+    if 'CASA' not in df.columns: df['CASA'] = df['GOALS_H_FT'] > df['GOALS_A_FT']
+    else: df['CASA'] = sim_flags(df['CASA'])
+    if 'EMPATE' not in df.columns: df['EMPATE'] = df['GOALS_H_FT'] == df['GOALS_A_FT']
+    else: df['EMPATE'] = sim_flags(df['EMPATE'])
+    if 'VISITANTE' not in df.columns: df['VISITANTE'] = df['GOALS_H_FT'] < df['GOALS_A_FT']
+    else: df['VISITANTE'] = sim_flags(df['VISITANTE'])
+
+    if 'CASA_VENCE_HT' not in df.columns: df['CASA_VENCE_HT'] = df['GOALS_H_HT'] > df['GOALS_A_HT']
+    if 'VISITANTE_VENCE_HT' not in df.columns: df['VISITANTE_VENCE_HT'] = df['GOALS_H_HT'] < df['GOALS_A_HT']
+
+    # Cabeçalhos normalizados uma única vez para localizar mercados já presentes na planilha
+    existing_markets = {}
+    for col in df.columns:
+        existing_markets.setdefault(_normalize_market_name(col), col)
+    for market, (col, op) in MARKET_LIST.items():
+        market_val = float(market.split(' ')[2].replace(',', '.'))
+        existing_col_name = existing_markets.get(_normalize_market_name(market))
+        if not existing_col_name:
+            df[market] = df[col] > market_val if op == '>' else df[col] < market_val
+        else:
+            df[market] = sim_flags(df[existing_col_name])
+
+    if 'CASA_ABRIU_2x0_HT' not in df.columns: df['CASA_ABRIU_2x0_HT'] = (df['GOALS_H_HT'] == 2) & (df['GOALS_A_HT'] == 0)
+    if 'FORA_ABRIU_0x2_HT' not in df.columns: df['FORA_ABRIU_0x2_HT'] = (df['GOALS_H_HT'] == 0) & (df['GOALS_A_HT'] == 2)
+    return df
+
+
+# --- Cache da planilha processada ---
+
+def sheet_digest(data):
+    """Hash do conteúdo do arquivo (chave do cache, independente do nome do arquivo)."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def read_user_sheet(data, filename):
+    """Lê o arquivo enviado (.xlsx com openpyxl, .xls com xlrd). Levanta UserSheetReadError."""
+    engine = 'openpyxl' if filename.endswith('xlsx') else 'xlrd'
+    try:
+        return pd.read_excel(io.BytesIO(data), engine=engine)
+    except Exception as e:
+        raise UserSheetReadError(str(e)) from e
+
+
+def _parquet_path(digest):
+    return os.path.join(USER_SHEET_CACHE_DIR, f"{digest}-v{USER_SHEET_FORMAT}.parquet")
+
+
+def _read_parquet(digest):
+    if not USER_SHEET_CACHE_DIR:
+        return None
+    path = _parquet_path(digest)
+    if not os.path.exists(path):
+        return None
+    try:
+        return pd.read_parquet(path)
+    except Exception: # Arquivo corrompido ou sem engine Parquet: processa de novo
+        return None
+
+
+def _write_parquet(digest, df):
+    """Grava o Parquet (melhor esforço: colunas com tipos mistos ou falta de pyarrow apenas pulam o disco)."""
+    if not USER_SHEET_CACHE_DIR:
+        return
+    try:
+        os.makedirs(USER_SHEET_CACHE_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=USER_SHEET_CACHE_DIR, suffix='.tmp')
+        os.close(fd)
+        try:
+            df.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, _parquet_path(digest))
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    except Exception:
+        pass
+
+
+def _remember(digest, df):
+    with _sheet_cache_lock:
+        _sheet_cache[digest] = df
+        _sheet_cache.move_to_end(digest)
+        while len(_sheet_cache) > max(USER_SHEET_CACHE_ENTRIES, 1):
+            _sheet_cache.popitem(last=False)
+
+
+def load_user_sheet(data, filename):
+    """Planilha do usuário já processada, a partir dos bytes do arquivo enviado.
+
+    O DataFrame devolvido é compartilhado entre páginas e sessões e não deve ser alterado.
+    Levanta UserSheetReadError (leitura) ou ScoreColumnNotFound (sem colunas de placar).
+    """
+    digest = sheet_digest(data)
+    with _sheet_cache_lock:
+        df = _sheet_cache.get(digest)
+        if df is not None:
+            _sheet_cache.move_to_end(digest)
+            return df
+    df = _read_parquet(digest)
+    if df is None:
+        df = preprocess_user_frame(read_user_sheet(data, filename))
+        _write_parquet(digest, df)
+    df.attrs['sheet_digest'] = digest # Chave dos resumos derivados (core.dashboard)
+    _remember(digest, df)
+    return df
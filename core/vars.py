@@ -0,0 +1,132 @@
+"""Matriz das 77 VARs (razões, dispersões e ângulos entre probabilidades implícitas), calculada em bloco.
+
+As páginas de backtest usam o mesmo conjunto de VARs; só muda o mapeamento das colunas de odds
+de cada base (Bet365 ou Betfair) para as probabilidades pH, pD, pA, pOver, pUnder, pBTTS_Y,
+pBTTS_N, pCS_0x0, pCS_0x1 e pCS_1x0. Aqui elas são calculadas como uma matriz float64 (linhas x 77),
+linha a linha independentes, o que permite estender a matriz apenas com os jogos novos.
+"""
+import numpy as np
+import pandas as pd
+
+PROB_NAMES = ('pH', 'pD', 'pA', 'pOver', 'pUnder', 'pBTTS_Y', 'pBTTS_N', 'pCS_0x0', 'pCS_0x1', 'pCS_1x0')
+
+# Mapeamentos coluna de odds -> probabilidade, idênticos aos prob_name_map das páginas
+BET365_ODDS_MAP = {
+    'Odd_H_FT': 'pH', 'Odd_D_FT': 'pD', 'Odd_A_FT': 'pA',
+    'Odd_Over25_FT': 'pOver', 'Odd_Under25_FT': 'pUnder',
+    'Odd_BTTS_Yes': 'pBTTS_Y', 'Odd_BTTS_No': 'pBTTS_N',
+    'Odd_12': 'pCS_0x0', 'Odd_X2': 'pCS_0x1', 'Odd_1X': 'pCS_1x0'
+}
+BETFAIR_ODDS_MAP = {
+    'Odd_H_Back': 'pH', 'Odd_D_Back': 'pD', 'Odd_A_Back': 'pA',
+    'Odd_Over25_FT_Back': 'pOver', 'Odd_Under25_FT_Back': 'pUnder',
+    'Odd_BTTS_Yes_Back': 'pBTTS_Y', 'Odd_BTTS_No_Back': 'pBTTS_N',
+    'Odd_CS_0x0_Lay': 'pCS_0x0', 'Odd_CS_0x1_Lay': 'pCS_0x1', 'Odd_CS_1x0_Lay': 'pCS_1x0'
+}
+
+# Mapeamentos por base, pela chave usada nos arrays derivados ('vars_<chave>')
+ODDS_MAPS = {'bet365': BET365_ODDS_MAP, 'betfair': BETFAIR_ODDS_MAP}
+
+VAR_NAMES = tuple(f"VAR{i:02d}" for i in range(1, 78))
+
+# VAR01..VAR49: razões simples (numerador, denominador)
+_RATIOS = (
+    ('pH', 'pD'), ('pH', 'pA'), ('pD', 'pH'), ('pD', 'pA'), ('pA', 'pH'), ('pA', 'pD'),
+    ('pOver', 'pUnder'), ('pUnder', 'pOver'), ('pBTTS_Y', 'pBTTS_N'), ('pBTTS_N', 'pBTTS_Y'),
+    ('pH', 'pOver'), ('pD', 'pOver'), ('pA', 'pOver'), ('pH', 'pUnder'), ('pD', 'pUnder'), ('pA', 'pUnder'),
+    ('pH', 'pBTTS_Y'), ('pD', 'pBTTS_Y'), ('pA', 'pBTTS_Y'), ('pH', 'pBTTS_N'), ('pD', 'pBTTS_N'), ('pA', 'pBTTS_N'),
+    ('pCS_0x0', 'pH'), ('pCS_0x0', 'pD'), ('pCS_0x0', 'pA'), ('pCS_0x0', 'pOver'), ('pCS_0x0', 'pUnder'),
+    ('pCS_0x0', 'pBTTS_Y'), ('pCS_0x0', 'pBTTS_N'),
+    ('pCS_0x1', 'pH'), ('pCS_0x1', 'pD'), ('pCS_0x1', 'pA'), ('pCS_0x1', 'pOver'), ('pCS_0x1', 'pUnder'),
+    ('pCS_0x1', 'pBTTS_Y'), ('pCS_0x1', 'pBTTS_N'),
+    ('pCS_1x0', 'pH'), ('pCS_1x0', 'pD'), ('pCS_1x0', 'pA'), ('pCS_1x0', 'pOver'), ('pCS_1x0', 'pUnder'),
+    ('pCS_1x0', 'pBTTS_Y'), ('pCS_1x0', 'pBTTS_N'),
+    ('pCS_0x0', 'pCS_0x1'), ('pCS_0x0', 'pCS_1x0'), ('pCS_0x1', 'pCS_0x0'),
+    ('pCS_0x1', 'pCS_1x0'), ('pCS_1x0', 'pCS_0x0'), ('pCS_1x0', 'pCS_0x1'),
+)
+# VAR50..VAR53: desvio padrão / média de grupos de probabilidades
+_DISPERSIONS = (
+    ('pH', 'pD', 'pA'), ('pOver', 'pUnder'), ('pBTTS_Y', 'pBTTS_N'), ('pCS_0x0', 'pCS_0x1', 'pCS_1x0'),
+)
+# VAR54..VAR61: diferenças absolutas
+_ABS_DIFFS = (
+    ('pH', 'pA'), ('pH', 'pD'), ('pD', 'pA'), ('pOver', 'pUnder'), ('pBTTS_Y', 'pBTTS_N'),
+    ('pCS_0x0', 'pCS_0x1'), ('pCS_0x0', 'pCS_1x0'), ('pCS_0x1', 'pCS_1x0'),
+)
+# VAR62..VAR69: ângulo (graus) de arctan((a - b) / 2)
+_ANGLES = (
+    ('pA', 'pH'), ('pD', 'pH'), ('pA', 'pD'), ('pUnder', 'pOver'), ('pBTTS_N', 'pBTTS_Y'),
+    ('pCS_0x1', 'pCS_0x0'), ('pCS_1x0', 'pCS_0x0'), ('pCS_1x0', 'pCS_0x1'),
+)
+# VAR70..VAR77: diferença absoluta normalizada |a - b| / c
+_NORMALIZED = (
+    ('pH', 'pA', 'pA'), ('pH', 'pD', 'pD'), ('pD', 'pA', 'pA'), ('pOver', 'pUnder', 'pUnder'),
+    ('pBTTS_Y', 'pBTTS_N', 'pBTTS_N'), ('pCS_0x0', 'pCS_0x1', 'pCS_0x1'),
+    ('pCS_0x0', 'pCS_1x0', 'pCS_1x0'), ('pCS_0x1', 'pCS_1x0', 'pCS_1x0'),
+)
+
+
+def available_odds_maps(columns):
+    """Chaves de ODDS_MAPS cujas colunas de odds estão todas presentes."""
+    columns = set(columns)
+    return [key for key, odds_map in ODDS_MAPS.items() if set(odds_map).issubset(columns)]
+
+
+def _clean_odds(values):
+    """Odds inválidas (NaN, Inf, <= 0 ou não numéricas) viram 1e12, como nas páginas."""
+    odds = pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    odds = odds.copy()
+    odds[~np.isfinite(odds) | (odds <= 0)] = 1e12
+    return odds
+
+
+def compute_probabilities(df, odds_map):
+    """Dicionário {pH, pD, ...: array float64} com as probabilidades implícitas (1 / odd)."""
+    probs = {}
+    for col, prob_name in odds_map.items():
+        odds = _clean_odds(df[col])
+        odds[odds == 0] = 1e-12
+        probs[prob_name] = 1 / odds
+    return probs
+
+
+def compute_var_matrix(df, odds_map):
+    """Calcula a matriz (linhas x 77) float64 das VARs, na ordem de VAR_NAMES.
+
+    Reproduz pre_calculate_all_vars das páginas (inclusive Inf/NaN finais trocados por 0).
+    Levanta KeyError se alguma coluna de odds do mapeamento estiver ausente.
+    """
+    missing = [col for col in odds_map if col not in df.columns]
+    if missing:
+        raise KeyError(f"Colunas de odds ausentes: {', '.join(missing)}")
+    p = compute_probabilities(df, odds_map)
+    matrix = np.empty((len(df), len(VAR_NAMES)), dtype=np.float64, order='F') # Colunas contíguas
+    col = 0
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        for num, den in _RATIOS:
+            matrix[:, col] = p[num] / p[den]
+            col += 1
+        for group in _DISPERSIONS:
+            stacked = np.column_stack([p[name] for name in group])
+            mean = stacked.mean(axis=1)
+            mean[mean == 0] = 1e-12
+            matrix[:, col] = stacked.std(axis=1, ddof=1) / mean
+            col += 1
+        for a, b in _ABS_DIFFS:
+            matrix[:, col] = np.abs(p[a] - p[b])
+            col += 1
+        for a, b in _ANGLES:
+            matrix[:, col] = np.arctan((p[a] - p[b]) / 2) * 180 / np.pi
+            col += 1
+        for a, b, c in _NORMALIZED:
+            den = p[c].copy()
+            den[den == 0] = 1e-12
+            matrix[:, col] = np.abs(p[a] - p[b]) / den
+            col += 1
+    matrix[~np.isfinite(matrix)] = 0
+    return matrix
+
+
+def var_dict_from_matrix(matrix, index):
+    """Converte a matriz (ou um recorte dela) no dicionário {VARxx: Series} usado pelas estratégias (vistas das colunas, sem cópia)."""
+    return {name: pd.Series(matrix[:, j], index=index, copy=False) for j, name in enumerate(VAR_NAMES)}
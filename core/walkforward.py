@@ -0,0 +1,210 @@
+"""Validação walk-forward das combinações (estratégia VAR x mercado Lay).
+
+A aprovação das páginas (check_combined_moving_averages) olha as médias dos últimos jogos do mesmo
+histórico que definiu as faixas de VAR. Aqui o histórico é percorrido em ordem de data, em janelas
+treino/teste sucessivas: a regra de aprovação é aplicada só ao treino e a taxa de acerto e o lucro
+realizados são medidos no bloco seguinte.
+
+Cada filtro VAR é avaliado uma única vez no histórico inteiro. Para cada estratégia guardam-se as
+posições (cronológicas) dos jogos selecionados e as somas acumuladas de acertos por mercado; os
+limites de cada fold viram searchsorted nessas posições, e as médias de "últimos N jogos" e o
+resultado do teste são diferenças de somas acumuladas para todos os folds e mercados de uma vez.
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from core.data import history_outcome_matrix
+from core.outcomes import compute_outcome_matrix, detect_goal_columns, outcome_index
+from core.periods import build_date_index
+from core.session import frame_key, session_result
+
+# Janelas de "últimos jogos" da regra de aprovação das páginas (Média 8 / Média 40)
+DEFAULT_WINDOWS = (80, 170)
+
+
+def strategy_positions(df, strategy_list):
+    """{nome: posições em `df` dos jogos selecionados}, aplicando cada filtro VAR uma única vez.
+
+    Filtros que falham são ignorados (as páginas já reportam o erro no backtest completo).
+    """
+    positions = {}
+    for strategy_func, strategy_name in strategy_list:
+        try:
+            selected = strategy_func(df)
+        except Exception:
+            continue
+        positions[strategy_name] = df.index.get_indexer(selected.index)
+    return positions
+
+
+def lay_hits(df, markets):
+    """Matriz booleana (linhas x mercados): True quando o Lay do mercado venceu (o evento não ocorreu)."""
+    matrix = history_outcome_matrix(df)
+    if matrix is None:
+        goal_cols = detect_goal_columns(df.columns)
+        if goal_cols is None:
+            raise KeyError("Colunas de gols ausentes para calcular os resultados dos mercados")
+        matrix = compute_outcome_matrix(df[goal_cols[0]], df[goal_cols[1]])
+    return ~matrix[:, [outcome_index(market) for market in markets]]
+
+
+def walk_forward_folds(n_rows, n_folds, train_rows=None, test_rows=None):
+    """Array (folds x 3) com [início do treino, início do teste, fim do teste) em posições cronológicas.
+
+    Os blocos de teste são consecutivos e terminam no último jogo; por padrão cada um tem
+    n_rows // (n_folds + 1) jogos, de modo que o primeiro fold ainda tem um bloco de treino.
+    `train_rows` fixa o tamanho da janela de treino (None = todo o histórico anterior ao teste).
+    """
+    if n_folds < 1:
+        raise ValueError("n_folds deve ser pelo menos 1")
+    test_rows = test_rows or n_rows // (n_folds + 1)
+    if test_rows < 1 or test_rows * n_folds >= n_rows:
+        raise ValueError("Histórico curto demais para o número de folds pedido")
+    test_start = n_rows - test_rows * np.arange(n_folds, 0, -1)
+    train_start = np.zeros(n_folds, dtype=np.int64) if train_rows is None else np.maximum(test_start - train_rows, 0)
+    return np.column_stack([train_start, test_start, test_start + test_rows])
+
+
+def _passes(rate, threshold, inclusive):
+    return rate >= threshold if inclusive else rate > threshold
+
+
+def run_walk_forward(chrono_positions, hits, folds, markets, threshold, inclusive=False,
+                     windows=DEFAULT_WINDOWS, profit_win=0.10, profit_loss=-1.0):
+    """Aprovação no treino e resultado no teste de todas as combinações em todos os folds.
+
+    `chrono_positions`: {estratégia: posições cronológicas crescentes dos jogos selecionados};
+    `hits`: matriz (jogos em ordem cronológica x mercados) de acertos do Lay.
+    Retorna um DataFrame com uma linha por (fold, combinação aprovada no treino).
+    """
+    train_start, test_start, test_end = folds[:, 0], folds[:, 1], folds[:, 2]
+    parts = []
+    for strategy_name, positions in chrono_positions.items():
+        if not len(positions):
+            continue
+        cum_hits = np.zeros((len(positions) + 1, hits.shape[1]), dtype=np.int32)
+        np.cumsum(hits[positions], axis=0, out=cum_hits[1:])
+        j_train = np.searchsorted(positions, train_start)
+        j_test = np.searchsorted(positions, test_start)
+        j_end = np.searchsorted(positions, test_end)
+        n_train = j_test - j_train
+
+        approved = np.broadcast_to((n_train > 0)[:, None], (len(folds), hits.shape[1])).copy()
+        rates = []
+        for window in windows:
+            n_window = np.minimum(n_train, window)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                rate = (cum_hits[j_test] - cum_hits[j_test - n_window]) / n_window[:, None]
+            approved &= _passes(rate, threshold, inclusive)
+            rates.append(rate)
+        fold_idx, market_idx = np.nonzero(approved)
+        if not len(fold_idx):
+            continue
+
+        n_test = (j_end - j_test)[fold_idx]
+        test_hits = (cum_hits[j_end] - cum_hits[j_test])[fold_idx, market_idx]
+        part = {
+            'Fold': fold_idx + 1,
+            'Estratégia': [f"VAR_{strategy_name}_CS_{markets[m]}" for m in market_idx],
+            'Jogos Treino': n_train[fold_idx],
+        }
+        for window, rate in zip(windows, rates):
+            part[f"Média Treino {window}"] = rate[fold_idx, market_idx]
+        part.update({
+            'Jogos Teste': n_test,
+            'Acertos Teste': test_hits,
+            'Lucro Teste': test_hits * profit_win + (n_test - test_hits) * profit_loss,
+        })
+        parts.append(pd.DataFrame(part))
+
+    columns = ['Fold', 'Estratégia', 'Jogos Treino'] + [f"Média Treino {w}" for w in windows]
+    columns += ['Jogos Teste', 'Acertos Teste', 'Lucro Teste']
+    if not parts:
+        return pd.DataFrame(columns=columns)
+    result = pd.concat(parts, ignore_index=True)[columns]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result['Taxa Teste'] = result['Acertos Teste'] / result['Jogos Teste'].replace(0, np.nan)
+    return result.sort_values(['Fold', 'Estratégia'], kind='stable').reset_index(drop=True)
+
+
+def walk_forward(df, strategy_list, markets, n_folds, threshold, inclusive=False, train_rows=None,
+                 windows=DEFAULT_WINDOWS, profit_win=0.10, profit_loss=-1.0):
+    """Walk-forward de um histórico de página (df com 'Date' e os filtros VAR de define_var_strategies).
+
+    Retorna (detalhe por fold e combinação aprovada, resumo por fold).
+    Jogos sem data válida ficam fora dos folds.
+    """
+    date_index = build_date_index(df['Date'])
+    order = date_index['order']
+    rank = np.full(len(df), -1, dtype=np.int64)
+    rank[order] = np.arange(len(order))
+
+    chrono_positions = {}
+    for strategy_name, positions in strategy_positions(df, strategy_list).items():
+        ranks = rank[positions[positions >= 0]]
+        chrono_positions[strategy_name] = np.sort(ranks[ranks >= 0])
+
+    hits = lay_hits(df, markets)[order]
+    folds = walk_forward_folds(len(order), n_folds, train_rows)
+    detail = run_walk_forward(chrono_positions, hits, folds, markets, threshold, inclusive,
+                              windows, profit_win, profit_loss)
+
+    dates = date_index['sorted'].view('datetime64[ns]')
+    summary = pd.DataFrame({
+        'Fold': np.arange(1, len(folds) + 1),
+        'Início Treino': dates[folds[:, 0]],
+        'Início Teste': dates[folds[:, 1]],
+        'Fim Teste': dates[folds[:, 2] - 1],
+    })
+    totals = detail.groupby('Fold').agg(Aprovadas=('Estratégia', 'size'), Apostas=('Jogos Teste', 'sum'),
+                                        Acertos=('Acertos Teste', 'sum'), Lucro=('Lucro Teste', 'sum'))
+    summary = summary.join(totals, on='Fold')
+    summary[['Aprovadas', 'Apostas', 'Acertos']] = summary[['Aprovadas', 'Apostas', 'Acertos']].fillna(0).astype(int)
+    summary['Lucro'] = summary['Lucro'].fillna(0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        summary['Taxa de Acerto'] = summary['Acertos'] / summary['Apostas'].replace(0, np.nan)
+    return detail, summary
+
+
+# --- Painel das páginas ---
+
+@st.fragment
+def walk_forward_panel(df, strategy_list, markets, threshold, inclusive=False, windows=DEFAULT_WINDOWS, key='walk_forward'):
+    """Expander com a validação walk-forward (mesma regra de aprovação da página, só sobre o treino).
+
+    É um fragmento: os widgets e o botão reexecutam só este painel, e o último resultado fica na
+    sessão (continua visível quando outra parte da página é usada).
+    """
+    with st.expander("🧪 Validação Walk-Forward (aprovação no treino, resultado no teste seguinte)"):
+        if 'Date' not in df.columns:
+            st.info("A base histórica não tem a coluna 'Date'; walk-forward indisponível.")
+            return
+        col1, col2 = st.columns(2)
+        n_folds = col1.slider("Número de folds", 2, 48, 24, key=f"{key}_folds")
+        train_label = col2.selectbox("Janela de treino", ["Todo o histórico anterior", "Últimos 5.000 jogos",
+                                                           "Últimos 20.000 jogos"], key=f"{key}_treino")
+        train_rows = {"Últimos 5.000 jogos": 5000, "Últimos 20.000 jogos": 20000}.get(train_label)
+        params = (frame_key(df), n_folds, train_rows, threshold, inclusive, tuple(windows))
+        if st.button("Executar walk-forward", key=f"{key}_executar"):
+            with st.spinner("Executando walk-forward..."):
+                try:
+                    session_result(f"{key}_resultado", params,
+                                   lambda: walk_forward(df, strategy_list, markets, n_folds, threshold, inclusive,
+                                                        train_rows, windows))
+                except (KeyError, ValueError) as e:
+                    st.error(f"Não foi possível executar o walk-forward: {e}")
+                    return
+        result = session_result(f"{key}_resultado", params)
+        if result is None:
+            return
+        detail, summary = result
+        total_bets = summary['Apostas'].sum()
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Aprovações (soma dos folds)", int(summary['Aprovadas'].sum()))
+        c2.metric("Taxa de acerto realizada", f"{summary['Acertos'].sum() / total_bets:.2%}" if total_bets else "N/A")
+        c3.metric("Lucro realizado", f"{summary['Lucro'].sum():.2f}")
+        st.subheader("Resumo por fold")
+        st.dataframe(summary.set_index('Fold'))
+        st.subheader("Combinações aprovadas no treino e resultado no teste")
+        st.dataframe(detail)
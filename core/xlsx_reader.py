@@ -0,0 +1,169 @@
+"""Leitura em streaming de planilhas XLSX grandes, em blocos de linhas e colunas tipadas.
+
+Em vez de carregar a pasta de trabalho inteira como objetos de célula (pd.read_excel + openpyxl),
+a planilha é percorrida linha a linha em modo somente leitura; cada bloco é convertido para
+buffers por coluna (float64 quando só há números, object caso contrário) e descartado em seguida.
+Textos com cara de número continuam textos (o tipo não depende de qual valor aparece primeiro no
+bloco); só as colunas que o chamador declara numéricas (numeric_columns) são convertidas, com o
+que não for número virando NaN.
+Se python-calamine estiver instalado, ele é usado como leitor (bem mais rápido que openpyxl).
+"""
+import datetime
+
+import numpy as np
+import pandas as pd
+
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError: # Dependência opcional
+    CalamineWorkbook = None
+
+DEFAULT_CHUNK_ROWS = 50_000
+_NUMBER_TYPES = frozenset([int, float, np.float64, np.float32, np.int64, np.int32, type(None)])
+
+
+def _calamine_sheet(path, sheet_index):
+    """Planilha aberta pelo calamine, ou None sem ele (ou numa versão antiga, sem iter_rows)."""
+    if CalamineWorkbook is None or not hasattr(CalamineWorkbook, 'from_path'):
+        return None
+    sheet = CalamineWorkbook.from_path(path).get_sheet_by_index(sheet_index)
+    return sheet if hasattr(sheet, 'iter_rows') else None
+
+
+def _iter_rows_calamine(sheet):
+    for row in sheet.iter_rows():
+        # calamine representa células vazias como ''
+        yield tuple(None if value == '' else value for value in row)
+
+
+def _iter_rows_openpyxl(path, sheet_index):
+    from openpyxl import load_workbook
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[sheet_index]
+        yield from sheet.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def iter_xlsx_rows(path, sheet_index=0):
+    """Itera as linhas (tuplas de valores) da planilha usando o leitor mais rápido disponível.
+
+    O leitor é escolhido antes da primeira linha: uma falha no meio da leitura sobe para o chamador
+    (recomeçar com o openpyxl repetiria as linhas já entregues).
+    """
+    sheet = _calamine_sheet(path, sheet_index)
+    if sheet is not None:
+        yield from _iter_rows_calamine(sheet)
+    else:
+        yield from _iter_rows_openpyxl(path, sheet_index)
+
+
+def _header_names(header_row):
+    """Nomes das colunas no mesmo formato do pandas (vazias viram 'Unnamed: i', repetidas ganham sufixo)."""
+    names, seen = [], {}
+    for i, value in enumerate(header_row):
+        name = f"Unnamed: {i}" if value is None else str(value) if not isinstance(value, str) else value
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def _to_column_buffer(values, numeric=False):
+    """Converte os valores de uma coluna (em um bloco) para float64 quando são todos números, senão object.
+
+    Com numeric=True (coluna declarada numérica pelo chamador), textos numéricos são convertidos e
+    os demais viram NaN.
+    """
+    types = set(map(type, values))
+    if types <= {type(None)}: # Bloco todo vazio: NaN numérico, compatível com qualquer outro bloco
+        return np.full(len(values), np.nan)
+    if types <= _NUMBER_TYPES:
+        return np.array(values, dtype=np.float64)
+    if numeric:
+        return pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').to_numpy(dtype=np.float64)
+    buffer = np.empty(len(values), dtype=object)
+    buffer[:] = values
+    return buffer
+
+
+def _finalize_column(buffer):
+    """Ajusta o dtype final: inteiros sem lacunas viram int64 (como no pd.read_excel) e objetos são inferidos."""
+    if buffer.dtype == np.float64:
+        if len(buffer) and np.isfinite(buffer).all() and (buffer == np.floor(buffer)).all():
+            return pd.Series(buffer.astype(np.int64))
+        return pd.Series(buffer)
+    series = pd.Series(buffer, dtype=object)
+    first = next((v for v in buffer if v is not None and v == v), None)
+    if isinstance(first, datetime.date): # calamine devolve datetime.date para datas à meia-noite
+        try:
+            return pd.to_datetime(series)
+        except (TypeError, ValueError):
+            pass
+    return series.infer_objects()
+
+
+def iter_xlsx_chunks(path, chunk_rows=DEFAULT_CHUNK_ROWS, sheet_index=0, raw=False, numeric_columns=()):
+    """Gera blocos da planilha (a primeira linha é o cabeçalho).
+
+    As colunas em `numeric_columns` saem sempre numéricas (textos que não forem números viram NaN).
+
+    Com raw=False cada bloco é um DataFrame; com raw=True é um dicionário {coluna: buffer numpy}
+    ainda não finalizado, usado por read_xlsx_streaming para montar as colunas sem cópias extras.
+    Linhas totalmente vazias são ignoradas, como no pd.read_excel.
+    """
+    rows_iter = iter_xlsx_rows(path, sheet_index)
+    header = next(rows_iter, None)
+    if header is None:
+        return
+    columns = _header_names(header)
+    n_cols = len(columns)
+    pending = []
+
+    def flush():
+        buffers = {}
+        for name, values in zip(columns, zip(*pending)):
+            buffers[name] = _to_column_buffer(list(values), name in numeric_columns)
+        pending.clear()
+        if raw:
+            return buffers
+        return pd.DataFrame({name: _finalize_column(buf) for name, buf in buffers.items()})
+
+    for row in rows_iter:
+        if len(row) != n_cols:
+            row = tuple(row[:n_cols]) + (None,) * (n_cols - len(row))
+        if all(value is None for value in row):
+            continue
+        pending.append(row)
+        if len(pending) >= chunk_rows:
+            yield flush()
+    if pending:
+        yield flush()
+
+
+def read_xlsx_streaming(path, chunk_rows=DEFAULT_CHUNK_ROWS, sheet_index=0, numeric_columns=()):
+    """Lê a planilha inteira em streaming e devolve um DataFrame equivalente ao pd.read_excel.
+
+    Os blocos de cada coluna são concatenados coluna a coluna e liberados em seguida,
+    de modo que o pico de memória fica próximo do tamanho final do DataFrame.
+    """
+    column_chunks = None
+    for buffers in iter_xlsx_chunks(path, chunk_rows, sheet_index, raw=True, numeric_columns=numeric_columns):
+        if column_chunks is None:
+            column_chunks = {name: [] for name in buffers}
+        for name, buffer in buffers.items():
+            column_chunks[name].append(buffer)
+    if column_chunks is None:
+        return pd.DataFrame()
+
+    data = {}
+    for name in list(column_chunks):
+        chunks = column_chunks.pop(name)
+        buffer = chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+        del chunks
+        data[name] = _finalize_column(buffer)
+    return pd.DataFrame(data)
@@ -1,134 +1,38 @@
 import streamlit as st
 import pandas as pd
-import io
-import re
-import numpy as np
+
+from core.dashboard import (correct_score_table, cube_csv, cube_months, league_cube, league_game_counts, league_games,
+                            league_rates, league_scenarios, summary_from_cube)
+from core.user_data import ScoreColumnNotFound, UserSheetReadError, load_user_sheet
 
 # --- Configuração da Página ---
 st.set_page_config(layout="wide", page_title="Dashboard de Análise de Apostas")
 
 # --- Funções de Processamento de Dados (sem alterações) ---
 
-@st.cache_data
-def preprocess_user_data(df):
+def load_user_data(uploaded_file):
     """
-    Processa a planilha do usuário, adaptando-se de forma inteligente a diferentes formatos de dados.
+    Lê e processa a planilha do usuário, adaptando-se de forma inteligente a diferentes formatos de dados.
+    O resultado fica em cache pelo conteúdo do arquivo e é compartilhado com as outras páginas de dashboard.
     """
     try:
-        df.columns = [str(col).strip().upper() for col in df.columns]
-        df = df.rename(columns={'EQUIPA CASA': 'HOME', 'EQUIPA VISITANTE': 'AWAY'})
-
-        if all(col in df.columns for col in ['RESULTADO FT CASA', 'RESULTADO FT FORA']):
-            df = df.rename(columns={
-                'RESULTADO HT CASA': 'GOALS_H_HT', 'RESULTADO HT FORA': 'GOALS_A_HT',
-                'RESULTADO FT CASA': 'GOALS_H_FT', 'RESULTADO FT FORA': 'GOALS_A_FT'
-            })
-            for col in ['GOALS_H_HT', 'GOALS_A_HT']:
-                if col not in df.columns: df[col] = 0
-        else:
-            score_col_name = next((col for col in df.columns if df[col].astype(str).str.match(r'^\d+-\d+.*').any()), None)
-            if not score_col_name:
-                st.error("Não foi possível encontrar colunas de placar.")
-                return pd.DataFrame()
-            def parse_combined_score(score_str):
-                if not isinstance(score_str, str): return [0, 0, 0, 0]
-                match = re.match(r'(\d+)-(\d+)\s+(\d+)-(\d+)', score_str)
-                if match: return [int(g) for g in match.groups()]
-                match_ft_only = re.match(r'(\d+)-(\d+)', score_str)
-                if match_ft_only: return [0, 0, int(match_ft_only.group(1)), int(match_ft_only.group(2))]
-                return [0, 0, 0, 0]
-            scores = df[score_col_name].apply(parse_combined_score)
-            df[['GOALS_H_HT', 'GOALS_A_HT', 'GOALS_H_FT', 'GOALS_A_FT']] = pd.DataFrame(scores.tolist(), index=df.index)
-
-        for col in ['HOME', 'AWAY', 'LIGA']:
-            if col not in df.columns: df[col] = 'N/A'
-        for col in ['GOALS_H_HT', 'GOALS_A_HT', 'GOALS_H_FT', 'GOALS_A_FT']:
-            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(int)
-
-        def robust_date_parser(date_val):
-            if isinstance(date_val, (int, float)):
-                try: return pd.to_datetime('1899-12-30') + pd.to_timedelta(date_val, 'D')
-                except: return pd.NaT
-            try: return pd.to_datetime(date_val, dayfirst=True, errors='coerce')
-            except: return pd.NaT
-        df['DATE'] = df['DATA'].apply(robust_date_parser).dropna()
-        df = df.sort_values(by='DATE').reset_index(drop=True)
-
-        df['TOTAL_GOALS_FT'] = df['GOALS_H_FT'] + df['GOALS_A_FT']
-        df['TOTAL_GOALS_HT'] = df['GOALS_H_HT'] + df['GOALS_A_HT']
-        df['GOALS_2T'] = df['TOTAL_GOALS_FT'] - df['TOTAL_GOALS_HT']
-        
-        def convert_to_bool(series):
-            return series.astype(str).str.upper().str.strip() == 'SIM'
-
-        if 'CASA' not in df.columns: df['CASA'] = df['GOALS_H_FT'] > df['GOALS_A_FT']
-        else: df['CASA'] = convert_to_bool(df['CASA'])
-        if 'EMPATE' not in df.columns: df['EMPATE'] = df['GOALS_H_FT'] == df['GOALS_A_FT']
-        else: df['EMPATE'] = convert_to_bool(df['EMPATE'])
-        if 'VISITANTE' not in df.columns: df['VISITANTE'] = df['GOALS_H_FT'] < df['GOALS_A_FT']
-        else: df['VISITANTE'] = convert_to_bool(df['VISITANTE'])
-
-        if 'CASA_VENCE_HT' not in df.columns: df['CASA_VENCE_HT'] = df['GOALS_H_HT'] > df['GOALS_A_HT']
-        if 'VISITANTE_VENCE_HT' not in df.columns: df['VISITANTE_VENCE_HT'] = df['GOALS_H_HT'] < df['GOALS_A_HT']
-        
-        market_list = {
-            'Mais de 0,5 HT': ('TOTAL_GOALS_HT', '>'), 'Menos de 1,5 HT': ('TOTAL_GOALS_HT', '<'),
-            'Mais de 0,5 ft': ('TOTAL_GOALS_FT', '>'), 'Mais de 1,5': ('TOTAL_GOALS_FT', '>'),
-            'Menos de 1,5': ('TOTAL_GOALS_FT', '<'), 'Mais de 2,5': ('TOTAL_GOALS_FT', '>'),
-            'Menos de 2,5': ('TOTAL_GOALS_FT', '<'), 'Mais de 3,5': ('TOTAL_GOALS_FT', '>'),
-            'Menos de 3,5': ('TOTAL_GOALS_FT', '<'), 'Menos de 4,5': ('TOTAL_GOALS_FT', '<'),
-            'Menos de 6,5': ('TOTAL_GOALS_FT', '<')
-        }
-        for market, (col, op) in market_list.items():
-            market_val = float(market.split(' ')[2].replace(',', '.'))
-            norm_market_name = market.upper().replace(' ', '').replace(',', '.')
-            if norm_market_name not in [c.upper().replace(' ', '').replace(',', '.') for c in df.columns]:
-                if op == '>': df[market] = df[col] > market_val
-                else: df[market] = df[col] < market_val
-            else:
-                existing_col_name = next(c for c in df.columns if c.upper().replace(' ', '').replace(',', '.') == norm_market_name)
-                df[market] = convert_to_bool(df[existing_col_name])
-
-        if 'CASA_ABRIU_2x0_HT' not in df.columns: df['CASA_ABRIU_2x0_HT'] = (df['GOALS_H_HT'] == 2) & (df['GOALS_A_HT'] == 0)
-        if 'FORA_ABRIU_0x2_HT' not in df.columns: df['FORA_ABRIU_0x2_HT'] = (df['GOALS_H_HT'] == 0) & (df['GOALS_A_HT'] == 2)
-
+        df = load_user_sheet(uploaded_file.getvalue(), uploaded_file.name)
         st.success("Planilha processada com sucesso!")
         return df
+    except UserSheetReadError as e:
+        st.error(f"Não foi possível ler o arquivo. Pode estar corrompido ou num formato inesperado. Erro: {e}")
+        return pd.DataFrame()
+    except ScoreColumnNotFound as e:
+        st.error(str(e))
+        return pd.DataFrame()
     except Exception as e:
         st.error(f"Ocorreu um erro crítico ao processar sua planilha: {e}. Verifique se o arquivo não está corrompido.")
         return pd.DataFrame()
 
-def analyze_correct_score_table(df):
-    if df.empty: return pd.DataFrame()
-    def classify_score(row):
-        h, a = row['GOALS_H_FT'], row['GOALS_A_FT']
-        if h > 3: return 'Goleada Mandante'
-        if a > 3: return 'Goleada Visitante'
-        return f'{h}x{a}'
-    df['CS_GROUPED'] = df.apply(classify_score, axis=1)
-    cs_counts = df['CS_GROUPED'].value_counts().reset_index()
-    cs_counts.columns = ['Placar Exato', 'Acertos']
-    total_entries = len(df)
-    cs_counts['Entradas'] = total_entries
-    cs_counts['Taxa de Acerto (%)'] = (cs_counts['Acertos'] / total_entries) * 100
-    return cs_counts[['Placar Exato', 'Entradas', 'Acertos', 'Taxa de Acerto (%)']].sort_values(by='Acertos', ascending=False)
 
-def analyze_scenarios(df):
-    scenarios = {}
-    df_tied_ht = df[df['GOALS_H_HT'] == df['GOALS_A_HT']]
-    if not df_tied_ht.empty:
-        scenarios['tied_at_ht'] = {
-            'total_cases': len(df_tied_ht),
-            'home_win_rate': df_tied_ht['CASA'].mean() * 100,
-            'away_win_rate': df_tied_ht['VISITANTE'].mean() * 100
-        }
-    df_casa_2x0 = df[df['CASA_ABRIU_2x0_HT']]
-    if not df_casa_2x0.empty:
-        scenarios['casa_2x0_lead'] = {'total_cases': len(df_casa_2x0), 'final_win_rate': df_casa_2x0['CASA'].mean() * 100}
-    df_fora_0x2 = df[df['FORA_ABRIU_0x2_HT']]
-    if not df_fora_0x2.empty:
-        scenarios['fora_0x2_lead'] = {'total_cases': len(df_fora_0x2), 'final_win_rate': df_fora_0x2['VISITANTE'].mean() * 100}
-    return scenarios
+def analyze_scenarios(summary, league):
+    # Todos os cenários saem da mesma agregação por liga (core.dashboard); aqui ficam só os desta página
+    return league_scenarios(summary, league, include=['tied_at_ht', 'casa_2x0_lead', 'fora_0x2_lead'])
 
 # --- Interface Principal do Streamlit ---
 st.title("BetAnalyzer Pro 📊 - Dashboard de Análise de Dados")
@@ -142,13 +46,7 @@ if 'df' not in st.session_state:
 
 if uploaded_file is not None:
     with st.spinner("Lendo e processando sua planilha..."):
-        engine = 'openpyxl' if uploaded_file.name.endswith('xlsx') else 'xlrd'
-        try:
-            df_user = pd.read_excel(uploaded_file, engine=engine)
-            st.session_state.df = preprocess_user_data(df_user)
-        except Exception as e:
-            st.error(f"Não foi possível ler o arquivo. Pode estar corrompido ou num formato inesperado. Erro: {e}")
-            st.session_state.df = pd.DataFrame()
+        st.session_state.df = load_user_data(uploaded_file)
 
 if not st.session_state.df.empty:
     df = st.session_state.df
@@ -161,13 +59,20 @@ if not st.session_state.df.empty:
     leagues = ['Todas'] + sorted(df['LIGA'].unique().tolist())
     selected_league = st.sidebar.selectbox("Filtrar por Liga", leagues)
     
-    filtered_df = df.copy()
-    if selected_league != 'Todas':
-        filtered_df = filtered_df[filtered_df['LIGA'] == selected_league]
+    # Cubo liga x mês calculado uma vez por planilha; qualquer liga/período é só uma soma de células
+    cube = league_cube(df)
+    months = cube_months(cube)
+    period = (None, None)
+    if len(months) > 1:
+        selected_period = st.sidebar.select_slider("Período", options=months, value=(months[0], months[-1]))
+        if selected_period != (months[0], months[-1]): period = selected_period
+    summary = summary_from_cube(cube, *period)
+    rates = league_rates(summary, selected_league)
+    st.sidebar.download_button("📥 Exportar cubo Liga x Mês (CSV)", data=cube_csv(df), file_name="resumo_liga_mes.csv", mime="text/csv")
 
     # --- LÓGICA DE EXIBIÇÃO DE PÁGINA ---
     if page == "Dashboard Principal":
-        st.success(f"Análise baseada em **{len(filtered_df)}** jogos.")
+        st.success(f"Análise baseada em **{league_games(summary, selected_league)}** jogos.")
         
         tab1, tab2, tab3 = st.tabs(["📊 Dashboard Geral", "📈 Análise de Cenários", "🎯 Placar Exato (CS)"])
 
@@ -175,14 +80,14 @@ if not st.session_state.df.empty:
             st.header("Dashboard Geral de Tendências")
             st.markdown("<h4 style='color: #54a0ff;'>🏁 Resultados Finais (FT)</h4>", unsafe_allow_html=True)
             col1, col2, col3 = st.columns(3)
-            col1.metric("Vitórias equipa Casa", f"{filtered_df['CASA'].mean()*100:.2f}%")
-            col2.metric("Empates", f"{filtered_df['EMPATE'].mean()*100:.2f}%")
-            col3.metric("Vitórias equipa Fora", f"{filtered_df['VISITANTE'].mean()*100:.2f}%")
+            col1.metric("Vitórias equipa Casa", f"{rates['CASA']:.2f}%")
+            col2.metric("Empates", f"{rates['EMPATE']:.2f}%")
+            col3.metric("Vitórias equipa Fora", f"{rates['VISITANTE']:.2f}%")
             
             st.markdown("<h4 style='color: #54a0ff;'>⏱️ Resultados ao Intervalo (HT)</h4>", unsafe_allow_html=True)
             col1, col2 = st.columns(2)
-            col1.metric("Vitórias equipa Casa em HT", f"{filtered_df['CASA_VENCE_HT'].mean()*100:.2f}%")
-            col2.metric("Vitórias equipa Fora em HT", f"{filtered_df['VISITANTE_VENCE_HT'].mean()*100:.2f}%")
+            col1.metric("Vitórias equipa Casa em HT", f"{rates['CASA_VENCE_HT']:.2f}%")
+            col2.metric("Vitórias equipa Fora em HT", f"{rates['VISITANTE_VENCE_HT']:.2f}%")
 
             st.markdown("<h4 style='color: #54a0ff;'>⚽ Mercados de Gols (Over/Under)</h4>", unsafe_allow_html=True)
             markets_to_display = [
@@ -193,13 +98,12 @@ if not st.session_state.df.empty:
             num_cols = 4
             cols = st.columns(num_cols)
             for i, market_name in enumerate(markets_to_display):
-                if market_name in filtered_df.columns:
-                    rate = filtered_df[market_name].mean() * 100
-                    cols[i % num_cols].metric(market_name, f"{rate:.2f}%")
+                if market_name in rates:
+                    cols[i % num_cols].metric(market_name, f"{rates[market_name]:.2f}%")
                 
         with tab2:
             st.header("Análise de Cenários de Jogo")
-            scenarios = analyze_scenarios(filtered_df)
+            scenarios = analyze_scenarios(summary, selected_league)
 
             st.subheader("Cenário: Jogo Empatado no Intervalo (HT)")
             if 'tied_at_ht' in scenarios:
@@ -244,7 +148,7 @@ if not st.session_state.df.empty:
 
         with tab3:
             st.header("Desempenho do Placar Exato (Correct Score)")
-            cs_df = analyze_correct_score_table(filtered_df)
+            cs_df = correct_score_table(summary, selected_league)
             if not cs_df.empty:
                 st.dataframe(
                     cs_df.style.format({'Taxa de Acerto (%)': '{:.2f}%'})
@@ -259,8 +163,7 @@ if not st.session_state.df.empty:
         st.header("📋 Lista de Ligas na Base de Dados")
         st.info("Esta página mostra todas as ligas presentes na sua planilha e o número de jogos para cada uma.")
         
-        league_counts = filtered_df['LIGA'].value_counts().reset_index()
-        league_counts.columns = ['Liga', 'Número de Jogos']
+        league_counts = league_game_counts(summary, selected_league)
         
         st.dataframe(
             league_counts,
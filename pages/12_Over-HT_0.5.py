@@ -1,11 +1,18 @@
 import streamlit as st
 import pandas as pd
 import requests
-import io
 import ast
 from datetime import datetime
 import numpy as np
 
+from core.config import BET365_HISTORY_URL, PREVIEW_POLL_SECONDS, PREVIEW_SAMPLE_ROWS
+from core.data import current_history_manifest, history_version_caption, read_history_frame
+from core.matches import builder_key, cached_matches, matches_running, peek_matches, start_matches
+from core.periods import build_date_index, sidebar_date_window, slice_by_dates
+from core.preview import preview_estimates, stratified_sample
+from core.session import frame_key, last_session_result, session_result
+from core.tables import paged_table
+
 # --- Configuração da Página e Título ---
 st.set_page_config(layout="wide", page_title="BetAnalyzer - Backtesting Profissional")
 
@@ -39,54 +46,76 @@ MARKET_TO_ODDS_MAPPING = {
 
 # --- Funções Auxiliares ---
 
-@st.cache_data
 def load_data(url):
-    """Carrega e pré-processa os dados da URL do GitHub."""
+    """Carrega e pré-processa os dados da URL do GitHub (via base colunar local compartilhada)."""
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        excel_file = io.BytesIO(response.content)
-        df = pd.read_excel(excel_file)
-        df['Date'] = pd.to_datetime(df['Date'])
-        for col in df.columns:
-            if 'Odd' in col:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-            if 'Goals' in col and 'Min' not in col:
-                 df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(int)
-        
-        # <--- LÓGICA DE PARSING DE MINUTOS DE GOLS MELHORADA --->
-        def parse_goal_minutes(minute_str):
-            if pd.isna(minute_str) or not isinstance(minute_str, str) or minute_str.strip() == '[]':
-                return []
-            try:
-                # Usa ast.literal_eval para converter a string de lista para uma lista Python
-                parsed_list = ast.literal_eval(minute_str)
-                # Garante que é uma lista e converte todos os elementos para inteiros
-                return [int(item) for item in parsed_list if str(item).isdigit()]
-            except (ValueError, SyntaxError):
-                return []
-        
-        df['Goals_Min_H_Parsed'] = df['Goals_Min_H'].apply(parse_goal_minutes)
-        df['Goals_Min_A_Parsed'] = df['Goals_Min_A'].apply(parse_goal_minutes)
-        
-        df['Total_Goals_FT'] = df['Goals_H_FT'] + df['Goals_A_FT']
-        df['Total_Goals_HT'] = df['Goals_H_HT'] + df['Goals_A_HT']
-        def determine_result_ft(row):
-            if row['Goals_H_FT'] > row['Goals_A_FT']: return 'H'
-            elif row['Goals_A_FT'] > row['Goals_H_FT']: return 'A'
-            else: return 'D'
-        df['Result_FT'] = df.apply(determine_result_ft, axis=1)
-        def determine_result_ht(row):
-            if row['Goals_H_HT'] > row['Goals_A_HT']: return 'H'
-            elif row['Goals_A_HT'] > row['Goals_H_HT']: return 'A'
-            else: return 'D'
-        df['Result_HT'] = df.apply(determine_result_ht, axis=1)
-        df['BTTS_Yes_Outcome'] = (df['Goals_H_FT'] > 0) & (df['Goals_A_FT'] > 0)
-        df = df.sort_values(by='Date').reset_index(drop=True)
-        return df
+        manifest = current_history_manifest(url) # Geração vigente; a revalidação roda em segundo plano
+    except requests.exceptions.RequestException as e:
+        st.error(f"Erro ao buscar o arquivo do GitHub: {e}")
+        return pd.DataFrame()
+    history_version_caption(manifest['path'])
+    try:
+        df = load_and_process_data(manifest['path'])
     except Exception as e:
         st.error(f"Erro ao carregar/processar dados: {e}")
         return pd.DataFrame()
+    return df.copy(deep=False) # Frame compartilhado no cache; o copy-on-write o preserva
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def load_and_process_data(store_path):
+    """Lê e pré-processa uma geração da base colunar; o caminho da geração faz parte da chave do cache.
+
+    Falhas sobem para load_data: o cache_resource não guarda exceções, então a próxima execução tenta de novo.
+    """
+    df = read_history_frame(store_path)
+    df['Date'] = pd.to_datetime(df['Date'])
+    for col in df.columns:
+        if 'Odd' in col:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+        if 'Goals' in col and 'Min' not in col:
+             df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(int)
+    
+    # <--- LÓGICA DE PARSING DE MINUTOS DE GOLS MELHORADA --->
+    def parse_goal_minutes(minute_str):
+        if pd.isna(minute_str) or not isinstance(minute_str, str) or minute_str.strip() == '[]':
+            return []
+        try:
+            # Usa ast.literal_eval para converter a string de lista para uma lista Python
+            parsed_list = ast.literal_eval(minute_str)
+            # Garante que é uma lista e converte todos os elementos para inteiros
+            return [int(item) for item in parsed_list if str(item).isdigit()]
+        except (ValueError, SyntaxError):
+            return []
+    
+    df['Goals_Min_H_Parsed'] = df['Goals_Min_H'].apply(parse_goal_minutes)
+    df['Goals_Min_A_Parsed'] = df['Goals_Min_A'].apply(parse_goal_minutes)
+    
+    df['Total_Goals_FT'] = df['Goals_H_FT'] + df['Goals_A_FT']
+    df['Total_Goals_HT'] = df['Goals_H_HT'] + df['Goals_A_HT']
+    def determine_result_ft(row):
+        if row['Goals_H_FT'] > row['Goals_A_FT']: return 'H'
+        elif row['Goals_A_FT'] > row['Goals_H_FT']: return 'A'
+        else: return 'D'
+    df['Result_FT'] = df.apply(determine_result_ft, axis=1)
+    def determine_result_ht(row):
+        if row['Goals_H_HT'] > row['Goals_A_HT']: return 'H'
+        elif row['Goals_A_HT'] > row['Goals_H_HT']: return 'A'
+        else: return 'D'
+    df['Result_HT'] = df.apply(determine_result_ht, axis=1)
+    df['BTTS_Yes_Outcome'] = (df['Goals_H_FT'] > 0) & (df['Goals_A_FT'] > 0)
+    df = df.sort_values(by='Date', kind='stable').reset_index(drop=True) # Estável: empates mantêm a ordem da base
+    return df
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def load_date_index(store_path):
+    """Índice de datas do DataFrame pré-processado de uma geração (em cache: não é refeito a cada reexecução).
+
+    Não usar history_date_index: ele indexa a ordem da base colunar, e load_and_process_data reordena por data.
+    """
+    index = build_date_index(load_and_process_data(store_path)['Date'])
+    for key in ('sorted', 'order'):
+        index[key].flags.writeable = False
+    return index
 
 # ... (Funções get_team_last_n_games, calculate_avg_goals_scored, calculate_win_rate, determine_bet_outcome, etc... permanecem as mesmas)
 def get_team_last_n_games(df_full, team_name, current_game_date, n_games):
@@ -188,10 +217,10 @@ def analyze_odds_performance(df_results, odd_bin_size=0.25):
     summary = summary[['Odd_Range', 'Total_Bets', 'Win_Rate_%', 'Avg_Odd', 'Total_Profit', 'ROI_%']]
     return summary
 
-def analyze_single_parameter(df_full, parameter_to_analyze, n_games, selected_odd_col_name, selected_bet_key, bin_size):
-    # ... (sem mudanças aqui)
+def analyze_single_parameter(df_full, parameter_to_analyze, n_games, selected_odd_col_name, selected_bet_key, bin_size, games=None):
+    # `games`: jogos avaliados (ex.: recorte do período); o histórico dos times continua vindo de df_full
     parameter_results = []
-    for index, game in df_full.iterrows():
+    for index, game in (df_full if games is None else games).iterrows():
         if pd.isna(game[selected_odd_col_name]):
             continue
         home_team = game['Home']; away_team = game['Away']; current_date = game['Date']
@@ -285,14 +314,33 @@ def analyze_leading_scenario(df_matched_games, lead_minute, team_scope='Home'):
     }
 
 # --- Interface do Streamlit ---
-GITHUB_RAW_URL = "https://raw.githubusercontent.com/81matheus/BasedeDadosBet365/main/pagesbet365/Exel-Base_de_Dados_Bet365_FiltradaCompleta.xlsx"
+GITHUB_RAW_URL = BET365_HISTORY_URL
 df_original = load_data(GITHUB_RAW_URL)
 
+# Jogos avaliados no período escolhido; df_original já vem ordenado por data, então o recorte é uma fatia contígua (searchsorted)
+date_index = load_date_index(df_original.attrs['store_path']) if not df_original.empty else None
+periodo_inicio, periodo_fim = sidebar_date_window(date_index, key="periodo_backtest")
+df_periodo = df_original if date_index is None else slice_by_dates(df_original, date_index, periodo_inicio, periodo_fim)
+
 st.title("BetAnalyzer 🔬 - Construtor & Descobridor de Estratégias")
 st.caption("Valide suas ideias com o construtor manual ou use a análise automática para encontrar novas oportunidades.")
 
-with st.expander("🔍 Análise Automática de Parâmetros (Descobridor de Estratégias)", expanded=False):
-    # ... (código do descobridor de estratégias, sem mudanças) ...
+# Cada botão do descobridor: (rótulo, parâmetro, tamanho do intervalo, descrição para o spinner, descrição do resultado)
+ANALISES_DESCOBRIDOR = {
+    'Casa': [
+        ("Analisar por Média de Gols (Casa)", 'avg_goals_home', 0.2, "Média de Gols do Time da Casa", "Média Gols (Casa)"),
+        ("Analisar por Taxa de Vitória (Casa)", 'win_rate_home', 10, "Taxa de Vitória do Time da Casa", "Taxa de Vitória (Casa)"),
+    ],
+    'Visitante': [
+        ("Analisar por Média de Gols (Visitante)", 'avg_goals_away', 0.2, "Média de Gols do Time Visitante", "Média Gols (Visitante)"),
+        ("Analisar por Taxa de Vitória (Visitante)", 'win_rate_away', 10, "Taxa de Vitória do Time Visitante", "Taxa de Vitória (Visitante)"),
+    ],
+}
+
+
+@st.fragment
+def descobridor_de_estrategias(df_original, df_periodo):
+    """Fragmento: os seletores e os botões reexecutam só o descobridor; a última análise fica na sessão."""
     st.info("**Como usar:** Selecione uma aposta alvo abaixo (ex: 'Mais de 2.5 Gols FT'). Depois, clique em um dos botões 'Analisar' para ver como o ROI dessa aposta se comporta em diferentes cenários estatísticos, ajudando a encontrar filtros lucrativos.")
     auto_col1, auto_col2 = st.columns(2)
     with auto_col1:
@@ -302,43 +350,32 @@ with st.expander("🔍 Análise Automática de Parâmetros (Descobridor de Estra
     auto_odd_col = MARKET_TO_ODDS_MAPPING[auto_market_type][auto_bet_key]
     auto_n_games = st.slider("Analisar o histórico dos últimos N jogos:", 1, 20, 5, key="auto_n_games")
     st.markdown("---")
-    auto_c1, auto_c2 = st.columns(2)
-    with auto_c1:
-        st.markdown("##### Análises do Time da Casa")
-        if st.button("Analisar por Média de Gols (Casa)", use_container_width=True):
-            with st.spinner(f"Analisando ROI para '{auto_bet_key}' vs. Média de Gols do Time da Casa..."):
-                summary_df = analyze_single_parameter(df_original, 'avg_goals_home', auto_n_games, auto_odd_col, auto_bet_key, bin_size=0.2)
-                if not summary_df.empty:
-                    st.write(f"**Resultado para '{auto_bet_key}' vs. Média Gols (Casa) nos últimos {auto_n_games} jogos**")
-                    st.bar_chart(summary_df, x='Parameter_Range', y='ROI_%')
-                    st.dataframe(summary_df.style.background_gradient(subset=['ROI_%'], cmap='RdYlGn'), use_container_width=True)
-                else: st.warning("Nenhum dado encontrado para esta análise.")
-        if st.button("Analisar por Taxa de Vitória (Casa)", use_container_width=True):
-            with st.spinner(f"Analisando ROI para '{auto_bet_key}' vs. Taxa de Vitória do Time da Casa..."):
-                summary_df = analyze_single_parameter(df_original, 'win_rate_home', auto_n_games, auto_odd_col, auto_bet_key, bin_size=10)
-                if not summary_df.empty:
-                    st.write(f"**Resultado para '{auto_bet_key}' vs. Taxa de Vitória (Casa) nos últimos {auto_n_games} jogos**")
-                    st.bar_chart(summary_df, x='Parameter_Range', y='ROI_%')
-                    st.dataframe(summary_df.style.background_gradient(subset=['ROI_%'], cmap='RdYlGn'), use_container_width=True)
-                else: st.warning("Nenhum dado encontrado para esta análise.")
-    with auto_c2:
-        st.markdown("##### Análises do Time Visitante")
-        if st.button("Analisar por Média de Gols (Visitante)", use_container_width=True):
-            with st.spinner(f"Analisando ROI para '{auto_bet_key}' vs. Média de Gols do Time Visitante..."):
-                summary_df = analyze_single_parameter(df_original, 'avg_goals_away', auto_n_games, auto_odd_col, auto_bet_key, bin_size=0.2)
-                if not summary_df.empty:
-                    st.write(f"**Resultado para '{auto_bet_key}' vs. Média Gols (Visitante) nos últimos {auto_n_games} jogos**")
-                    st.bar_chart(summary_df, x='Parameter_Range', y='ROI_%')
-                    st.dataframe(summary_df.style.background_gradient(subset=['ROI_%'], cmap='RdYlGn'), use_container_width=True)
-                else: st.warning("Nenhum dado encontrado para esta análise.")
-        if st.button("Analisar por Taxa de Vitória (Visitante)", use_container_width=True):
-            with st.spinner(f"Analisando ROI para '{auto_bet_key}' vs. Taxa de Vitória do Time Visitante..."):
-                summary_df = analyze_single_parameter(df_original, 'win_rate_away', auto_n_games, auto_odd_col, auto_bet_key, bin_size=10)
-                if not summary_df.empty:
-                    st.write(f"**Resultado para '{auto_bet_key}' vs. Taxa de Vitória (Visitante) nos últimos {auto_n_games} jogos**")
-                    st.bar_chart(summary_df, x='Parameter_Range', y='ROI_%')
-                    st.dataframe(summary_df.style.background_gradient(subset=['ROI_%'], cmap='RdYlGn'), use_container_width=True)
-                else: st.warning("Nenhum dado encontrado para esta análise.")
+    pedido = None
+    for coluna, (lado, analises) in zip(st.columns(2), ANALISES_DESCOBRIDOR.items()):
+        with coluna:
+            st.markdown(f"##### Análises do Time {'da Casa' if lado == 'Casa' else 'Visitante'}")
+            for analise in analises:
+                if st.button(analise[0], use_container_width=True):
+                    pedido = analise
+    if pedido is not None:
+        _, parameter, bin_size, descricao, rotulo = pedido
+        params = (frame_key(df_periodo), parameter, auto_n_games, auto_odd_col, auto_bet_key)
+        with st.spinner(f"Analisando ROI para '{auto_bet_key}' vs. {descricao}..."):
+            session_result('descobridor', params, lambda: (
+                f"**Resultado para '{auto_bet_key}' vs. {rotulo} nos últimos {auto_n_games} jogos**",
+                analyze_single_parameter(df_original, parameter, auto_n_games, auto_odd_col, auto_bet_key, bin_size=bin_size, games=df_periodo)))
+    ultima = last_session_result('descobridor')
+    if ultima is not None:
+        titulo, summary_df = ultima[1]
+        if not summary_df.empty:
+            st.write(titulo)
+            st.bar_chart(summary_df, x='Parameter_Range', y='ROI_%')
+            st.dataframe(summary_df.style.background_gradient(subset=['ROI_%'], cmap='RdYlGn'), use_container_width=True)
+        else: st.warning("Nenhum dado encontrado para esta análise.")
+
+
+with st.expander("🔍 Análise Automática de Parâmetros (Descobridor de Estratégias)", expanded=False):
+    descobridor_de_estrategias(df_original, df_periodo)
 
 st.markdown("---")
 
@@ -366,29 +403,113 @@ else:
             n_games_away = st.slider("Analisar últimos N jogos (Visitante)", 1, 20, 5, key="n_away")
             min_avg_goals_away, max_avg_goals_away = st.slider("Média de Gols Marcados (Visitante)", 0.0, 5.0, (0.0, 5.0), 0.1, key="avg_a_goals")
             min_win_rate_away, max_win_rate_away = st.slider("% de Vitórias (Visitante)", 0, 100, (0, 100), 1, key="win_a")
+        preview_mode = st.toggle("⚡ Prévia instantânea (amostra)", value=True,
+                                 help="Mostra na hora os KPIs estimados numa amostra por liga e temporada, com intervalo de confiança; o resultado completo substitui a prévia quando ficar pronto.")
         run_analysis = st.button("Executar Backtest da Estratégia", type="primary", use_container_width=True)
 
+    # O resultado do construtor fica na sessão: mexer em outros widgets (ex.: o intervalo das odds abaixo) não refaz a filtragem.
+    # Os jogos aprovados também ficam no memo compartilhado (core.matches), pela mesma chave de filtros
+    builder_params = builder_key('over_ht', frame_key(df_periodo), selected_odd_column_name, selected_bet_key, min_odd, max_odd,
+                                 n_games_home, min_avg_goals_home, max_avg_goals_home, min_win_rate_home, max_win_rate_home,
+                                 n_games_away, min_avg_goals_away, max_avg_goals_away, min_win_rate_away, max_win_rate_away)
+
+    def posicoes_aprovadas(candidatos=df_periodo):
+        df_filtered_by_odd = candidatos[(candidatos[selected_odd_column_name] >= min_odd) & (candidatos[selected_odd_column_name] <= max_odd)].copy()
+        matched_rows = []
+        for index, game in df_filtered_by_odd.iterrows():
+            home_hist = get_team_last_n_games(df_original, game['Home'], game['Date'], n_games_home)
+            if len(home_hist) < n_games_home: continue
+            avg_goals_h = calculate_avg_goals_scored(home_hist, game['Home'])
+            if not (min_avg_goals_home <= avg_goals_h <= max_avg_goals_home): continue
+            win_rate_h = calculate_win_rate(home_hist, game['Home'])
+            if not (min_win_rate_home <= win_rate_h <= max_win_rate_home): continue
+            away_hist = get_team_last_n_games(df_original, game['Away'], game['Date'], n_games_away)
+            if len(away_hist) < n_games_away: continue
+            avg_goals_a = calculate_avg_goals_scored(away_hist, game['Away'])
+            if not (min_avg_goals_away <= avg_goals_a <= max_avg_goals_away): continue
+            win_rate_a = calculate_win_rate(away_hist, game['Away'])
+            if not (min_win_rate_away <= win_rate_a <= max_win_rate_away): continue
+            matched_rows.append(index)
+        return {'rows': np.array(matched_rows, dtype=np.int64)}
+
+    def filtrar_jogos():
+        # df_original tem índice 0..n-1 (reset_index após a ordenação): o rótulo é a posição na base
+        matches = cached_matches(builder_params, posicoes_aprovadas)
+        return df_original.loc[matches['rows']], selected_odd_column_name, selected_bet_key
+
+    def calcular_previa():
+        # Os mesmos filtros numa amostra estratificada do período; o resultado da aposta como no run_backtest
+        amostra = stratified_sample(df_periodo, PREVIEW_SAMPLE_ROWS)
+        matched = np.isin(amostra['rows'], posicoes_aprovadas(df_periodo.loc[amostra['rows']])['rows'])
+        wins, profits = np.zeros(len(matched)), np.zeros(len(matched))
+        for i in np.flatnonzero(matched):
+            outcome, profit = determine_bet_outcome(df_original.loc[amostra['rows'][i]], selected_odd_column_name)
+            if outcome is None: matched[i] = False; continue
+            wins[i], profits[i] = outcome == "WIN", profit
+        return preview_estimates(amostra, matched, wins, profits)
+
     if run_analysis:
-        with st.spinner("Analisando milhares de jogos com seus filtros... Por favor, aguarde."):
-            # ... (Lógica de filtragem dos jogos, sem mudanças)
-            df_filtered_by_odd = df_original[(df_original[selected_odd_column_name] >= min_odd) & (df_original[selected_odd_column_name] <= max_odd)].copy()
-            matched_games_list = []
-            for index, game in df_filtered_by_odd.iterrows():
-                home_hist = get_team_last_n_games(df_original, game['Home'], game['Date'], n_games_home)
-                if len(home_hist) < n_games_home: continue
-                avg_goals_h = calculate_avg_goals_scored(home_hist, game['Home'])
-                if not (min_avg_goals_home <= avg_goals_h <= max_avg_goals_home): continue
-                win_rate_h = calculate_win_rate(home_hist, game['Home'])
-                if not (min_win_rate_home <= win_rate_h <= max_win_rate_home): continue
-                away_hist = get_team_last_n_games(df_original, game['Away'], game['Date'], n_games_away)
-                if len(away_hist) < n_games_away: continue
-                avg_goals_a = calculate_avg_goals_scored(away_hist, game['Away'])
-                if not (min_avg_goals_away <= avg_goals_a <= max_avg_goals_away): continue
-                win_rate_a = calculate_win_rate(away_hist, game['Away'])
-                if not (min_win_rate_away <= win_rate_a <= max_win_rate_away): continue
-                matched_games_list.append(game)
-        
-        df_matched = pd.DataFrame(matched_games_list)
+        if preview_mode and 0 < PREVIEW_SAMPLE_ROWS < len(df_periodo) and peek_matches(builder_params) is None:
+            # Prévia na hora; o resultado completo é calculado em segundo plano e a substitui quando ficar pronto
+            with st.spinner("Calculando a prévia na amostra..."):
+                session_result('construtor_previa', builder_params, calcular_previa)
+            start_matches(builder_params, posicoes_aprovadas)
+            st.session_state['construtor_pendente'] = {'params': builder_params, 'odd': selected_odd_column_name, 'bet': selected_bet_key,
+                                                       'geracao': df_original.attrs.get('store_path')}
+        else:
+            st.session_state.pop('construtor_pendente', None)
+            with st.spinner("Analisando milhares de jogos com seus filtros... Por favor, aguarde."):
+                session_result('construtor_manual', builder_params, filtrar_jogos)
+
+    @st.fragment(run_every=PREVIEW_POLL_SECONDS)
+    def previa_do_construtor(chave):
+        """Fragmento: mostra a prévia e, a cada poucos segundos, verifica se o resultado completo ficou pronto."""
+        if not matches_running(chave) or peek_matches(chave) is not None:
+            st.rerun() # A execução da página inteira troca a prévia pelo resultado completo
+        previa = session_result('construtor_previa', chave)
+        if previa is None: # A prévia guardada na sessão é de outros filtros; segue aguardando o resultado completo
+            st.info("O resultado completo do backtest está sendo calculado e aparecerá aqui quando ficar pronto.")
+            return
+        st.header("⚡ Prévia do Backtest (amostra)")
+        st.info(f"Estimativa com {previa['sample_size']} jogos do período, amostrados por liga e temporada "
+                f"({previa['sample_matched']} passaram nos filtros). O resultado completo está sendo calculado e substituirá esta prévia.")
+        kpis = [("Total de Apostas", 'total_bets', "{:.0f}"), ("Taxa de Acerto", 'win_rate', "{:.2f}%"),
+                ("Lucro/Prejuízo Líquido", 'net_profit', "{:.2f} un."), ("ROI (Retorno s/ Invest.)", 'roi', "{:.2f}%")]
+        for coluna, (rotulo, kpi, formato) in zip(st.columns(4), kpis):
+            if kpi not in previa: # Nenhum jogo da amostra passou nos filtros: sem taxa a estimar
+                coluna.metric(f"{rotulo} (≈)", "—")
+                continue
+            estimativa, inferior, superior = previa[kpi]
+            coluna.metric(f"{rotulo} (≈)", formato.format(estimativa))
+            coluna.caption(f"IC 95%: {formato.format(inferior)} a {formato.format(superior)}")
+
+    # Resultado completo pronto (ou falhou) desde a última execução
+    pendente = st.session_state.get('construtor_pendente')
+    if pendente is not None and pendente.get('geracao') != df_original.attrs.get('store_path'):
+        # A página já serve uma geração nova da base: as posições do cálculo em segundo plano são da anterior
+        del st.session_state['construtor_pendente']
+        pendente = None
+        st.warning("A base histórica foi atualizada durante o cálculo. Clique em 'Executar Backtest da Estratégia' para analisar a versão nova.")
+    if pendente is not None:
+        calculando = matches_running(pendente['params'])
+        matches = peek_matches(pendente['params'])
+        if matches is not None:
+            session_result('construtor_manual', pendente['params'],
+                           lambda: (df_original.loc[matches['rows']], pendente['odd'], pendente['bet']))
+            del st.session_state['construtor_pendente']
+            pendente = None
+        elif not calculando:
+            del st.session_state['construtor_pendente']
+            pendente = None
+            st.error("O cálculo completo da estratégia falhou. Clique em 'Executar Backtest da Estratégia' para tentar de novo.")
+
+    construtor = last_session_result('construtor_manual')
+    if pendente is not None:
+        previa_do_construtor(pendente['params'])
+    elif construtor is not None:
+        construtor_params, (df_matched, selected_odd_column_name, selected_bet_key) = construtor
+        if construtor_params != builder_params:
+            st.info("Mostrando os resultados da última execução: os filtros da barra lateral mudaram desde então. Clique em 'Executar Backtest da Estratégia' para atualizar.")
         st.success(f"Análise concluída! {len(df_matched)} jogos encontrados que correspondem à sua estratégia manual.")
 
         if not df_matched.empty:
@@ -403,20 +524,25 @@ else:
             st.subheader("Evolução do Lucro (Bankroll)")
             st.line_chart(df_results, x='Date', y='Cumulative_Profit')
             
-            st.header("📊 Análise de Performance por Faixa de Odd")
-            # ... (código da análise de odds, sem mudanças)
-            odd_bin_size = st.slider("Defina o tamanho do intervalo das Odds para análise:", 0.10, 1.0, 0.25, 0.05, format="%.2f")
-            df_odds_summary = analyze_odds_performance(df_results, odd_bin_size)
-            if not df_odds_summary.empty:
-                st.subheader("ROI por Faixa de Odd")
-                st.bar_chart(df_odds_summary, x='Odd_Range', y='ROI_%')
-                st.subheader("Resumo Detalhado por Faixa de Odd")
-                st.dataframe(
-                    df_odds_summary.style.format({'Win_Rate_%': '{:.2f}%', 'Avg_Odd': '{:.2f}', 'Total_Profit': '{:.2f}', 'ROI_%': '{:.2f}%'})
-                    .background_gradient(subset=['ROI_%'], cmap='RdYlGn').bar(subset=["Total_Bets"], color='#2B90B4', align='zero').hide(axis="index"),
-                    use_container_width=True)
-            else: st.info("Não há dados suficientes para gerar a análise por faixa de odd.")
-            
+            @st.fragment
+            def analise_por_faixa_de_odd(df_results):
+                """Fragmento: mudar o intervalo das odds reexecuta só esta seção."""
+                st.header("📊 Análise de Performance por Faixa de Odd")
+                # ... (código da análise de odds, sem mudanças)
+                odd_bin_size = st.slider("Defina o tamanho do intervalo das Odds para análise:", 0.10, 1.0, 0.25, 0.05, format="%.2f")
+                df_odds_summary = analyze_odds_performance(df_results, odd_bin_size)
+                if not df_odds_summary.empty:
+                    st.subheader("ROI por Faixa de Odd")
+                    st.bar_chart(df_odds_summary, x='Odd_Range', y='ROI_%')
+                    st.subheader("Resumo Detalhado por Faixa de Odd")
+                    st.dataframe(
+                        df_odds_summary.style.format({'Win_Rate_%': '{:.2f}%', 'Avg_Odd': '{:.2f}', 'Total_Profit': '{:.2f}', 'ROI_%': '{:.2f}%'})
+                        .background_gradient(subset=['ROI_%'], cmap='RdYlGn').bar(subset=["Total_Bets"], color='#2B90B4', align='zero').hide(axis="index"),
+                        use_container_width=True)
+                else: st.info("Não há dados suficientes para gerar a análise por faixa de odd.")
+
+            analise_por_faixa_de_odd(df_results)
+
             # --- <NOVA SEÇÃO DE ANÁLISE EM JOGO> ---
             st.header("⏱️ Análise de Timing e Cenários nos Jogos Filtrados")
             st.info("Esta seção analisa o comportamento dos jogos que **passaram nos seus filtros**.")
@@ -486,7 +612,7 @@ else:
                     st.write("Nenhum jogo em que o time visitante liderava aos 70 minutos.")
 
             with st.expander("Ver todos os jogos analisados no backtest"):
-                st.dataframe(df_results, use_container_width=True)
+                paged_table(df_results, key="jogos_backtest") # Só a página visível vai ao navegador
         else:
             st.info("Nenhum jogo encontrado com os critérios definidos na sua estratégia manual. Tente filtros mais flexíveis.")
     else:
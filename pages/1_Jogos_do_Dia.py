@@ -3,6 +3,8 @@ import pandas as pd
 import numpy as np
 import io # Necessário para ler o buffer do arquivo carregado
 
+from core.leagues import prepare_leagues, filter_approved_leagues
+
 # --- Função Auxiliar para Carregar Dados ---
 def load_dataframe(uploaded_file):
     """Carrega um DataFrame de um arquivo XLSX ou CSV carregado via Streamlit."""
@@ -51,20 +53,6 @@ def load_dataframe(uploaded_file):
         return None
 # --- Fim da Função Auxiliar ---
 
-# --- INÍCIO: Definição das Ligas Aprovadas ---
-# Use um set para busca eficiente
-APPROVED_LEAGUES = set([
-    "ARGENTINA 1", "ARGENTINA 2", "AUSTRALIA 1", "AUSTRIA 1", "AUSTRIA 2", "BELGIUM 1", "BELGIUM 2", "BOLIVIA 1", "BRAZIL 1", "BRAZIL 2",
-    "BULGARIA 1", "CHILE 1", "CHINA 1", "CHINA 2", "COLOMBIA 1", "COLOMBIA 2", "CROATIA 1", "CZECH 1", "DENMARK 1", "DENMARK 2",
-    "ECUADOR 1", "EGYPT 1", "ENGLAND 1", "ENGLAND 2", "ENGLAND 3", "ENGLAND 4", "ENGLAND 5", "ESTONIA 1", "EUROPA CHAMPIONS LEAGUE",
-    "EUROPA CONFERENCE LEAGUE", "EUROPA LEAGUE", "FINLAND 1", "FRANCE 1", "GREECE 1", "HUNGARY 1", "IRELAND 1", "IRELAND 2", "ISRAEL 1",
-    "ITALY 1", "ITALY 2", "JAPAN 1", "JAPAN 2", "MEXICO 1", "MEXICO 2",  "NETHERLANDS 1", "NETHERLANDS 2", "NORTHERN IRELAND 2", "NORWAY 1",
-    "NORWAY 2", "PARAGUAY 1", "PERU 1", "POLAND 1", "POLAND 2", "PORTUGAL 1", "PORTUGAL 2", "ROMANIA 1", "ROMANIA 2", "SAUDI ARABIA 1",
-    "SCOTLAND 1", "SCOTLAND 2", "SCOTLAND 3", "SCOTLAND 4", "SERBIA 1",  "SLOVAKIA 1", "SOUTH KOREA 1", "SOUTH KOREA 2", "SPAIN 1", "SPAIN 2",
-    "SWEDEN 1", "SWEDEN 2", "SWITZERLAND 1", "SWITZERLAND 2", "TURKEY 1", "TURKEY 2", "UKRAINE 1", "URUGUAY 1", "USA 1", "VENEZUELA 1", "WALES 1"
-])
-# --- FIM: Definição das Ligas Aprovadas ---
-
 # --- Função Removida: run_backtest ---
 # --- Função Removida: check_moving_averages ---
 
@@ -250,10 +238,10 @@ if uploaded_daily is not None:
         # Filtro de Ligas (Jogos do Dia)
         df_daily = df_daily_original.copy() # Começa com todos os jogos
         if 'League' in df_daily_original.columns:
-            # Garante que a coluna League seja string para comparação
-            df_daily_original['League'] = df_daily_original['League'].astype(str).str.upper().str.strip()
-            # Filtra pelas ligas aprovadas
-            df_daily = df_daily_original[df_daily_original['League'].isin(APPROVED_LEAGUES)].copy()
+            # Normaliza e codifica as ligas uma única vez (ingestão)
+            df_daily_original = prepare_leagues(df_daily_original)
+            # Filtra pelas ligas aprovadas (gather na tabela de consulta por código)
+            df_daily = filter_approved_leagues(df_daily_original)
             if df_daily.empty and not df_daily_original.empty:
                  st.warning("Nenhum jogo na planilha pertence às ligas aprovadas listadas.")
             elif not df_daily.empty:
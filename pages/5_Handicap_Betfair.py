@@ -5,17 +5,25 @@ import io # Necessário para ler o buffer do arquivo carregado e da web
 import re # Para extrair partes dos nomes das estratégias combinadas
 import requests # Para buscar dados do GitHub
 
+from core.config import BETFAIR_HISTORY_URL
+from core.data import (history_date_index, history_var_bins, history_var_dict, history_version_caption, history_window,
+                       load_history)
+from core.leagues import prepare_leagues, filter_approved_leagues
+from core.miner import mining_panel
+from core.perf import fragment_run, performance_panel, stage, start_run
+from core.periods import sidebar_date_window
+from core.session import frame_key, session_result
+from core.tables import paged_table
+from core.walkforward import walk_forward_panel
+
 # --- Função para Carregar Dados do GITHUB ---
-@st.cache_data(ttl=3600) # Cacheia os dados por 1 hora para evitar downloads repetidos
 def load_data_from_github(url):
-    """Busca e carrega um DataFrame de um arquivo Excel em uma URL raw do GitHub."""
+    """Busca (com revalidação condicional e espelho local compartilhado) e carrega a base histórica do GitHub."""
     try:
-        response = requests.get(url)
-        response.raise_for_status() # Verifica se houve erro no request (4xx ou 5xx)
-
-        # Usa io.BytesIO para ler o conteúdo binário da resposta no pandas
-        df = pd.read_excel(io.BytesIO(response.content), engine='openpyxl')
+        # Download, espelho em disco e base colunar incremental ficam na camada compartilhada (core.data)
+        df = load_history(url)
         st.success("Base de dados histórica carregada com sucesso do GitHub!")
+        history_version_caption(df.attrs.get('store_path')) # Versão servida (atualizada em segundo plano)
         return df
     except requests.exceptions.RequestException as e:
         st.error(f"Erro ao buscar o arquivo do GitHub: {e}")
@@ -65,19 +73,6 @@ def load_dataframe_local(uploaded_file):
         return None
 # --- Fim da Função Auxiliar ---
 
-# --- INÍCIO: Definição das Ligas Aprovadas ---
-APPROVED_LEAGUES = set([
-    "ARGENTINA 1", "ARGENTINA 2", "AUSTRALIA 1", "AUSTRIA 1", "AUSTRIA 2", "BELGIUM 1", "BELGIUM 2", "BOLIVIA 1", "BRAZIL 1", "BRAZIL 2",
-    "BULGARIA 1", "CHILE 1", "CHINA 1", "CHINA 2", "COLOMBIA 1", "COLOMBIA 2", "CROATIA 1", "CZECH 1", "DENMARK 1", "DENMARK 2",
-    "ECUADOR 1", "EGYPT 1", "ENGLAND 1", "ENGLAND 2", "ENGLAND 3", "ENGLAND 4", "ENGLAND 5", "ESTONIA 1", "EUROPA CHAMPIONS LEAGUE",
-    "EUROPA CONFERENCE LEAGUE", "EUROPA LEAGUE", "FINLAND 1", "FRANCE 1", "GREECE 1", "HUNGARY 1", "IRELAND 1", "IRELAND 2", "ISRAEL 1",
-    "ITALY 1", "ITALY 2", "JAPAN 1", "JAPAN 2", "MEXICO 1", "MEXICO 2",  "NETHERLANDS 1", "NETHERLANDS 2", "NORTHERN IRELAND 2", "NORWAY 1",
-    "NORWAY 2", "PARAGUAY 1", "PERU 1", "POLAND 1", "POLAND 2", "PORTUGAL 1", "PORTUGAL 2", "ROMANIA 1", "ROMANIA 2", "SAUDI ARABIA 1",
-    "SCOTLAND 1", "SCOTLAND 2", "SCOTLAND 3", "SCOTLAND 4", "SERBIA 1",  "SLOVAKIA 1", "SOUTH KOREA 1", "SOUTH KOREA 2", "SPAIN 1", "SPAIN 2",
-    "SWEDEN 1", "SWEDEN 2", "SWITZERLAND 1", "SWITZERLAND 2", "TURKEY 1", "TURKEY 2", "UKRAINE 1", "URUGUAY 1", "USA 1", "VENEZUELA 1", "WALES 1"
-])
-# --- FIM: Definição das Ligas Aprovadas ---
-
 # --- INÍCIO: Definição das Estratégias Correct Score Lay a Testar ---
 cs_lay_strategies_to_test = [
     'Lay_Hand35_Casa', 'Lay_Hand45_Casa', 'Lay_Hand35_Fora', 'Lay_Hand45_Fora'
@@ -227,8 +222,8 @@ def pre_calculate_all_vars(df):
         st.error(f"As colunas de odds {', '.join(missing_cols)} são necessárias e não foram encontradas.")
         return None
 
-    # Criar cópia para evitar modificar o original indiretamente
-    df_copy = df.copy()
+    # Cópia só das colunas de odds usadas, para não modificar o original indiretamente
+    df_copy = df[required_odds_cols].copy()
 
     # Verificar e tratar valores inválidos (NaN, Inf, <= 0) nas odds ANTES de calcular probs
     for col in required_odds_cols:
@@ -499,15 +494,19 @@ def define_var_strategies(vars_dict):
     return strategy_list, strategy_map
 # --- Fim Definição das estratégias VAR ---
 
+# --- Instrumentação: tempo por etapa desta execução (painel "Performance" e logs) ---
+start_run(__file__)
+
 # --- Título ---
 st.title("Estratégia: Handicap 3.5 e 4.5 >> 98% Betfair ")
 
 # --- Carregar Histórico do GitHub ---
 st.header("Carregamento da Base Histórica")
-github_raw_url = "https://raw.githubusercontent.com/81matheus/BasedeDadosBet365/main/pagesbet365/Base_de_Dados_Betfair Exchange_Filtrada_2025-04-23xl.xlsx"
+github_raw_url = BETFAIR_HISTORY_URL
 #github_raw_url = "https://raw.githubusercontent.com/81matheus/BasedeDadosBet365/main/pagesbet365/Base_de_Dados_Betfair_Exchange2024.xlsx"
-with st.spinner("Buscando e carregando dados históricos do GitHub..."):
+with st.spinner("Buscando e carregando dados históricos do GitHub..."), stage('carregar_historico') as etapa:
     df_historico_original = load_data_from_github(github_raw_url)
+    etapa['rows'] = None if df_historico_original is None else len(df_historico_original)
 
 # --- Processamento ---
 if df_historico_original is not None:
@@ -528,8 +527,13 @@ if df_historico_original is not None:
         st.error(f"Colunas essenciais ausentes na base histórica: {', '.join(missing_cols)}. Não é possível continuar.")
         df_historico = None # Impede a execução do resto
     else:
+        # Recorte por temporada/intervalo: searchsorted no índice de datas ordenado, sem varrer a coluna Date
+        periodo_inicio, periodo_fim = sidebar_date_window(history_date_index(df_historico_original))
+        df_periodo = history_window(df_historico_original, periodo_inicio, periodo_fim)
+        if df_periodo is not df_historico_original:
+            st.info(f"Período selecionado: {len(df_periodo)} jogos entre {periodo_inicio:%d/%m/%Y} e {periodo_fim:%d/%m/%Y}.")
         # Filtro de Ligas APROVADAS
-        df_historico = df_historico_original[df_historico_original['League'].isin(APPROVED_LEAGUES)].copy()
+        df_historico = filter_approved_leagues(df_periodo)
         if df_historico.empty:
             st.warning("Nenhum jogo da base histórica pertence às ligas aprovadas. O backtest será vazio.")
         else:
@@ -538,7 +542,11 @@ if df_historico_original is not None:
     # --- Backtest Combinado (só executa se df_historico for válido e não vazio) ---
     if df_historico is not None and not df_historico.empty:
         #st.info("Iniciando pré-cálculo das variáveis VAR para o histórico...")
-        vars_dict_historico = pre_calculate_all_vars(df_historico)
+        with stage('vars_historico', rows=len(df_historico)):
+            # VARs do histórico vêm da matriz mantida (e estendida só com os jogos novos) pela base colunar
+            vars_dict_historico = history_var_dict(df_historico, 'betfair')
+            if vars_dict_historico is None:
+                vars_dict_historico = pre_calculate_all_vars(df_historico)
 
         if vars_dict_historico is None:
             st.error("Falha ao pré-calcular variáveis VAR do histórico. Verifique os dados e mensagens acima.")
@@ -550,51 +558,59 @@ if df_historico_original is not None:
             if not var_strategy_list:
                  st.warning("Nenhuma estratégia VAR foi definida.")
             else:
-                combined_backtest_results_list = []
-                combined_medias_results_list = []
-                approved_combined_strategies = [] # Lista para guardar nomes das combinações aprovadas
-
-                total_combinations = len(var_strategy_list) * len(cs_lay_strategies_to_test)
-                st.write(f"Executando backtest para {total_combinations} combinações (Estratégias VAR x Lay CS)...")
-                progress_bar = st.progress(0)
-                processed_count = 0
-
-                for var_strategy_func, var_strategy_name in var_strategy_list:
-                    try:
-                        # Aplica filtro VAR ao DF já filtrado por liga
-                        df_filtered_by_var = var_strategy_func(df_historico)
-                    except Exception as e_filter:
-                        st.error(f"Erro ao aplicar filtro {var_strategy_name} no histórico: {e_filter}")
-                        df_filtered_by_var = pd.DataFrame() # Cria DF vazio para pular o loop CS
-
-                    # Loop CS Lay apenas se o filtro VAR retornou algo
-                    if not df_filtered_by_var.empty:
-                         for cs_lay_name in cs_lay_strategies_to_test:
-                            combined_name = f"VAR_{var_strategy_name}_CS_{cs_lay_name}"
-                            backtest_result = run_combined_backtest(df_filtered_by_var.copy(), cs_lay_name, combined_name)
-                            combined_backtest_results_list.append(backtest_result)
-
-                            if backtest_result["Total de Jogos"] > 0:
-                                medias_result = check_combined_moving_averages(backtest_result["Dataframe"], combined_name)
-                                combined_medias_results_list.append(medias_result)
-                                if medias_result["Acima dos Limiares"]:
-                                    # Guarda o nome da COMBINAÇÃO aprovada
-                                    approved_combined_strategies.append(combined_name)
+                def executar_grade_var_lay():
+                    """Grade VAR x Lay completa do histórico (recalculada só quando a base ou o período mudam)."""
+                    combined_backtest_results_list = []
+                    combined_medias_results_list = []
+                    approved_combined_strategies = [] # Lista para guardar nomes das combinações aprovadas
+
+                    total_combinations = len(var_strategy_list) * len(cs_lay_strategies_to_test)
+                    st.write(f"Executando backtest para {total_combinations} combinações (Estratégias VAR x Lay CS)...")
+                    progress_bar = st.progress(0)
+                    processed_count = 0
+
+                    with stage('grade_var_lay', rows=len(df_historico), detail=f"{total_combinations} combinações", profile=True):
+                        for var_strategy_func, var_strategy_name in var_strategy_list:
+                            try:
+                                # Aplica filtro VAR ao DF já filtrado por liga
+                                df_filtered_by_var = var_strategy_func(df_historico)
+                            except Exception as e_filter:
+                                st.error(f"Erro ao aplicar filtro {var_strategy_name} no histórico: {e_filter}")
+                                df_filtered_by_var = pd.DataFrame() # Cria DF vazio para pular o loop CS
+
+                            # Loop CS Lay apenas se o filtro VAR retornou algo
+                            if not df_filtered_by_var.empty:
+                                 for cs_lay_name in cs_lay_strategies_to_test:
+                                    combined_name = f"VAR_{var_strategy_name}_CS_{cs_lay_name}"
+                                    backtest_result = run_combined_backtest(df_filtered_by_var, cs_lay_name, combined_name)
+                                    combined_backtest_results_list.append(backtest_result)
+
+                                    if backtest_result["Total de Jogos"] > 0:
+                                        medias_result = check_combined_moving_averages(backtest_result["Dataframe"], combined_name)
+                                        combined_medias_results_list.append(medias_result)
+                                        if medias_result["Acima dos Limiares"]:
+                                            # Guarda o nome da COMBINAÇÃO aprovada
+                                            approved_combined_strategies.append(combined_name)
+                                    else:
+                                        # Adiciona entrada mesmo para 0 jogos para consistência na tabela de médias
+                                        combined_medias_results_list.append({
+                                            "Estratégia": combined_name, "Média 8": "N/A (0 jogos)", "Média 40": "N/A (0 jogos)",
+                                            "Lucro Últimos 8": "N/A (0 jogos)", "Lucro Últimos 40": "N/A (0 jogos)",
+                                            "Acima dos Limiares": False
+                                        })
+                                    processed_count += 1
+                                    progress_bar.progress(min(1.0, processed_count / total_combinations)) # Garante que não passa de 1.0
                             else:
-                                # Adiciona entrada mesmo para 0 jogos para consistência na tabela de médias
-                                combined_medias_results_list.append({
-                                    "Estratégia": combined_name, "Média 8": "N/A (0 jogos)", "Média 40": "N/A (0 jogos)",
-                                    "Lucro Últimos 8": "N/A (0 jogos)", "Lucro Últimos 40": "N/A (0 jogos)",
-                                    "Acima dos Limiares": False
-                                })
-                            processed_count += 1
-                            progress_bar.progress(min(1.0, processed_count / total_combinations)) # Garante que não passa de 1.0
-                    else:
-                        # Pula as combinações CS Lay para este filtro VAR vazio, atualiza progresso
-                        processed_count += len(cs_lay_strategies_to_test)
-                        progress_bar.progress(min(1.0, processed_count / total_combinations))
+                                # Pula as combinações CS Lay para este filtro VAR vazio, atualiza progresso
+                                processed_count += len(cs_lay_strategies_to_test)
+                                progress_bar.progress(min(1.0, processed_count / total_combinations))
+
+                    progress_bar.empty() # Limpa a barra de progresso
+                    return combined_backtest_results_list, combined_medias_results_list, approved_combined_strategies
 
-                progress_bar.empty() # Limpa a barra de progresso
+                # Resultados guardados na sessão: widgets, uploads e os painéis abaixo não refazem a grade
+                combined_backtest_results_list, combined_medias_results_list, approved_combined_strategies = session_result(
+                    'grade_var_lay', (frame_key(df_historico), periodo_inicio, periodo_fim), executar_grade_var_lay)
                 st.success("Backtest combinado concluído.")
 
                 # --- Exibição dos Resultados do Backtest ---
@@ -603,7 +619,7 @@ if df_historico_original is not None:
                     # Filtra resultados onde houve jogos para mostrar no resumo
                     df_summary_combined = pd.DataFrame([r for r in combined_backtest_results_list if r['Total de Jogos'] > 0])
                     if not df_summary_combined.empty:
-                        st.dataframe(df_summary_combined.drop(columns=["Dataframe"], errors='ignore').set_index("Estratégia"))
+                        paged_table(df_summary_combined.drop(columns=["Dataframe"], errors='ignore'), key="resumo_combinado", hide_index=True) # Paginada no servidor
                     else:
                         st.write("Nenhuma combinação de estratégia resultou em jogos no backtest.")
 
@@ -613,130 +629,145 @@ if df_historico_original is not None:
                     if not df_medias_combined.empty:
                         # Ordena para ver as aprovadas primeiro (opcional)
                         df_medias_combined = df_medias_combined.sort_values(by="Acima dos Limiares", ascending=False)
-                        st.dataframe(df_medias_combined.set_index("Estratégia"))
+                        paged_table(df_medias_combined, key="medias_combinadas", hide_index=True) # Paginada no servidor
                     else:
                         st.write("Nenhuma análise de médias gerada.")
 
+                # --- Validação Walk-Forward (mesma regra de aprovação, aplicada só à janela de treino) ---
+                walk_forward_panel(df_historico, var_strategy_list, cs_lay_strategies_to_test, threshold=0.98, inclusive=True)
+
+                # --- Minerador de faixas de VAR para um mercado alvo (saída no formato declarativo) ---
+                mining_panel(df_historico, vars_dict_historico, history_var_bins(df_historico, 'betfair'))
+
                 # --- Seção de Jogos do Dia ---
-                st.divider() # Linha divisória
-                st.header("🔍 Análise dos Jogos do Dia")
-
-                if not approved_combined_strategies:
-                     st.info("Nenhuma estratégia combinada foi aprovada no backtest histórico. Não há recomendações para os jogos do dia.")
-                else:
-                    st.success(f"{len(approved_combined_strategies)} combinações foram aprovadas no histórico!")
-                    st.write("Faça o upload da planilha com os jogos do dia para verificar recomendações:")
-
-                    uploaded_daily = st.file_uploader(
-                        "Upload da planilha com os jogos do dia (.xlsx ou .csv)",
-                        type=["xlsx", "csv"],
-                        key="daily_combined_v2"
-                    )
-
-                    if uploaded_daily is not None:
-                        # Usa a função de carregamento LOCAL para o arquivo do dia
-                        df_daily_original = load_dataframe_local(uploaded_daily)
-
-                        if df_daily_original is not None:
-                            st.success(f"Arquivo de jogos do dia '{uploaded_daily.name}' carregado ({len(df_daily_original)} linhas).")
-
-                            # Validação de colunas de Odds para aplicar filtros VAR nos jogos do dia
-                            missing_daily_cols = [col for col in required_odds_cols if col not in df_daily_original.columns]
-                            # Verifica também a coluna League
-                            if 'League' not in df_daily_original.columns:
-                                missing_daily_cols.append('League')
-
-                            if missing_daily_cols:
-                                 st.error(f"Colunas necessárias ({', '.join(missing_daily_cols)}) não encontradas nos jogos do dia. Não é possível gerar recomendações.")
-                                 df_daily = None
-                            else:
-                                # Filtro de Ligas diário
-                                df_daily = df_daily_original[df_daily_original['League'].isin(APPROVED_LEAGUES)].copy()
-                                if df_daily.empty and not df_daily_original.empty:
-                                    st.warning("Nenhum jogo do dia pertence às ligas aprovadas.")
-                                elif not df_daily.empty:
-                                    st.info(f"Encontrados {len(df_daily)} jogos do dia nas ligas aprovadas para análise.")
-                                else: # df_daily_original já estava vazio ou só tinha ligas não aprovadas
-                                    st.info("Não há jogos do dia nas ligas aprovadas para analisar.")
-
-
-                            # --- Aplica Filtros Aprovados aos Jogos do Dia ---
-                            if df_daily is not None and not df_daily.empty:
-                                st.subheader("📋 Recomendações para os Jogos do Dia")
-                                #st.info("Calculando variáveis VAR para os jogos do dia...")
-                                with st.spinner("Calculando variáveis VAR e aplicando filtros aprovados..."):
-                                    vars_dict_daily = pre_calculate_all_vars(df_daily.copy()) # Usa cópia
-
-                                    if vars_dict_daily is None:
-                                        st.error("Falha ao calcular VARs para os jogos do dia. Não é possível gerar recomendações.")
-                                    else:
-                                        #st.success("Variáveis VAR dos jogos do dia calculadas.")
-                                        #st.info("Aplicando filtros VAR das estratégias aprovadas...")
-                                        _, daily_var_strategy_map = define_var_strategies(vars_dict_daily) # Gera mapa para dados do dia
-
-                                        daily_recommendations_list = []
-                                        # Colunas básicas para mostrar, se existirem
-                                        cols_to_display_base = ['Time', 'League', 'Home', 'Away']
-                                        cols_exist_daily = [col for col in cols_to_display_base if col in df_daily.columns]
-
-                                        # Loop pelas COMBINAÇÕES APROVADAS no histórico
-                                        for combined_name in approved_combined_strategies:
-                                            # Extrai o nome da Estrategia_VAR e do Lay_CS
-                                            match_var = re.search(r'VAR_(Estrategia_\d+)_CS_(Lay_\w+)$', combined_name)
-                                            if match_var:
-                                                var_name = match_var.group(1)
-                                                cs_lay_name_approved = match_var.group(2) # Nome do Lay CS aprovado
-
-                                                if var_name in daily_var_strategy_map:
-                                                    var_func = daily_var_strategy_map[var_name]
-                                                    try:
-                                                        # Aplica o filtro VAR ao DF diário COMPLETO (já filtrado por liga)
-                                                        df_daily_filtered = var_func(df_daily)
-
-                                                        if not df_daily_filtered.empty:
-                                                            # Para cada jogo que passou no filtro, adiciona a recomendação
-                                                            for idx, row in df_daily_filtered.iterrows():
-                                                                rec = row[cols_exist_daily].to_dict()
-                                                                # Adiciona a recomendação específica (Lay CS)
-                                                                rec['Recomendação'] = cs_lay_name_approved
-                                                                rec['Filtro_VAR'] = var_name # Qual filtro VAR ativou
-                                                                # Adiciona o nome da combinação original para referência, se útil
-                                                                # rec['Estrategia_Combinada'] = combined_name
-                                                                daily_recommendations_list.append(rec)
-                                                    except Exception as e_apply_daily:
-                                                        st.warning(f"Erro ao aplicar filtro {var_name} (de {combined_name}) aos jogos do dia: {e_apply_daily}. Pulando este filtro.")
+                # Fragmento: o upload e a análise dos jogos do dia reexecutam só esta seção
+                @st.fragment
+                @fragment_run(__file__)
+                def secao_jogos_do_dia():
+                    st.divider() # Linha divisória
+                    st.header("🔍 Análise dos Jogos do Dia")
+
+                    if not approved_combined_strategies:
+                         st.info("Nenhuma estratégia combinada foi aprovada no backtest histórico. Não há recomendações para os jogos do dia.")
+                    else:
+                        st.success(f"{len(approved_combined_strategies)} combinações foram aprovadas no histórico!")
+                        st.write("Faça o upload da planilha com os jogos do dia para verificar recomendações:")
+
+                        uploaded_daily = st.file_uploader(
+                            "Upload da planilha com os jogos do dia (.xlsx ou .csv)",
+                            type=["xlsx", "csv"],
+                            key="daily_combined_v2"
+                        )
+
+                        if uploaded_daily is not None:
+                            # Usa a função de carregamento LOCAL para o arquivo do dia
+                            df_daily_original = prepare_leagues(load_dataframe_local(uploaded_daily))
+
+                            if df_daily_original is not None:
+                                st.success(f"Arquivo de jogos do dia '{uploaded_daily.name}' carregado ({len(df_daily_original)} linhas).")
+
+                                # Validação de colunas de Odds para aplicar filtros VAR nos jogos do dia
+                                missing_daily_cols = [col for col in required_odds_cols if col not in df_daily_original.columns]
+                                # Verifica também a coluna League
+                                if 'League' not in df_daily_original.columns:
+                                    missing_daily_cols.append('League')
+
+                                if missing_daily_cols:
+                                     st.error(f"Colunas necessárias ({', '.join(missing_daily_cols)}) não encontradas nos jogos do dia. Não é possível gerar recomendações.")
+                                     df_daily = None
+                                else:
+                                    # Filtro de Ligas diário
+                                    df_daily = filter_approved_leagues(df_daily_original)
+                                    if df_daily.empty and not df_daily_original.empty:
+                                        st.warning("Nenhum jogo do dia pertence às ligas aprovadas.")
+                                    elif not df_daily.empty:
+                                        st.info(f"Encontrados {len(df_daily)} jogos do dia nas ligas aprovadas para análise.")
+                                    else: # df_daily_original já estava vazio ou só tinha ligas não aprovadas
+                                        st.info("Não há jogos do dia nas ligas aprovadas para analisar.")
+
+
+                                # --- Aplica Filtros Aprovados aos Jogos do Dia ---
+                                if df_daily is not None and not df_daily.empty:
+                                    st.subheader("📋 Recomendações para os Jogos do Dia")
+                                    #st.info("Calculando variáveis VAR para os jogos do dia...")
+                                    with st.spinner("Calculando variáveis VAR e aplicando filtros aprovados..."), stage('jogos_do_dia', rows=len(df_daily), profile=True):
+                                        vars_dict_daily = pre_calculate_all_vars(df_daily) # A função copia só as colunas de odds
+
+                                        if vars_dict_daily is None:
+                                            st.error("Falha ao calcular VARs para os jogos do dia. Não é possível gerar recomendações.")
+                                        else:
+                                            #st.success("Variáveis VAR dos jogos do dia calculadas.")
+                                            #st.info("Aplicando filtros VAR das estratégias aprovadas...")
+                                            _, daily_var_strategy_map = define_var_strategies(vars_dict_daily) # Gera mapa para dados do dia
+
+                                            daily_recommendations_list = []
+                                            # Colunas básicas para mostrar, se existirem
+                                            cols_to_display_base = ['Time', 'League', 'Home', 'Away']
+                                            cols_exist_daily = [col for col in cols_to_display_base if col in df_daily.columns]
+
+                                            # Loop pelas COMBINAÇÕES APROVADAS no histórico
+                                            for combined_name in approved_combined_strategies:
+                                                # Extrai o nome da Estrategia_VAR e do Lay_CS
+                                                match_var = re.search(r'VAR_(Estrategia_\d+)_CS_(Lay_\w+)$', combined_name)
+                                                if match_var:
+                                                    var_name = match_var.group(1)
+                                                    cs_lay_name_approved = match_var.group(2) # Nome do Lay CS aprovado
+
+                                                    if var_name in daily_var_strategy_map:
+                                                        var_func = daily_var_strategy_map[var_name]
+                                                        try:
+                                                            # Aplica o filtro VAR ao DF diário COMPLETO (já filtrado por liga)
+                                                            df_daily_filtered = var_func(df_daily)
+
+                                                            if not df_daily_filtered.empty:
+                                                                # Para cada jogo que passou no filtro, adiciona a recomendação
+                                                                for idx, row in df_daily_filtered.iterrows():
+                                                                    rec = row[cols_exist_daily].to_dict()
+                                                                    # Adiciona a recomendação específica (Lay CS)
+                                                                    rec['Recomendação'] = cs_lay_name_approved
+                                                                    rec['Filtro_VAR'] = var_name # Qual filtro VAR ativou
+                                                                    # Adiciona o nome da combinação original para referência, se útil
+                                                                    # rec['Estrategia_Combinada'] = combined_name
+                                                                    daily_recommendations_list.append(rec)
+                                                        except Exception as e_apply_daily:
+                                                            st.warning(f"Erro ao aplicar filtro {var_name} (de {combined_name}) aos jogos do dia: {e_apply_daily}. Pulando este filtro.")
+                                                    else:
+                                                        # Isso não deveria acontecer se define_var_strategies for consistente
+                                                        st.warning(f"Filtro VAR '{var_name}' (de {combined_name}) não encontrado no mapa diário.")
                                                 else:
-                                                    # Isso não deveria acontecer se define_var_strategies for consistente
-                                                    st.warning(f"Filtro VAR '{var_name}' (de {combined_name}) não encontrado no mapa diário.")
-                                            else:
-                                                 st.warning(f"Não foi possível extrair nome VAR e CS Lay de: {combined_name}")
+                                                     st.warning(f"Não foi possível extrair nome VAR e CS Lay de: {combined_name}")
 
 
-                                        if daily_recommendations_list:
-                                            df_final_recommendations = pd.DataFrame(daily_recommendations_list)
+                                            if daily_recommendations_list:
+                                                df_final_recommendations = pd.DataFrame(daily_recommendations_list)
 
-                                            # Agrupar por jogo para mostrar todas as recomendações juntas
-                                            if cols_exist_daily: # Garante que há colunas para agrupar
-                                                group_cols = cols_exist_daily
-                                                # Agrupa por jogo e junta as recomendações e filtros VAR
-                                                df_grouped_recs = df_final_recommendations.groupby(group_cols).agg(
-                                                    Recomendações=('Recomendação', lambda x: ', '.join(sorted(list(set(x))))), # Lista única e ordenada de Lays
-                                                    Filtros_VAR=('Filtro_VAR', lambda x: ', '.join(sorted(list(set(x))))) # Lista única e ordenada de VARs
-                                                ).reset_index()
-                                                st.dataframe(df_grouped_recs)
-                                            else: # Se faltar colunas básicas, mostra a lista desagrupada
-                                                 st.dataframe(df_final_recommendations)
+                                                # Agrupar por jogo para mostrar todas as recomendações juntas
+                                                if cols_exist_daily: # Garante que há colunas para agrupar
+                                                    group_cols = cols_exist_daily
+                                                    # Agrupa por jogo e junta as recomendações e filtros VAR
+                                                    df_grouped_recs = df_final_recommendations.groupby(group_cols).agg(
+                                                        Recomendações=('Recomendação', lambda x: ', '.join(sorted(list(set(x))))), # Lista única e ordenada de Lays
+                                                        Filtros_VAR=('Filtro_VAR', lambda x: ', '.join(sorted(list(set(x))))) # Lista única e ordenada de VARs
+                                                    ).reset_index()
+                                                    st.dataframe(df_grouped_recs)
+                                                else: # Se faltar colunas básicas, mostra a lista desagrupada
+                                                     st.dataframe(df_final_recommendations)
 
-                                        else:
-                                            st.info("Nenhum jogo do dia (nas ligas aprovadas) correspondeu aos filtros VAR das estratégias combinadas aprovadas no histórico.")
-                            elif df_daily is not None and df_daily.empty:
-                                pass # Mensagem de "nenhum jogo nas ligas aprovadas" já foi mostrada
-                            # else: df_daily é None devido a erro de coluna ou leitura, erro já mostrado
-                        # else: Erro ao carregar df_daily_original, erro já mostrado por load_dataframe_local
-                    # else: Nenhum arquivo diário foi carregado
+                                            else:
+                                                st.info("Nenhum jogo do dia (nas ligas aprovadas) correspondeu aos filtros VAR das estratégias combinadas aprovadas no histórico.")
+                                elif df_daily is not None and df_daily.empty:
+                                    pass # Mensagem de "nenhum jogo nas ligas aprovadas" já foi mostrada
+                                # else: df_daily é None devido a erro de coluna ou leitura, erro já mostrado
+                            # else: Erro ao carregar df_daily_original, erro já mostrado por load_dataframe_local
+                        # else: Nenhum arquivo diário foi carregado
+
+                secao_jogos_do_dia()
         # else: Falha ao calcular vars_dict_historico, erro já mostrado
     elif df_historico is None:
          pass # Erro de coluna na base histórica já tratado
     # else: df_historico vazio (nenhum jogo nas ligas aprovadas), aviso já dado
 
 # else: Erro ao carregar df_historico_original do GitHub, erro já mostrado
+
+# --- Painel de performance da execução ---
+performance_panel()
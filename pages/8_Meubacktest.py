@@ -2,12 +2,20 @@
 import streamlit as st
 import pandas as pd
 import requests
-import io
 import ast # For safely evaluating string representations of lists
 from datetime import datetime
+import numpy as np
+
+from core.config import BET365_HISTORY_URL, PREVIEW_POLL_SECONDS, PREVIEW_SAMPLE_ROWS
+from core.data import current_history_manifest, history_version_caption, read_history_frame
+from core.matches import builder_key, cached_matches, matches_running, peek_matches, start_matches
+from core.periods import build_date_index, sidebar_date_window, slice_by_dates
+from core.preview import preview_estimates, stratified_sample
+from core.session import frame_key, session_result
+from core.tables import paged_table
 
 # --- Configuration ---
-GITHUB_RAW_URL = "https://raw.githubusercontent.com/81matheus/BasedeDadosBet365/main/pagesbet365/Exel-Base_de_Dados_Bet365_FiltradaCompleta.xlsx"
+GITHUB_RAW_URL = BET365_HISTORY_URL
 
 # --- Market and Bet Selection Mapping ---
 # This maps user-friendly names to DataFrame column names for odds
@@ -55,63 +63,86 @@ MARKET_TO_ODDS_MAPPING = {
 
 # --- Helper Functions ---
 
-@st.cache_data
 def load_data(url):
+    """Serves the current generation of the shared local columnar store (background revalidation, delta append, works offline)."""
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        excel_file = io.BytesIO(response.content)
-        df = pd.read_excel(excel_file)
-        
-        df['Date'] = pd.to_datetime(df['Date'])
-        
-        def parse_goal_minutes(minute_str):
-            if pd.isna(minute_str) or not isinstance(minute_str, str) or minute_str.strip() == "":
+        manifest = current_history_manifest(url) # Current generation; revalidation runs in the background
+    except requests.exceptions.RequestException as e:
+        st.error(f"Erro ao buscar o arquivo do GitHub: {e}")
+        return pd.DataFrame()
+    history_version_caption(manifest['path'])
+    try:
+        df = load_and_process_data(manifest['path'])
+    except Exception as e:
+        st.error(f"Erro ao carregar/processar dados: {e}")
+        return pd.DataFrame()
+    return df.copy(deep=False) # Shared cached frame; copy-on-write keeps it intact
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def load_and_process_data(store_path):
+    """Reads and preprocesses one store generation; the generation path is part of the cache key.
+
+    Failures propagate to load_data: cache_resource does not cache exceptions, so the next run retries.
+    """
+    df = read_history_frame(store_path)
+    
+    df['Date'] = pd.to_datetime(df['Date'])
+    
+    def parse_goal_minutes(minute_str):
+        if pd.isna(minute_str) or not isinstance(minute_str, str) or minute_str.strip() == "":
             return []
-            try:
-        parsed_list = ast.literal_eval(minute_str)
+        try:
+            parsed_list = ast.literal_eval(minute_str)
             if not isinstance(parsed_list, list): # Adiciona uma checagem para garantir que é uma lista
                 return []
-        
-        # Tenta converter cada item para int, pulando se não for possível
-        processed_list = []
+
+            # Tenta converter cada item para int, pulando se não for possível
+            processed_list = []
             for item in parsed_list:
-            try:
-                processed_list.append(int(item)) # Converte cada item para inteiro
-            except (ValueError, TypeError):
-                # Opcional: logar um aviso se um item não puder ser convertido
-                # st.warning(f"Não foi possível converter o item '{item}' para inteiro nos minutos de gol.")
-                pass # Pula itens não conversíveis
-                return processed_list
-            except (ValueError, SyntaxError):
-        # st.warning(f"Erro ao fazer parsing da string de minutos de gol: {minute_str}")
-                return []
+                try:
+                    processed_list.append(int(item)) # Converte cada item para inteiro
+                except (ValueError, TypeError):
+                    # Opcional: logar um aviso se um item não puder ser convertido
+                    # st.warning(f"Não foi possível converter o item '{item}' para inteiro nos minutos de gol.")
+                    pass # Pula itens não conversíveis
+            return processed_list
+        except (ValueError, SyntaxError):
+            # st.warning(f"Erro ao fazer parsing da string de minutos de gol: {minute_str}")
+            return []
 
-        df['Goals_Min_H_Parsed'] = df['Goals_Min_H'].apply(parse_goal_minutes)
-        df['Goals_Min_A_Parsed'] = df['Goals_Min_A'].apply(parse_goal_minutes)
-        
-        df['Total_Goals_FT'] = df['Goals_H_FT'] + df['Goals_A_FT']
-        df['Total_Goals_HT'] = df['Goals_H_HT'] + df['Goals_A_HT']
-        
-        def determine_result_ft(row):
-            if row['Goals_H_FT'] > row['Goals_A_FT']: return 'H'
-            elif row['Goals_A_FT'] > row['Goals_H_FT']: return 'A'
-            else: return 'D'
-        df['Result_FT'] = df.apply(determine_result_ft, axis=1)
-
-        def determine_result_ht(row):
-            if row['Goals_H_HT'] > row['Goals_A_HT']: return 'H'
-            elif row['Goals_A_HT'] > row['Goals_H_HT']: return 'A'
-            else: return 'D'
-        df['Result_HT'] = df.apply(determine_result_ht, axis=1)
-
-        df['BTTS_Yes_Outcome'] = (df['Goals_H_FT'] > 0) & (df['Goals_A_FT'] > 0)
-
-        df = df.sort_values(by='Date').reset_index(drop=True)
-        return df
-    except Exception as e:
-        st.error(f"Erro ao carregar/processar dados: {e}")
-        return pd.DataFrame()
+    df['Goals_Min_H_Parsed'] = df['Goals_Min_H'].apply(parse_goal_minutes)
+    df['Goals_Min_A_Parsed'] = df['Goals_Min_A'].apply(parse_goal_minutes)
+    
+    df['Total_Goals_FT'] = df['Goals_H_FT'] + df['Goals_A_FT']
+    df['Total_Goals_HT'] = df['Goals_H_HT'] + df['Goals_A_HT']
+    
+    def determine_result_ft(row):
+        if row['Goals_H_FT'] > row['Goals_A_FT']: return 'H'
+        elif row['Goals_A_FT'] > row['Goals_H_FT']: return 'A'
+        else: return 'D'
+    df['Result_FT'] = df.apply(determine_result_ft, axis=1)
+
+    def determine_result_ht(row):
+        if row['Goals_H_HT'] > row['Goals_A_HT']: return 'H'
+        elif row['Goals_A_HT'] > row['Goals_H_HT']: return 'A'
+        else: return 'D'
+    df['Result_HT'] = df.apply(determine_result_ht, axis=1)
+
+    df['BTTS_Yes_Outcome'] = (df['Goals_H_FT'] > 0) & (df['Goals_A_FT'] > 0)
+
+    df = df.sort_values(by='Date', kind='stable').reset_index(drop=True) # Stable: ties keep the store's order
+    return df
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def load_date_index(store_path):
+    """Date index of one generation's preprocessed frame (cached, so it is not rebuilt on every rerun).
+
+    Not history_date_index: that one indexes the columnar store's row order, and load_and_process_data re-sorts by date.
+    """
+    index = build_date_index(load_and_process_data(store_path)['Date'])
+    for key in ('sorted', 'order'):
+        index[key].flags.writeable = False
+    return index
 
 def get_team_last_n_games(df_full, team_name, current_game_date, n_games):
     team_games = df_full[((df_full['Home'] == team_name) | (df_full['Away'] == team_name)) & (df_full['Date'] < current_game_date)]
@@ -296,84 +327,166 @@ if page == "Estratégias":
                                                  disabled=not (apply_goal_before or apply_goal_after))
         st.markdown("---")
 
+        # Candidate games come from the selected season/date range; df_original is date-sorted, so the
+        # window is a contiguous searchsorted slice. Team history still looks back over the full base.
+        date_index = load_date_index(df_original.attrs['store_path'])
+        period_start, period_end = sidebar_date_window(date_index, key="strategy_period")
+        df_candidates = slice_by_dates(df_original, date_index, period_start, period_end)
+
+        # The matched set depends only on these filters (timing values only when the toggle is on), so it is
+        # memoized across sessions by the normalized key (core.matches); the bet label only names a display column
+        timing_key = (minute_goal_before if apply_goal_before else None, minute_goal_after if apply_goal_after else None,
+                      timing_team_scope if (apply_goal_before or apply_goal_after) else None)
+        strategy_key = builder_key('meubacktest', frame_key(df_candidates), selected_odd_column_name, min_odd, max_odd,
+                                   n_games_goals_home, min_avg_goals_home, max_avg_goals_home,
+                                   n_games_wins_home, min_win_rate_home, max_win_rate_home,
+                                   n_games_goals_away, min_avg_goals_away, max_avg_goals_away,
+                                   n_games_wins_away, min_win_rate_away, max_win_rate_away, timing_key)
+
+        def match_strategy(candidates=df_candidates):
+            """Positions of the games that pass every filter, plus their pre-match stats (aligned with 'rows')."""
+            matched_rows, matched_stats = [], []
+            for index, game in candidates.iterrows():
+                current_date = game['Date']
+                home_team = game['Home']
+                away_team = game['Away']
+
+                # --- Statistical Filters ---
+                # Home Team Goals
+                home_team_hist_goals = get_team_last_n_games(df_original, home_team, current_date, n_games_goals_home)
+                if len(home_team_hist_goals) < n_games_goals_home: continue
+                avg_goals_home_actual = calculate_avg_goals_scored(home_team_hist_goals, home_team)
+                if not (min_avg_goals_home <= avg_goals_home_actual <= max_avg_goals_home): continue
+                
+                # Home Team Wins
+                home_team_hist_wins = get_team_last_n_games(df_original, home_team, current_date, n_games_wins_home)
+                if len(home_team_hist_wins) < n_games_wins_home: continue
+                win_rate_home_actual = calculate_win_rate(home_team_hist_wins, home_team)
+                if not (min_win_rate_home <= win_rate_home_actual <= max_win_rate_home): continue
+
+                # Away Team Goals
+                away_team_hist_goals = get_team_last_n_games(df_original, away_team, current_date, n_games_goals_away)
+                if len(away_team_hist_goals) < n_games_goals_away: continue
+                avg_goals_away_actual = calculate_avg_goals_scored(away_team_hist_goals, away_team)
+                if not (min_avg_goals_away <= avg_goals_away_actual <= max_avg_goals_away): continue
+                
+                # Away Team Wins
+                away_team_hist_wins = get_team_last_n_games(df_original, away_team, current_date, n_games_wins_away)
+                if len(away_team_hist_wins) < n_games_wins_away: continue
+                win_rate_away_actual = calculate_win_rate(away_team_hist_wins, away_team)
+                if not (min_win_rate_away <= win_rate_away_actual <= max_win_rate_away): continue
+                
+                # Goal Timing
+                                        # Goal Timing
+                if not check_goal_timing(game, minute_goal_before, minute_goal_after, 
+                                         timing_team_scope, apply_goal_before, apply_goal_after): # <--- CORRECTED HERE
+                    continue
+                
+                # --- Selected Bet Odds Filter ---
+                if selected_odd_column_name not in game or pd.isna(game[selected_odd_column_name]):
+                    continue # Selected odd not available for this game
+                
+                game_odd_for_selected_bet = game[selected_odd_column_name]
+                if not (min_odd <= game_odd_for_selected_bet <= max_odd):
+                    continue
+
+                # If all filters passed, keep the game's position (df_original index 0..n-1) and its stats
+                matched_rows.append(index)
+                matched_stats.append((avg_goals_home_actual, avg_goals_away_actual, win_rate_home_actual, win_rate_away_actual))
+            matched_stats = np.array(matched_stats, dtype=np.float64).reshape(-1, 4)
+            return {'rows': np.array(matched_rows, dtype=np.int64), 'avg_goals_home': matched_stats[:, 0],
+                    'avg_goals_away': matched_stats[:, 1], 'win_rate_home': matched_stats[:, 2], 'win_rate_away': matched_stats[:, 3]}
+
+        def estimate_strategy():
+            """The same filters on a sample stratified by league and season: estimated number of matches."""
+            sample = stratified_sample(df_candidates, PREVIEW_SAMPLE_ROWS)
+            matched = np.isin(sample['rows'], match_strategy(df_candidates.loc[sample['rows']])['rows'])
+            return preview_estimates(sample, matched)
+
+        def matched_frame(matches, bet_key, odd_column):
+            """The matched games with their historical stats, taken while df_original is the generation the positions refer to."""
+            df_matched = df_original.loc[matches['rows']]
+            return df_matched.assign(**{
+                'Hist_Avg_G_H': matches['avg_goals_home'].astype(float).round(2),
+                'Hist_Avg_G_A': matches['avg_goals_away'].astype(float).round(2),
+                'Hist_Win_%_H': matches['win_rate_home'].astype(float).round(1),
+                'Hist_Win_%_A': matches['win_rate_away'].astype(float).round(1),
+                f'Odd_Selecionada ({bet_key})': df_matched[odd_column],
+            })
+
+        preview_mode = st.toggle("⚡ Prévia instantânea (amostra)", value=True, key="strategy_preview_mode",
+                                 help="Mostra na hora o número estimado de jogos numa amostra por liga e temporada, com intervalo de confiança; o resultado completo substitui a prévia quando ficar pronto.")
         if st.button("Analisar Estratégia", type="primary", use_container_width=True):
-            matched_games = []
+            request = {'params': strategy_key, 'name': strategy_name, 'bet': selected_bet_key, 'odd': selected_odd_column_name,
+                       'generation': df_original.attrs.get('store_path')}
             if df_original.empty:
                 st.error("Dados não carregados, não é possível analisar.")
+            elif preview_mode and 0 < PREVIEW_SAMPLE_ROWS < len(df_candidates) and peek_matches(strategy_key) is None:
+                # Instant preview; the full match runs in the background and replaces it when ready
+                with st.spinner("Calculando a prévia na amostra..."):
+                    session_result('strategy_preview', strategy_key, estimate_strategy)
+                start_matches(strategy_key, match_strategy)
+                st.session_state['strategy_pending'] = request
             else:
+                st.session_state.pop('strategy_pending', None)
                 with st.spinner(f"Analisando jogos para a estratégia '{strategy_name}'... Por favor, aguarde."):
-                    for index, game in df_original.iterrows():
-                        current_date = game['Date']
-                        home_team = game['Home']
-                        away_team = game['Away']
-
-                        # --- Statistical Filters ---
-                        # Home Team Goals
-                        home_team_hist_goals = get_team_last_n_games(df_original, home_team, current_date, n_games_goals_home)
-                        if len(home_team_hist_goals) < n_games_goals_home: continue
-                        avg_goals_home_actual = calculate_avg_goals_scored(home_team_hist_goals, home_team)
-                        if not (min_avg_goals_home <= avg_goals_home_actual <= max_avg_goals_home): continue
-                        
-                        # Home Team Wins
-                        home_team_hist_wins = get_team_last_n_games(df_original, home_team, current_date, n_games_wins_home)
-                        if len(home_team_hist_wins) < n_games_wins_home: continue
-                        win_rate_home_actual = calculate_win_rate(home_team_hist_wins, home_team)
-                        if not (min_win_rate_home <= win_rate_home_actual <= max_win_rate_home): continue
-
-                        # Away Team Goals
-                        away_team_hist_goals = get_team_last_n_games(df_original, away_team, current_date, n_games_goals_away)
-                        if len(away_team_hist_goals) < n_games_goals_away: continue
-                        avg_goals_away_actual = calculate_avg_goals_scored(away_team_hist_goals, away_team)
-                        if not (min_avg_goals_away <= avg_goals_away_actual <= max_avg_goals_away): continue
-                        
-                        # Away Team Wins
-                        away_team_hist_wins = get_team_last_n_games(df_original, away_team, current_date, n_games_wins_away)
-                        if len(away_team_hist_wins) < n_games_wins_away: continue
-                        win_rate_away_actual = calculate_win_rate(away_team_hist_wins, away_team)
-                        if not (min_win_rate_away <= win_rate_away_actual <= max_win_rate_away): continue
-                        
-                        # Goal Timing
-                                                # Goal Timing
-                        if not check_goal_timing(game, minute_goal_before, minute_goal_after, 
-                                                 timing_team_scope, apply_goal_before, apply_goal_after): # <--- CORRECTED HERE
-                            continue
-                        
-                        # --- Selected Bet Odds Filter ---
-                        if selected_odd_column_name not in game or pd.isna(game[selected_odd_column_name]):
-                            continue # Selected odd not available for this game
-                        
-                        game_odd_for_selected_bet = game[selected_odd_column_name]
-                        if not (min_odd <= game_odd_for_selected_bet <= max_odd):
-                            continue
-
-                        # If all filters passed, add the game
-                        game_data_to_add = game.copy()
-                        game_data_to_add['Hist_Avg_G_H'] = round(avg_goals_home_actual, 2)
-                        game_data_to_add['Hist_Avg_G_A'] = round(avg_goals_away_actual, 2)
-                        game_data_to_add['Hist_Win_%_H'] = round(win_rate_home_actual, 1)
-                        game_data_to_add['Hist_Win_%_A'] = round(win_rate_away_actual, 1)
-                        game_data_to_add[f'Odd_Selecionada ({selected_bet_key})'] = game_odd_for_selected_bet
-                        
-                        # Determine bet outcome for display/later use (optional for filtering step)
-                        # bet_outcome_result = determine_bet_outcome(game, selected_odd_column_name)
-                        # game_data_to_add['Resultado_Aposta'] = bet_outcome_result
-
-                        matched_games.append(game_data_to_add)
-                
-                st.success(f"Análise concluída! {len(matched_games)} jogos encontrados que correspondem à estratégia '{strategy_name}'.")
+                    matches = cached_matches(strategy_key, match_strategy)
+                    st.session_state['strategy_result'] = {**request, 'df_matched': matched_frame(matches, selected_bet_key, selected_odd_column_name)}
+
+        @st.fragment(run_every=PREVIEW_POLL_SECONDS)
+        def strategy_preview(request):
+            """Fragment: shows the preview and polls every few seconds for the full result."""
+            if not matches_running(request['params']) or peek_matches(request['params']) is not None:
+                st.rerun() # A full page run swaps the preview for the full result
+            preview = session_result('strategy_preview', request['params'])
+            if preview is None: # The session holds another query's preview; keep polling for the full result
+                st.info(f"O resultado completo da estratégia '{request['name']}' está sendo calculado.")
+                return
+            low, high = preview['total_bets'][1:]
+            st.info(f"Prévia da estratégia '{request['name']}': ≈ {preview['total_bets'][0]:.0f} jogos (IC 95%: {low:.0f} a {high:.0f}), "
+                    f"estimados em {preview['sample_size']} jogos amostrados por liga e temporada. O resultado completo está sendo calculado.")
+
+        # Full result finished (or failed) since the last run
+        pending = st.session_state.get('strategy_pending')
+        if pending is not None and pending.get('generation') != df_original.attrs.get('store_path'):
+            # A newer history generation is being served: the background result's positions index the old one
+            del st.session_state['strategy_pending']
+            pending = None
+            st.warning("A base histórica foi atualizada durante o cálculo. Clique em 'Analisar Estratégia' para analisar a versão nova.")
+        if pending is not None:
+            running = matches_running(pending['params'])
+            matches = peek_matches(pending['params'])
+            if matches is not None:
+                st.session_state['strategy_result'] = {**pending, 'df_matched': matched_frame(matches, pending['bet'], pending['odd'])}
+                del st.session_state['strategy_pending']
+                pending = None
+            elif not running:
+                del st.session_state['strategy_pending']
+                pending = None
+                st.error("O cálculo completo da estratégia falhou. Clique em 'Analisar Estratégia' para tentar de novo.")
+
+        result = st.session_state.get('strategy_result')
+        if pending is not None:
+            strategy_preview(pending)
+        elif result is not None:
+            # The saved frame is self-contained: a newer history generation or other filters do not change what it shows
+            df_matched, selected_bet_key = result['df_matched'], result['bet']
+            if result['params'] != strategy_key:
+                st.info("Mostrando os resultados da última execução: os filtros ou a base histórica mudaram desde então. Clique em 'Analisar Estratégia' para atualizar.")
+            st.success(f"Análise concluída! {len(df_matched)} jogos encontrados que correspondem à estratégia '{result['name']}'.")
+            
+            if len(df_matched):
+                cols_to_show = ['Date', 'League', 'Home', 'Away', 'Goals_H_FT', 'Goals_A_FT',
+                                f'Odd_Selecionada ({selected_bet_key})',
+                                'Hist_Avg_G_H', 'Hist_Avg_G_A', 'Hist_Win_%_H', 'Hist_Win_%_A']
+                # Add other relevant odds or info if desired
+                # if 'Resultado_Aposta' in df_matched.columns:
+                #    cols_to_show.append('Resultado_Aposta')
                 
-                if matched_games:
-                    df_matched = pd.DataFrame(matched_games)
-                    cols_to_show = ['Date', 'League', 'Home', 'Away', 'Goals_H_FT', 'Goals_A_FT',
-                                    f'Odd_Selecionada ({selected_bet_key})',
-                                    'Hist_Avg_G_H', 'Hist_Avg_G_A', 'Hist_Win_%_H', 'Hist_Win_%_A']
-                    # Add other relevant odds or info if desired
-                    # if 'Resultado_Aposta' in df_matched.columns:
-                    #    cols_to_show.append('Resultado_Aposta')
-                    
-                    st.dataframe(df_matched[[col for col in cols_to_show if col in df_matched.columns]])
-                else:
-                    st.info("Nenhum jogo encontrado com os critérios definidos.")
+                # Server-side paging: only the visible page is sent to the browser
+                paged_table(df_matched[[col for col in cols_to_show if col in df_matched.columns]], key="strategy_matches")
+            else:
+                st.info("Nenhum jogo encontrado com os critérios definidos.")
 
 elif page == "Dashboard":
     st.header("Dashboard")
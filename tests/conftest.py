@@ -0,0 +1,80 @@
+"""Ambiente dos testes: espelho e base colunar em pasta temporária, sem atualização em segundo plano.
+
+As variáveis BET_* precisam estar definidas antes de core.config ser importado (os módulos de
+teste importam core só depois deste arquivo).
+"""
+import functools
+import hashlib
+import http.server
+import os
+import tempfile
+import threading
+
+import pytest
+
+_WORK_DIR = tempfile.mkdtemp(prefix='bet-tests-')
+os.environ['BET_MIRROR_DIR'] = os.path.join(_WORK_DIR, 'mirror')
+os.environ['BET_STORE_DIR'] = os.path.join(_WORK_DIR, 'store')
+os.environ['BET_REVALIDATE_SECONDS'] = '0' # Toda sincronização revalida na rede
+os.environ['BET_HISTORY_REFRESH_SECONDS'] = '0' # Sem thread de atualização em segundo plano
+os.environ['BET_OFFLINE'] = ''
+os.environ['BET_PERF_LOG'] = ''
+os.environ['BET_PROFILE'] = ''
+
+
+class _MirrorSourceHandler(http.server.SimpleHTTPRequestHandler):
+    """Serve os arquivos da pasta com ETag (sha1 do conteúdo) e responde 304 a If-None-Match igual."""
+
+    def __init__(self, *args, server_state, **kwargs):
+        self.server_state = server_state
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        path = self.translate_path(self.path)
+        self.server_state['requests'].append({'path': self.path, 'headers': dict(self.headers)})
+        if not os.path.isfile(path):
+            self.send_error(404)
+            return
+        with open(path, 'rb') as f:
+            content = f.read()
+        etag = '"' + hashlib.sha1(content).hexdigest() + '"'
+        if self.headers.get('If-None-Match') == etag:
+            self.server_state['statuses'].append(304)
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.server_state['statuses'].append(200)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(len(content)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def http_source(tmp_path):
+    """Servidor HTTP local que imita o GitHub: {'dir', 'url(nome)', 'requests', 'statuses', 'stop()'}."""
+    directory = tmp_path / 'source'
+    directory.mkdir()
+    state = {'requests': [], 'statuses': []}
+    handler = functools.partial(_MirrorSourceHandler, directory=str(directory), server_state=state)
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    port = server.server_address[1]
+    stopped = []
+
+    def stop():
+        if not stopped:
+            server.shutdown()
+            server.server_close()
+            stopped.append(True)
+
+    state.update(dir=directory, url=lambda name: f"http://127.0.0.1:{port}/{name}", stop=stop)
+    yield state
+    stop()
@@ -0,0 +1,95 @@
+"""core.data / core.store: a ingestão incremental deixa a base igual a uma reconstrução completa."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks import synthetic
+from core.data import load_team_form_index, sync_history_store
+from core.form import team_form_window
+from core.store import load_array, load_frame
+
+ROWS = 400
+NEW_ROWS = 60
+
+
+def _snapshot(manifest):
+    """Frame, arrays derivados e índice de forma de uma geração, em memória (a geração pode ser apagada depois)."""
+    arrays = {}
+    for name in ('match_keys', 'outcome_matrix', 'vars_bet365', 'varbins_bet365', 'varedges_bet365'):
+        arrays[name] = np.array(load_array(manifest, name, mmap=False))
+    form = {key: np.array(value) if key != 'team_names' else value
+            for key, value in load_team_form_index(manifest).items()}
+    return load_frame(manifest), arrays, form, manifest
+
+
+@pytest.fixture
+def history(http_source):
+    """Histórico sintético: a fonte começa com as primeiras linhas e depois recebe as novas no fim."""
+    df = synthetic.bet365_history(ROWS + NEW_ROWS, seed=3)
+    path = http_source['dir'] / 'historico.xlsx'
+    return df, path, http_source['url']('historico.xlsx')
+
+
+def test_first_sync_builds_the_store(history):
+    df, path, url = history
+    synthetic.write_xlsx(df.iloc[:ROWS], path)
+    manifest = sync_history_store(url)
+    assert manifest['mode'] == 'rebuild'
+    assert manifest['rows'] == ROWS
+    frame = load_frame(manifest)
+    pd.testing.assert_series_equal(frame['Home'], df['Home'].iloc[:ROWS], check_names=False)
+
+
+def test_unchanged_source_keeps_the_generation(history):
+    df, path, url = history
+    synthetic.write_xlsx(df.iloc[:ROWS], path)
+    first = sync_history_store(url)
+    assert sync_history_store(url)['path'] == first['path']
+
+
+def test_append_equals_full_rebuild(history):
+    df, path, url = history
+    synthetic.write_xlsx(df.iloc[:ROWS], path)
+    sync_history_store(url)
+    synthetic.write_xlsx(df, path)
+    appended = _snapshot(sync_history_store(url))
+    assert appended[3]['mode'] == 'append'
+    assert appended[3]['appended_rows'] == NEW_ROWS
+    rebuilt = _snapshot(sync_history_store(url, rebuild=True))
+    assert rebuilt[3]['mode'] == 'rebuild'
+
+    pd.testing.assert_frame_equal(appended[0], rebuilt[0])
+    for name in ('match_keys', 'outcome_matrix', 'vars_bet365'):
+        np.testing.assert_array_equal(appended[1][name], rebuilt[1][name], err_msg=name)
+    # O índice estendido guarda os times novos no fim (códigos e blocos diferem da reconstrução),
+    # mas responde "últimos N jogos" igual para todas as linhas
+    for n_games in (1, 3, 5, 10):
+        for side in ('home', 'away'):
+            for got, expected in zip(team_form_window(appended[2], n_games, side),
+                                     team_form_window(rebuilt[2], n_games, side)):
+                np.testing.assert_array_equal(got, expected, err_msg=f"{side} {n_games}")
+
+
+def test_append_keeps_the_stored_bin_edges(history):
+    from core.binning import encode_var_matrix
+    df, path, url = history
+    synthetic.write_xlsx(df.iloc[:ROWS], path)
+    first = _snapshot(sync_history_store(url))
+    synthetic.write_xlsx(df, path)
+    appended = _snapshot(sync_history_store(url))
+    # Os cortes não mudam com o acréscimo; os códigos de todas as linhas são os desses cortes
+    np.testing.assert_array_equal(appended[1]['varedges_bet365'], first[1]['varedges_bet365'])
+    codes, _ = encode_var_matrix(appended[1]['vars_bet365'], first[1]['varedges_bet365'])
+    np.testing.assert_array_equal(appended[1]['varbins_bet365'], codes)
+
+
+def test_changed_old_rows_force_a_rebuild(history):
+    df, path, url = history
+    synthetic.write_xlsx(df.iloc[:ROWS], path)
+    sync_history_store(url)
+    changed = df.copy()
+    changed.loc[5, 'Home'] = 'Time Renomeado'
+    synthetic.write_xlsx(changed, path)
+    manifest = sync_history_store(url)
+    assert manifest['mode'] == 'rebuild'
+    assert load_frame(manifest)['Home'].iloc[5] == 'Time Renomeado'
@@ -0,0 +1,77 @@
+"""core.fetch: download para o espelho, revalidação condicional (ETag/304) e modo offline."""
+import pytest
+import requests
+
+from core.fetch import fetch_to_mirror, read_mirror_metadata
+
+
+def _write(http_source, name, content):
+    (http_source['dir'] / name).write_bytes(content)
+    return http_source['url'](name)
+
+
+def test_first_fetch_downloads_to_mirror(http_source, tmp_path):
+    url = _write(http_source, 'base.xlsx', b'conteudo v1')
+    info = fetch_to_mirror(url, mirror_dir=str(tmp_path / 'mirror'), max_age=0)
+    assert info['status'] == 'downloaded'
+    assert info['bytes'] == len(b'conteudo v1')
+    with open(info['path'], 'rb') as f:
+        assert f.read() == b'conteudo v1'
+    assert read_mirror_metadata(url, str(tmp_path / 'mirror'))['etag'] == info['etag']
+
+
+def test_revalidation_sends_etag_and_keeps_mirror_on_304(http_source, tmp_path):
+    url = _write(http_source, 'base.xlsx', b'conteudo v1')
+    mirror = str(tmp_path / 'mirror')
+    first = fetch_to_mirror(url, mirror_dir=mirror, max_age=0)
+    second = fetch_to_mirror(url, mirror_dir=mirror, max_age=0)
+    assert second['status'] == 'not_modified'
+    assert second['version'] == first['version']
+    assert http_source['statuses'] == [200, 304]
+    assert http_source['requests'][1]['headers'].get('If-None-Match') == first['etag']
+
+
+def test_recent_check_is_served_without_network(http_source, tmp_path):
+    url = _write(http_source, 'base.xlsx', b'conteudo v1')
+    mirror = str(tmp_path / 'mirror')
+    fetch_to_mirror(url, mirror_dir=mirror, max_age=0)
+    assert fetch_to_mirror(url, mirror_dir=mirror, max_age=3600)['status'] == 'fresh'
+    assert len(http_source['requests']) == 1
+
+
+def test_changed_source_is_downloaded_again(http_source, tmp_path):
+    url = _write(http_source, 'base.xlsx', b'conteudo v1')
+    mirror = str(tmp_path / 'mirror')
+    first = fetch_to_mirror(url, mirror_dir=mirror, max_age=0)
+    _write(http_source, 'base.xlsx', b'conteudo v2, maior')
+    second = fetch_to_mirror(url, mirror_dir=mirror, max_age=0)
+    assert second['status'] == 'downloaded'
+    assert second['version'] != first['version']
+    with open(second['path'], 'rb') as f:
+        assert f.read() == b'conteudo v2, maior'
+
+
+def test_offline_mode_serves_mirror_without_network(http_source, tmp_path):
+    url = _write(http_source, 'base.xlsx', b'conteudo v1')
+    mirror = str(tmp_path / 'mirror')
+    first = fetch_to_mirror(url, mirror_dir=mirror, max_age=0)
+    info = fetch_to_mirror(url, mirror_dir=mirror, max_age=0, offline=True)
+    assert info['status'] == 'offline'
+    assert info['version'] == first['version']
+    assert len(http_source['requests']) == 1
+
+
+def test_unreachable_server_falls_back_to_mirror(http_source, tmp_path):
+    url = _write(http_source, 'base.xlsx', b'conteudo v1')
+    mirror = str(tmp_path / 'mirror')
+    first = fetch_to_mirror(url, mirror_dir=mirror, max_age=0)
+    http_source['stop']()
+    info = fetch_to_mirror(url, mirror_dir=mirror, max_age=0, timeout=(1, 1))
+    assert info['status'] == 'offline'
+    assert info['path'] == first['path']
+
+
+def test_offline_without_mirror_raises(http_source, tmp_path):
+    url = _write(http_source, 'base.xlsx', b'conteudo v1')
+    with pytest.raises(requests.exceptions.ConnectionError):
+        fetch_to_mirror(url, mirror_dir=str(tmp_path / 'mirror'), offline=True)
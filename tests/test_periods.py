@@ -0,0 +1,69 @@
+"""core.periods: o recorte pelo índice de datas é igual à comparação da coluna de datas inteira."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks import synthetic
+from core.periods import build_date_index, list_seasons, season_range, slice_by_dates, window_positions
+
+WINDOWS = [
+    (None, None), ('2020-03-15', None), (None, '2021-06-30'), ('2020-07-01', '2021-06-30'),
+    ('2021-02-10', '2021-02-10'), ('2030-01-01', None), (None, '1990-01-01'), ('2021-06-30', '2020-07-01'),
+]
+
+
+def _expected(df, start, end):
+    dates = pd.to_datetime(df['Date'], errors='coerce')
+    mask = dates.notna()
+    if start is not None:
+        mask &= dates >= pd.Timestamp(start)
+    if end is not None:
+        mask &= dates < pd.Timestamp(end) + pd.Timedelta(days=1)
+    return df[mask]
+
+
+def _histories():
+    df = synthetic.betfair_history(2000, seed=3)
+    shuffled = df.sample(frac=1, random_state=3)
+    with_missing = df.copy()
+    with_missing.loc[with_missing.index[::97], 'Date'] = pd.NaT
+    return {'ordenada': df, 'embaralhada': shuffled, 'datas_ausentes': with_missing}
+
+
+@pytest.mark.parametrize('kind', ['ordenada', 'embaralhada', 'datas_ausentes'])
+@pytest.mark.parametrize('start, end', WINDOWS)
+def test_slice_matches_boolean_mask(kind, start, end):
+    df = _histories()[kind]
+    index = build_date_index(df['Date'])
+    expected = df if start is None and end is None else _expected(df, start, end)
+    pd.testing.assert_frame_equal(slice_by_dates(df, index, start, end), expected)
+
+
+def test_sorted_history_is_contiguous():
+    df = synthetic.betfair_history(500, seed=4)
+    index = build_date_index(df['Date'])
+    assert index['contiguous']
+    assert isinstance(window_positions(index, '2020-06-01', '2020-12-31'), slice)
+
+    shuffled = build_date_index(df['Date'].sample(frac=1, random_state=4))
+    assert not shuffled['contiguous']
+    assert (np.diff(shuffled['sorted']) >= 0).all()
+
+
+def test_dates_with_time_of_day_count_for_the_whole_day():
+    df = pd.DataFrame({'Date': pd.to_datetime(['2021-01-01 00:00', '2021-01-01 23:30', '2021-01-02 00:00'])})
+    index = build_date_index(df['Date'])
+    assert len(slice_by_dates(df, index, '2021-01-01', '2021-01-01')) == 2
+
+
+def test_season_range():
+    assert season_range('2021') == (pd.Timestamp('2021-01-01'), pd.Timestamp('2021-12-31'))
+    assert season_range('2021/22') == (pd.Timestamp('2021-07-01'), pd.Timestamp('2022-06-30'))
+    assert season_range('1999/00') == (pd.Timestamp('1999-07-01'), pd.Timestamp('2000-06-30'))
+
+
+def test_list_seasons_covers_the_history():
+    df = pd.DataFrame({'Date': pd.to_datetime(['2020-03-01', '2021-08-15'])})
+    seasons = list_seasons(build_date_index(df['Date']))
+    assert seasons == ['2021', '2021/22', '2020', '2020/21', '2019/20']
+    assert list_seasons(build_date_index(pd.Series([pd.NaT]))) == []
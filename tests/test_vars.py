@@ -0,0 +1,56 @@
+"""core.vars: a matriz das VARs reproduz pre_calculate_all_vars das páginas."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks import synthetic
+from benchmarks.page_functions import load_page_functions
+from core.vars import BET365_ODDS_MAP, BETFAIR_ODDS_MAP, VAR_NAMES, compute_var_matrix, var_dict_from_matrix
+
+
+def _with_invalid_odds(df, columns):
+    """Odds inválidas como as das planilhas reais: vazias, zero, negativas e infinitas."""
+    df = df.copy()
+    for i, col in enumerate(columns):
+        df.loc[i % len(df), col] = [np.nan, 0.0, -1.5, np.inf][i % 4]
+    return df
+
+
+@pytest.mark.parametrize('page, history, odds_map', [
+    ('3_Trading_Score.py', synthetic.betfair_history, BETFAIR_ODDS_MAP),
+    ('5_Handicap_Betfair.py', synthetic.betfair_history, BETFAIR_ODDS_MAP),
+    ('2_Handicap.py', synthetic.bet365_history, BET365_ODDS_MAP),
+    ('7_TESTEDEHANDICAP.py', synthetic.bet365_history, BET365_ODDS_MAP),
+])
+def test_var_matrix_matches_page_vars(page, history, odds_map):
+    df = _with_invalid_odds(history(500, seed=1), list(odds_map))
+    expected = load_page_functions(page, ['pre_calculate_all_vars'])['pre_calculate_all_vars'](df)
+    matrix = compute_var_matrix(df, odds_map)
+    assert matrix.shape == (len(df), len(VAR_NAMES))
+    assert list(expected) == list(VAR_NAMES)
+    for j, name in enumerate(VAR_NAMES):
+        np.testing.assert_allclose(matrix[:, j], expected[name].to_numpy(dtype=np.float64), rtol=1e-12, atol=0,
+                                   err_msg=name)
+
+
+def test_var_matrix_rows_are_independent():
+    """Calcular só as linhas novas e concatenar dá a mesma matriz (base da ingestão incremental)."""
+    df = synthetic.betfair_history(300, seed=2)
+    full = compute_var_matrix(df, BETFAIR_ODDS_MAP)
+    parts = np.vstack([compute_var_matrix(df.iloc[:200], BETFAIR_ODDS_MAP),
+                       compute_var_matrix(df.iloc[200:], BETFAIR_ODDS_MAP)])
+    np.testing.assert_array_equal(full, parts)
+
+
+def test_missing_odds_column_raises():
+    df = synthetic.betfair_history(10).drop(columns=['Odd_CS_0x0_Lay'])
+    with pytest.raises(KeyError):
+        compute_var_matrix(df, BETFAIR_ODDS_MAP)
+
+
+def test_var_dict_is_a_view_of_the_matrix():
+    df = synthetic.betfair_history(20)
+    matrix = compute_var_matrix(df, BETFAIR_ODDS_MAP)
+    vars_dict = var_dict_from_matrix(matrix, df.index)
+    pd.testing.assert_index_equal(vars_dict['VAR13'].index, df.index)
+    assert np.shares_memory(vars_dict['VAR13'].to_numpy(), matrix)
@@ -0,0 +1,58 @@
+"""core.xlsx_reader: leitura em streaming equivalente ao pd.read_excel, sem coerção de textos."""
+import pandas as pd
+import pytest
+
+from benchmarks import synthetic
+from core import xlsx_reader
+from core.xlsx_reader import iter_xlsx_rows, read_xlsx_streaming
+
+
+@pytest.mark.parametrize('history', [synthetic.bet365_history, synthetic.betfair_history])
+def test_streaming_matches_read_excel(tmp_path, history):
+    path = synthetic.write_xlsx(history(1500, seed=7), tmp_path / 'base.xlsx')
+    expected = pd.read_excel(path)
+    pd.testing.assert_frame_equal(read_xlsx_streaming(path, chunk_rows=400), expected, check_dtype=False)
+
+
+def test_numeric_looking_text_stays_text(tmp_path):
+    df = pd.DataFrame({'Rodada': ['1', '2', 'Final'], 'Codigo': ['007', '010', '123'], 'Odd': [1.5, 2.0, 3.25]})
+    path = synthetic.write_xlsx(df, tmp_path / 'textos.xlsx')
+    result = read_xlsx_streaming(path, chunk_rows=2)
+    assert result['Rodada'].tolist() == ['1', '2', 'Final']
+    assert result['Codigo'].tolist() == ['007', '010', '123']
+    assert result['Odd'].tolist() == [1.5, 2.0, 3.25]
+
+
+def test_declared_numeric_columns_are_coerced(tmp_path):
+    df = pd.DataFrame({'Odd_H_Back': ['1.5', 2.0, '-', None], 'League': ['A', 'B', 'C', 'D']})
+    path = synthetic.write_xlsx(df, tmp_path / 'odds.xlsx')
+    result = read_xlsx_streaming(path, numeric_columns=('Odd_H_Back',))
+    assert result['Odd_H_Back'].dtype == 'float64'
+    assert result['Odd_H_Back'].tolist()[:2] == [1.5, 2.0]
+    assert result['Odd_H_Back'].isna().tolist()[2:] == [True, True]
+    assert result['League'].tolist() == ['A', 'B', 'C', 'D']
+
+
+def test_reader_failure_mid_stream_is_not_retried(tmp_path, monkeypatch):
+    path = synthetic.write_xlsx(synthetic.betfair_history(50), tmp_path / 'base.xlsx')
+
+    class BrokenSheet:
+        def iter_rows(self):
+            yield ('Date', 'League')
+            yield ('2021-01-01', 'A')
+            raise RuntimeError('planilha corrompida')
+
+    monkeypatch.setattr(xlsx_reader, '_calamine_sheet', lambda path, sheet_index: BrokenSheet())
+    rows = []
+    with pytest.raises(RuntimeError):
+        for row in iter_xlsx_rows(path):
+            rows.append(row)
+    assert rows == [('Date', 'League'), ('2021-01-01', 'A')]
+
+
+def test_falls_back_to_openpyxl_without_calamine(tmp_path, monkeypatch):
+    df = synthetic.betfair_history(200, seed=8)
+    path = synthetic.write_xlsx(df, tmp_path / 'base.xlsx')
+    expected = read_xlsx_streaming(path)
+    monkeypatch.setattr(xlsx_reader, '_calamine_sheet', lambda path, sheet_index: None)
+    pd.testing.assert_frame_equal(read_xlsx_streaming(path), expected, check_dtype=False)